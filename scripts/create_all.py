@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
 import subprocess
 import sys
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from readiness import SERVICES, wait_for_service
 
 def print_header(message):
     """Печать заголовка с выделением"""
@@ -13,51 +17,154 @@ def print_header(message):
     print(f"   {message}")
     print(f"{line}\n")
 
+# Этапы загрузки: (имя, скрипт, этапы-зависимости, сервисы из readiness.SERVICES).
+# PostgreSQL - центральная БД, остальные хранилища берут из нее данные
+# и друг от друга не зависят, поэтому загружаются параллельно.
+STAGES = [
+    ("postgresql", "postgresql_create.py", [], ["postgresql"]),
+    ("neo4j", "neo4j_create.py", ["postgresql"], ["neo4j"]),
+    ("elasticsearch", "elasticsearch_create.py", ["postgresql"], ["elasticsearch"]),
+    ("mongodb", "mongodb_create.py", ["postgresql"], ["mongodb"]),
+    ("redis", "redis_create.py", ["postgresql"], ["redis"])
+]
+
 def run_script(script_name):
-    """Запуск указанного скрипта"""
-    print_header(f"Выполнение скрипта: {script_name}")
-    
+    """Запуск указанного скрипта; вывод скрипта возвращается целиком"""
     try:
         # Формируем путь к скрипту
-        script_path = os.path.join(os.path.dirname(__file__), script_name)
+        script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), script_name)
         
-        # Запускаем скрипт с помощью Python
-        result = subprocess.run([sys.executable, script_path], check=True)
+        # Запускаем скрипт с помощью Python, собирая вывод, чтобы параллельные этапы не перемешивались.
+        # Каждый этап - отдельный процесс со своим пулом соединений PostgreSQL.
+        result = subprocess.run(
+            [sys.executable, script_path],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace"
+        )
         
         if result.returncode == 0:
-            print(f"\n✅ Скрипт {script_name} успешно выполнен")
-            return True
-        else:
-            print(f"\n❌ Скрипт {script_name} завершился с ошибкой (код {result.returncode})")
-            return False
+            return True, result.stdout + f"\n✅ Скрипт {script_name} успешно выполнен"
+        return False, result.stdout + f"\n❌ Скрипт {script_name} завершился с ошибкой (код {result.returncode})"
             
     except subprocess.SubprocessError as e:
-        print(f"\n❌ Ошибка при запуске скрипта {script_name}: {e}")
-        return False
+        return False, f"❌ Ошибка при запуске скрипта {script_name}: {e}"
     except Exception as e:
-        print(f"\n❌ Непредвиденная ошибка: {e}")
-        return False
+        return False, f"❌ Непредвиденная ошибка: {e}"
+
+def run_stage(name, script, services, pipeline_started):
+    """Этап загрузки: ожидание готовности сервисов и запуск скрипта"""
+    started = time.perf_counter()
+    for service in services:
+        ready, elapsed, attempts, error = wait_for_service(service)
+        if not ready:
+            finished = time.perf_counter()
+            output = f"❌ {SERVICES[service][0]} не готов за {elapsed:.1f} с (попыток: {attempts}): {error}"
+            return False, output, (started - pipeline_started, finished - started, 0.0)
+    ready = time.perf_counter()
+
+    success, output = run_script(script)
+    finished = time.perf_counter()
+    return success, output, (started - pipeline_started, ready - started, finished - ready)
+
+def run_stages(stages=STAGES, jobs=None):
+    """Параллельный запуск этапов по графу зависимостей
+
+    Этап запускается, как только успешно завершены все его зависимости;
+    если зависимость завершилась с ошибкой, этап пропускается.
+    Возвращает словари {этап: успех} и {этап: (старт, ожидание, работа)}.
+    """
+    by_name = {stage[0]: stage for stage in stages}
+    results = {}
+    timings = {}
+    running = {}
+    pipeline_started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=jobs or len(stages)) as executor:
+        while len(results) < len(stages):
+            progress = False
+            for name, script, depends, services in stages:
+                if name in results or name in running.values():
+                    continue
+                if any(results.get(dep) is False for dep in depends):
+                    results[name] = False
+                    progress = True
+                    print(f"⚠️ Этап {name} пропущен: не выполнены зависимости {', '.join(depends)}")
+                elif all(results.get(dep) for dep in depends):
+                    print(f"▶️ Запуск этапа {name} ({script})")
+                    future = executor.submit(run_stage, name, script, services, pipeline_started)
+                    running[future] = name
+
+            if not running:
+                if not progress:
+                    break
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                success, output, timing = future.result()
+                results[name] = success
+                timings[name] = timing
+                print_header(f"Выполнение скрипта: {by_name[name][1]}")
+                print(output)
+
+    return results, timings
+
+def critical_path(stages, timings):
+    """Критический путь: цепочка зависимых этапов с наибольшим суммарным временем"""
+    longest = {}
+    for name, _, depends, _ in stages:
+        if name not in timings:
+            continue
+        _, waited, elapsed = timings[name]
+        previous = max(
+            (longest[dep] for dep in depends if dep in longest),
+            key=lambda item: item[0],
+            default=(0.0, [])
+        )
+        longest[name] = (previous[0] + waited + elapsed, previous[1] + [name])
+    return max(longest.values(), key=lambda item: item[0], default=(0.0, []))
+
+def print_timings(stages, timings, total):
+    """Разбивка времени по этапам и критический путь"""
+    print_header("ВРЕМЯ ВЫПОЛНЕНИЯ ЭТАПОВ")
+    print(f"{'Этап':<15}{'Старт, с':>10}{'Ожидание, с':>14}{'Работа, с':>12}{'Конец, с':>10}")
+    for name, _, _, _ in stages:
+        if name not in timings:
+            continue
+        started, waited, elapsed = timings[name]
+        print(f"{name:<15}{started:>10.2f}{waited:>14.2f}{elapsed:>12.2f}{started + waited + elapsed:>10.2f}")
+
+    length, path = critical_path(stages, timings)
+    print(f"\nКритический путь: {' -> '.join(path)} ({length:.2f} с)")
+    print(f"Общее время: {total:.2f} с")
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Создание и заполнение всех баз данных")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="максимальное число одновременно выполняемых этапов (по умолчанию - все)"
+    )
+    return parser.parse_args()
 
 def main():
     """Основная функция для запуска всех скриптов создания данных"""
+    args = parse_args()
     print_header("СОЗДАНИЕ И ЗАПОЛНЕНИЕ БАЗ ДАННЫХ")
     
-    # Список скриптов для запуска в нужном порядке
-    # Сначала создаем PostgreSQL как центральную БД, затем остальные, которые берут из неё данные
-    scripts = [
-        "postgresql_create.py",  # Первым запускаем PostgreSQL, так как он является центральной БД
-        "neo4j_create.py",       # Затем остальные БД, которые используют данные из PostgreSQL
-        "elasticsearch_create.py",
-        "mongodb_create.py",
-        "redis_create.py"
-    ]
-    
-    # Запускаем скрипты по очереди
-    results = {}
-    for script in scripts:
-        results[script] = run_script(script)
-        # Небольшая пауза между скриптами
-        time.sleep(2)  # Увеличиваем паузу для гарантированного завершения каждого скрипта
+    # Сначала PostgreSQL как центральная БД, затем параллельно остальные, которые берут из неё данные
+    started = time.perf_counter()
+    results, timings = run_stages(STAGES, jobs=args.jobs)
+    print_timings(STAGES, timings, time.perf_counter() - started)
+    scripts = [stage[1] for stage in STAGES]
+    results = {stage[1]: results[stage[0]] for stage in STAGES}
     
     # Выводим итоговый результат
     print_header("ИТОГИ ВЫПОЛНЕНИЯ")
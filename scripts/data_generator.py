@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import datetime
+import itertools
+import random
+import time
+from datetime import timedelta
+
+import numpy as np
+from faker import Faker
+
+from postgresql_bulk import ColumnBatches
+
+# Часовой пояс расписания (Москва, без перехода на летнее время)
+TIMEZONE = datetime.timezone(timedelta(hours=3))
+
+# Время начала пар и продолжительность занятия
+PAIR_STARTS = [(9, 0), (10, 45), (12, 30), (14, 15), (16, 0), (17, 45)]
+PAIR_DURATION = timedelta(hours=1, minutes=30)
+STUDY_DAYS = 6  # понедельник - суббота
+DAY_SECONDS = 24 * 3600
+WEEK_SECONDS = 7 * DAY_SECONDS
+
+# Номера независимых потоков NumPy для векторной генерации
+STREAM_DILIGENCE = 1
+STREAM_VISITS = 2
+
+UNIVERSITY_NAMES = [
+    'Московский Государственный Университет',
+    'Санкт-Петербургский Государственный Университет',
+    'Казанский Федеральный Университет',
+    'Новосибирский Государственный Университет',
+    'Уральский Федеральный Университет',
+    'Томский Государственный Университет',
+    'Дальневосточный Федеральный Университет',
+    'Южный Федеральный Университет'
+]
+
+INSTITUTE_NAMES = [
+    'Институт компьютерных наук',
+    'Институт математики',
+    'Институт информационных технологий',
+    'Институт физики',
+    'Институт химии',
+    'Институт экономики',
+    'Институт биологии',
+    'Институт гуманитарных наук'
+]
+
+DEPARTMENT_TOPICS = [
+    'программной инженерии', 'баз данных', 'высшей математики',
+    'искусственного интеллекта', 'теоретической физики', 'прикладной математики',
+    'информационной безопасности', 'вычислительных систем', 'математической статистики',
+    'компьютерной графики', 'сетевых технологий', 'системного анализа'
+]
+
+SPECIALTIES = [
+    ('Информатика и вычислительная техника', '09.03.01'),
+    ('Программная инженерия', '09.03.04'),
+    ('Прикладная математика', '01.03.04'),
+    ('Информационная безопасность', '10.03.01'),
+    ('Математика', '01.03.01'),
+    ('Физика', '03.03.02'),
+    ('Прикладная информатика', '09.03.03'),
+    ('Информационные системы и технологии', '09.03.02'),
+    ('Математика и компьютерные науки', '02.03.01'),
+    ('Фундаментальная информатика', '02.03.02'),
+    ('Химия', '04.03.01'),
+    ('Экономика', '38.03.01')
+]
+
+COURSE_NAMES = [
+    'Введение в программирование', 'Базы данных', 'Математический анализ',
+    'Машинное обучение', 'Физика', 'Алгоритмы и структуры данных',
+    'Операционные системы', 'Компьютерные сети', 'Линейная алгебра',
+    'Теория вероятностей', 'Дискретная математика', 'Архитектура ЭВМ',
+    'Компиляторы', 'Распределенные системы', 'Криптография', 'Статистика'
+]
+
+LECTURE_TOPICS = [
+    'Введение', 'Основные понятия', 'Модели и методы', 'Практическое применение',
+    'Алгоритмы', 'Оптимизация', 'Анализ сложности', 'Современные подходы',
+    'Обзор инструментов', 'Итоговое занятие'
+]
+
+MATERIAL_KINDS = ['Слайды', 'Конспект', 'Примеры кода', 'Задачи для самопроверки']
+
+COLUMNS = {
+    "universities": ["id", "name"],
+    "institutes": ["id", "id_univer", "name"],
+    "departments": ["id", "id_institutes", "name"],
+    "specialties": ["id", "name", "code"],
+    "courses": ["id", "id_kafedr_a", "id_spec", "name", "term"],
+    "groups": ["id", "id_kafedr_a", "name", "startYear", "endYear"],
+    "students": ["id", "id_group", "fio", "date_of_recipient"],
+    "lectures": ["id", "id_course", "name", "requirements"],
+    "materials": ["id", "id_lect", "name", "content"],
+    "schedule": ["id", "id_lect", "id_group", "startTime", "endTime"],
+    "visits": ["id", "id_student", "id_rasp", "visitTime"]
+}
+
+def chunked(rows, size):
+    """Разбиение потока строк на списки фиксированного размера"""
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def pick_name(names, index):
+    """Имя из списка по порядковому номеру; при исчерпании списка добавляется номер"""
+    name = names[index % len(names)]
+    cycle = index // len(names)
+    return name if cycle == 0 else f"{name} №{cycle + 1}"
+
+class DataGenerator:
+    """Детерминированный генератор синтетических данных университета
+
+    Объем данных определяется коэффициентом масштаба scale: при scale=1
+    генерируется около 5 тысяч студентов, 37 тысяч занятий и 780 тысяч
+    посещений. Все таблицы выдаются ленивыми итераторами, поэтому
+    потребление памяти не зависит от объема. Случайные величины каждой
+    таблицы берутся из отдельного генератора, инициализированного от seed,
+    так что повторный запуск с тем же seed дает идентичные данные.
+    """
+
+    institutes_per_university = 4
+    departments_per_institute = 4
+    courses_per_department = 4
+    lectures_per_course = 6
+    materials_per_lecture = 2
+    groups_per_department = 4
+    students_per_group = 25
+    lessons_per_week = 6
+    weeks_per_semester = 16
+    study_years = 4
+
+    def __init__(self, scale=1.0, seed=42, semesters=2, start_date=datetime.date(2023, 9, 4)):
+        self.scale = scale
+        self.seed = seed
+        self.semesters = semesters
+        self.start_date = start_date - timedelta(days=start_date.weekday())
+
+        self.universities = max(1, round(3 * scale))
+        self.institutes = self.universities * self.institutes_per_university
+        self.departments = self.institutes * self.departments_per_institute
+        self.specialties = len(SPECIALTIES)
+        self.courses = self.departments * self.courses_per_department
+        self.lectures = self.courses * self.lectures_per_course
+        self.materials = self.lectures * self.materials_per_lecture
+        self.groups = self.departments * self.groups_per_department
+        self.students = self.groups * self.students_per_group
+        self.slots_per_group = self.semesters * self.weeks_per_semester * self.lessons_per_week
+        self.schedule = self.groups * self.slots_per_group
+
+    def _rng(self, *key):
+        """Независимый генератор случайных чисел для части данных"""
+        return random.Random(":".join(str(part) for part in (self.seed,) + key))
+
+    def _faker(self, name):
+        """Экземпляр Faker с собственным детерминированным зерном"""
+        fake = Faker('ru_RU')
+        fake.seed_instance(f"{self.seed}:{name}")
+        return fake
+
+    def department_of_group(self, group_id):
+        """Кафедра, к которой относится группа"""
+        return (group_id - 1) // self.groups_per_department + 1
+
+    def student_range(self, group_id):
+        """Диапазон id студентов группы [первый, последний]"""
+        first = (group_id - 1) * self.students_per_group + 1
+        return first, first + self.students_per_group - 1
+
+    def semester_start(self, semester):
+        """Понедельник первой недели семестра"""
+        return self.start_date + timedelta(weeks=semester * 26)
+
+    def visit_time_range(self):
+        """Границы интервала, в который попадают все занятия и посещения"""
+        first = datetime.datetime.combine(self.semester_start(0), datetime.time(), TIMEZONE)
+        last_week = self.semester_start(self.semesters - 1) + timedelta(weeks=self.weeks_per_semester)
+        last = datetime.datetime.combine(last_week, datetime.time(), TIMEZONE)
+        return first, last
+
+    def row_counts(self):
+        """Ожидаемое количество строк по таблицам (посещения - оценка)"""
+        return {
+            "universities": self.universities,
+            "institutes": self.institutes,
+            "departments": self.departments,
+            "specialties": self.specialties,
+            "courses": self.courses,
+            "groups": self.groups,
+            "students": self.students,
+            "lectures": self.lectures,
+            "materials": self.materials,
+            "schedule": self.schedule,
+            "visits": round(self.schedule * self.students_per_group * 0.85)
+        }
+
+    def university_rows(self):
+        for university_id in range(1, self.universities + 1):
+            yield (university_id, pick_name(UNIVERSITY_NAMES, university_id - 1))
+
+    def institute_rows(self):
+        for institute_id in range(1, self.institutes + 1):
+            university_id = (institute_id - 1) // self.institutes_per_university + 1
+            name = INSTITUTE_NAMES[(institute_id - 1) % len(INSTITUTE_NAMES)]
+            yield (institute_id, university_id, name)
+
+    def department_rows(self):
+        for department_id in range(1, self.departments + 1):
+            institute_id = (department_id - 1) // self.departments_per_institute + 1
+            name = f"Кафедра {DEPARTMENT_TOPICS[(department_id - 1) % len(DEPARTMENT_TOPICS)]}"
+            yield (department_id, institute_id, name)
+
+    def specialty_rows(self):
+        for specialty_id, (name, code) in enumerate(SPECIALTIES, start=1):
+            yield (specialty_id, name, code)
+
+    def course_rows(self):
+        rng = self._rng("courses")
+        for course_id in range(1, self.courses + 1):
+            department_id = (course_id - 1) // self.courses_per_department + 1
+            semester = (course_id - 1) % self.semesters
+            yield (
+                course_id,
+                department_id,
+                rng.randint(1, self.specialties),
+                pick_name(COURSE_NAMES, rng.randrange(len(COURSE_NAMES))),
+                self.semester_start(semester)
+            )
+
+    def group_rows(self):
+        for group_id in range(1, self.groups + 1):
+            department_id = self.department_of_group(group_id)
+            year = (group_id - 1) % self.study_years
+            start_year = self.start_date.year - year
+            yield (
+                group_id,
+                department_id,
+                f"ГР-{department_id}{(group_id - 1) % self.groups_per_department + 1}{start_year % 100:02d}",
+                datetime.date(start_year, 9, 1),
+                datetime.date(start_year + self.study_years, 6, 30)
+            )
+
+    def student_rows(self):
+        rng = self._rng("students")
+        fake = self._faker("students")
+        for group_id in range(1, self.groups + 1):
+            start_year = self.start_date.year - (group_id - 1) % self.study_years
+            enrolled = datetime.date(start_year, 8, 1)
+            first, last = self.student_range(group_id)
+            for student_id in range(first, last + 1):
+                yield (
+                    student_id,
+                    group_id,
+                    fake.name(),
+                    enrolled + timedelta(days=rng.randint(0, 30))
+                )
+
+    def lecture_rows(self):
+        rng = self._rng("lectures")
+        for lecture_id in range(1, self.lectures + 1):
+            course_id = (lecture_id - 1) // self.lectures_per_course + 1
+            topic = LECTURE_TOPICS[(lecture_id - 1) % self.lectures_per_course % len(LECTURE_TOPICS)]
+            yield (lecture_id, course_id, f"{topic} ({course_id})", rng.random() < 0.8)
+
+    def material_rows(self):
+        fake = self._faker("materials")
+        for material_id in range(1, self.materials + 1):
+            lecture_id = (material_id - 1) // self.materials_per_lecture + 1
+            kind = MATERIAL_KINDS[(material_id - 1) % len(MATERIAL_KINDS)]
+            yield (
+                material_id,
+                lecture_id,
+                f"{kind} к лекции {lecture_id}",
+                fake.text(max_nb_chars=300)
+            )
+
+    def group_lectures(self, group_id):
+        """Лекции, которые слушает группа: все лекции курсов ее кафедры"""
+        department_id = self.department_of_group(group_id)
+        first_course = (department_id - 1) * self.courses_per_department + 1
+        first = (first_course - 1) * self.lectures_per_course + 1
+        return list(range(first, first + self.courses_per_department * self.lectures_per_course))
+
+    def group_timetable(self, group_id):
+        """Недельная сетка занятий группы: список (день недели, часы, минуты)"""
+        rng = self._rng("timetable", group_id)
+        cells = [(day, pair) for day in range(STUDY_DAYS) for pair in range(len(PAIR_STARTS))]
+        chosen = sorted(rng.sample(cells, self.lessons_per_week))
+        return [(day, *PAIR_STARTS[pair]) for day, pair in chosen]
+
+    def group_slots(self, group_id):
+        """Все занятия группы за все семестры: (id, id лекции, начало, конец)"""
+        lectures = self.group_lectures(group_id)
+        timetable = self.group_timetable(group_id)
+        slot_id = (group_id - 1) * self.slots_per_group
+        lesson = 0
+        for semester in range(self.semesters):
+            monday = self.semester_start(semester)
+            for week in range(self.weeks_per_semester):
+                for day, hour, minute in timetable:
+                    slot_id += 1
+                    date = monday + timedelta(weeks=week, days=day)
+                    start = datetime.datetime(date.year, date.month, date.day, hour, minute, tzinfo=TIMEZONE)
+                    yield (slot_id, lectures[lesson % len(lectures)], start, start + PAIR_DURATION)
+                    lesson += 1
+
+    def schedule_rows(self):
+        for group_id in range(1, self.groups + 1):
+            for slot_id, lecture_id, start, end in self.group_slots(group_id):
+                yield (slot_id, lecture_id, group_id, start, end)
+
+    def schedule_index(self):
+        """Индекс расписания в памяти: массивы начала занятия (секунды UTC) и группы по id - 1
+
+        Строится векторно по тем же правилам, что и group_slots, поэтому
+        совпадает с загруженной таблицей schedule без обращения к БД.
+        """
+        week_starts = np.array([
+            datetime.datetime.combine(self.semester_start(semester), datetime.time(), TIMEZONE).timestamp()
+            for semester in range(self.semesters)
+        ], dtype=np.int64)
+        week_starts = (week_starts[:, None] + np.arange(self.weeks_per_semester) * WEEK_SECONDS).ravel()
+
+        starts = np.empty(self.schedule, dtype=np.int64)
+        for group_id in range(1, self.groups + 1):
+            offsets = np.array([
+                day * DAY_SECONDS + hour * 3600 + minute * 60
+                for day, hour, minute in self.group_timetable(group_id)
+            ], dtype=np.int64)
+            begin = (group_id - 1) * self.slots_per_group
+            starts[begin:begin + self.slots_per_group] = (week_starts[:, None] + offsets[None, :]).ravel()
+
+        groups = np.repeat(np.arange(1, self.groups + 1, dtype=np.int64), self.slots_per_group)
+        return starts, groups
+
+    def attendance_rates(self):
+        """Индивидуальная вероятность посещения для каждого студента (индекс - id студента - 1)"""
+        rng = np.random.default_rng([self.seed, STREAM_DILIGENCE])
+        return np.clip(rng.normal(0.85, 0.1, self.students), 0.3, 0.99)
+
+    def visit_batches(self, batch_slots=4096):
+        """Посещения блоками колонок (id, id студента, id занятия, время посещения)
+
+        Для блока занятий формируются все пары (студент группы, занятие),
+        затем векторно разыгрываются факт посещения и опоздание.
+        """
+        starts, groups = self.schedule_index()
+        rates = self.attendance_rates()
+        rng = np.random.default_rng([self.seed, STREAM_VISITS])
+        members = np.arange(self.students_per_group, dtype=np.int64)
+        next_id = 1
+
+        for begin in range(0, self.schedule, batch_slots):
+            slots = np.arange(begin, min(begin + batch_slots, self.schedule), dtype=np.int64)
+
+            # Пары (студент, занятие) только для студентов группы, у которой это занятие
+            slot_ids = np.repeat(slots + 1, self.students_per_group)
+            student_ids = (
+                np.repeat(groups[slots] - 1, self.students_per_group) * self.students_per_group
+                + np.tile(members, len(slots)) + 1
+            )
+
+            attended = rng.random(len(student_ids)) < rates[student_ids - 1]
+            slot_ids = slot_ids[attended]
+            student_ids = student_ids[attended]
+            count = len(slot_ids)
+
+            # Большинство приходит вовремя, часть опаздывает на 0-30 минут
+            late = np.where(rng.random(count) < 0.3, rng.integers(0, 31, count), 0)
+            visit_times = (starts[slot_ids - 1] + late * 60).astype("datetime64[s]")
+
+            yield (np.arange(next_id, next_id + count, dtype=np.int64), student_ids, slot_ids, visit_times)
+            next_id += count
+
+    def tables(self):
+        """Все таблицы в формате {таблица: (колонки, ленивый итератор строк)}"""
+        return {
+            "universities": (COLUMNS["universities"], self.university_rows()),
+            "institutes": (COLUMNS["institutes"], self.institute_rows()),
+            "departments": (COLUMNS["departments"], self.department_rows()),
+            "specialties": (COLUMNS["specialties"], self.specialty_rows()),
+            "courses": (COLUMNS["courses"], self.course_rows()),
+            "groups": (COLUMNS["groups"], self.group_rows()),
+            "students": (COLUMNS["students"], self.student_rows()),
+            "lectures": (COLUMNS["lectures"], self.lecture_rows()),
+            "materials": (COLUMNS["materials"], self.material_rows()),
+            "schedule": (COLUMNS["schedule"], self.schedule_rows()),
+            "visits": (COLUMNS["visits"], ColumnBatches(self.visit_batches()))
+        }
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных университета")
+    parser.add_argument("--scale", type=float, default=1.0, help="коэффициент объема данных")
+    parser.add_argument("--seed", type=int, default=42, help="зерно генератора случайных чисел")
+    parser.add_argument("--semesters", type=int, default=2, help="количество семестров расписания")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="размер блока строк")
+    return parser.parse_args()
+
+def main():
+    """Пробный прогон генератора без записи в БД: объемы и скорость генерации"""
+    args = parse_args()
+    generator = DataGenerator(scale=args.scale, seed=args.seed, semesters=args.semesters)
+
+    print("\n===== ГЕНЕРАЦИЯ СИНТЕТИЧЕСКИХ ДАННЫХ =====")
+    print(f"Масштаб: {args.scale}, seed: {args.seed}, семестров: {args.semesters}")
+
+    for table, (_, rows) in generator.tables().items():
+        started = time.perf_counter()
+        if isinstance(rows, ColumnBatches):
+            count = sum(len(batch[0]) for batch in rows)
+        else:
+            count = sum(len(chunk) for chunk in chunked(rows, args.chunk_size))
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed > 0 else float("inf")
+        print(f"✅ {table}: {count} строк за {elapsed:.2f} с ({rate:,.0f} строк/с)")
+
+if __name__ == "__main__":
+    main()
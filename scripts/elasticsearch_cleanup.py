@@ -4,21 +4,17 @@
 from elasticsearch import Elasticsearch
 import json
 
+from elasticsearch_common import ELASTICSEARCH_URLS
+
 def connect_to_elasticsearch():
     """Установка соединения с Elasticsearch"""
     try:
-        # Пробуем различные варианты подключения
-        # Сначала по порту из docker-compose.yml
-        es = Elasticsearch("http://localhost:9200")
-        if es.ping():
-            print("✅ Соединение с Elasticsearch установлено по порту 9200")
-            return es
-        
-        # Если не удалось, пробуем альтернативный порт, указанный в README
-        es = Elasticsearch("http://localhost:9201")
-        if es.ping():
-            print("✅ Соединение с Elasticsearch установлено по порту 9201")
-            return es
+        # Пробуем адреса по порядку (ELASTICSEARCH_URL, затем альтернативный порт из README)
+        for url in ELASTICSEARCH_URLS:
+            es = Elasticsearch(url)
+            if es.ping():
+                print(f"✅ Соединение с Elasticsearch установлено по адресу {url}")
+                return es
             
         print("❌ Ошибка подключения к Elasticsearch - сервер не отвечает")
         return None
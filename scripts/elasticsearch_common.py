@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+from dotenv import load_dotenv
+
+# Параметры подключения берутся из окружения (или файла .env), по умолчанию - как в docker-compose.yml
+load_dotenv()
+
+ELASTICSEARCH_URL = os.getenv("ELASTICSEARCH_URL", "http://localhost:9200")
+
+# Адреса для подключения по порядку: если адрес не задан явно,
+# после порта из docker-compose.yml пробуется альтернативный порт из README
+ELASTICSEARCH_URLS = [ELASTICSEARCH_URL]
+if not os.getenv("ELASTICSEARCH_URL"):
+    ELASTICSEARCH_URLS.append("http://localhost:9201")
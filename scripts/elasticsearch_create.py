@@ -4,49 +4,24 @@
 from elasticsearch import Elasticsearch
 from faker import Faker
 import json
+import sys
 import time
-import psycopg2
-from psycopg2.extras import DictCursor
+
+from elasticsearch_common import ELASTICSEARCH_URLS
+from postgresql_common import connect_to_postgresql, release_postgresql, stream_query, EXPORT_ITERSIZE
 
 # Инициализация генератора случайных данных
 fake = Faker('ru_RU')
 
-def connect_to_postgresql():
-    """Подключение к PostgreSQL"""
-    try:
-        # Подключение к существующей базе данных
-        connection = psycopg2.connect(
-            user="postgres",
-            password="postgres",
-            host="localhost",
-            port="5432",
-            database="postgres"
-        )
-        connection.autocommit = True
-
-        # Создаем объект курсора для выполнения операций с базой данных
-        cursor = connection.cursor(cursor_factory=DictCursor)
-        print("✅ Соединение с PostgreSQL установлено")
-        return connection, cursor
-    except Exception as error:
-        print(f"❌ Ошибка при работе с PostgreSQL: {error}")
-        return None, None
-
 def connect_to_elasticsearch():
     """Установка соединения с Elasticsearch"""
     try:
-        # Пробуем различные варианты подключения
-        # Сначала по порту из docker-compose.yml
-        es = Elasticsearch("http://localhost:9200")
-        if es.ping():
-            print("✅ Соединение с Elasticsearch установлено по порту 9200")
-            return es
-        
-        # Если не удалось, пробуем альтернативный порт, указанный в README
-        es = Elasticsearch("http://localhost:9201")
-        if es.ping():
-            print("✅ Соединение с Elasticsearch установлено по порту 9201")
-            return es
+        # Пробуем адреса по порядку (ELASTICSEARCH_URL, затем альтернативный порт из README)
+        for url in ELASTICSEARCH_URLS:
+            es = Elasticsearch(url)
+            if es.ping():
+                print(f"✅ Соединение с Elasticsearch установлено по адресу {url}")
+                return es
             
         print("❌ Ошибка подключения к Elasticsearch - сервер не отвечает")
         return None
@@ -163,8 +138,8 @@ def create_storage(es):
     
     return True
 
-def add_data(es, pg_cursor):
-    """Добавление данных из PostgreSQL в Elasticsearch"""
+def add_data(es, pg_cursor, itersize=EXPORT_ITERSIZE):
+    """Добавление данных из PostgreSQL в Elasticsearch (блоками по itersize строк)"""
     # Получаем материалы с дополнительной информацией из PostgreSQL
     query = """
     SELECT m.id, m.name, m.content, 
@@ -177,44 +152,48 @@ def add_data(es, pg_cursor):
     JOIN departments d ON c.id_kafedr_a = d.id
     """
     
-    pg_cursor.execute(query)
-    materials = pg_cursor.fetchall()
-    
-    if not materials:
-        print("⚠️ В PostgreSQL не найдены материалы для импорта")
-        return None
-    
-    # Индексируем материалы в Elasticsearch
+    # Индексируем материалы в Elasticsearch, читая их блоками по itersize строк
     current_time = int(time.time())
     indexed_count = 0
+    material_count = 0
+    first_material_id = None
     
-    for material in materials:
-        # Создаем документ для индексации
-        doc = {
-            "id": material['id'],
-            "name": material['name'],
-            "content": material['content'] or f"Содержимое материала {material['name']}",
-            "lecture_id": material['lecture_id'],
-            "lecture_name": material['lecture_name'],
-            "course_id": material['course_id'],
-            "course_name": material['course_name'],
-            "department_id": material['department_id'],
-            "department_name": material['department_name'],
-            "created_at": current_time
-        }
+    for materials in stream_query(pg_cursor.connection, query, itersize=itersize):
+        for material in materials:
+            # Создаем документ для индексации
+            doc = {
+                "id": material['id'],
+                "name": material['name'],
+                "content": material['content'] or f"Содержимое материала {material['name']}",
+                "lecture_id": material['lecture_id'],
+                "lecture_name": material['lecture_name'],
+                "course_id": material['course_id'],
+                "course_name": material['course_name'],
+                "department_id": material['department_id'],
+                "department_name": material['department_name'],
+                "created_at": current_time
+            }
         
-        try:
-            # Добавляем документ в Elasticsearch с обработкой разных версий API
             try:
-                # В новых версиях ES используется document
-                es.index(index="materials", id=str(material['id']), document=doc)
-            except TypeError:
-                # В более старых версиях ES используется body
-                es.index(index="materials", id=str(material['id']), body=doc)
+                # Добавляем документ в Elasticsearch с обработкой разных версий API
+                try:
+                    # В новых версиях ES используется document
+                    es.index(index="materials", id=str(material['id']), document=doc)
+                except TypeError:
+                    # В более старых версиях ES используется body
+                    es.index(index="materials", id=str(material['id']), body=doc)
             
-            indexed_count += 1
-        except Exception as e:
-            print(f"❌ Ошибка индексации материала {material['id']}: {str(e)}")
+                indexed_count += 1
+            except Exception as e:
+                print(f"❌ Ошибка индексации материала {material['id']}: {str(e)}")
+        
+        if first_material_id is None:
+            first_material_id = materials[0]['id']
+        material_count += len(materials)
+    
+    if not material_count:
+        print("⚠️ В PostgreSQL не найдены материалы для импорта")
+        return None
     
     # Обновляем индекс для немедленной доступности данных
     try:
@@ -222,9 +201,11 @@ def add_data(es, pg_cursor):
     except Exception as e:
         print(f"⚠️ Ошибка обновления индекса: {str(e)}")
     
-    print(f"✅ В Elasticsearch индексировано {indexed_count} материалов из {len(materials)}")
+    print(f"✅ В Elasticsearch индексировано {indexed_count} материалов из {material_count}")
+    if indexed_count < material_count:
+        raise RuntimeError(f"не проиндексировано материалов: {material_count - indexed_count}")
     
-    return materials[0]['id'] if materials else None
+    return first_material_id
 
 def check_index_status(es):
     """Проверка статуса индекса и количества документов"""
@@ -308,18 +289,18 @@ def main():
     # Устанавливаем соединение с Elasticsearch
     es = connect_to_elasticsearch()
     if not es:
-        return
+        sys.exit(1)
     
     # Подключаемся к PostgreSQL для получения данных
     pg_connection, pg_cursor = connect_to_postgresql()
     if not pg_connection or not pg_cursor:
-        return
+        sys.exit(1)
     
     # Создаем индекс
     if not create_storage(es):
         print("❌ Не удалось создать индекс. Прерываем выполнение.")
-        pg_connection.close()
-        return
+        release_postgresql(pg_connection, pg_cursor)
+        sys.exit(1)
     
     try:
         # Импортируем данные из PostgreSQL
@@ -360,13 +341,14 @@ def main():
    
    Затем создать индексный паттерн для materials и использовать Discover.
         """)
+    except Exception as e:
+        print(f"❌ Ошибка при наполнении Elasticsearch: {e}")
+        sys.exit(1)
     finally:
         # Закрываем соединения
-        if pg_cursor:
-            pg_cursor.close()
         if pg_connection:
-            pg_connection.close()
-            print("✅ Соединение с PostgreSQL закрыто")
+            release_postgresql(pg_connection, pg_cursor)
+            print("✅ Соединение с PostgreSQL возвращено в пул")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -4,11 +4,13 @@
 import pymongo
 import json
 
+from mongodb_common import MONGO_URI
+
 def connect_to_mongodb():
     """Установка соединения с MongoDB"""
     try:
         # Подключение к MongoDB без аутентификации
-        client = pymongo.MongoClient("mongodb://localhost:27017/")
+        client = pymongo.MongoClient(MONGO_URI)
         # Проверка соединения
         client.admin.command('ping')
         print("✅ Соединение с MongoDB установлено")
@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+from dotenv import load_dotenv
+
+# Параметры подключения берутся из окружения (или файла .env), по умолчанию - как в docker-compose.yml
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
@@ -1,42 +1,24 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import itertools
+import sys
 import pymongo
-import psycopg2
-from psycopg2.extras import DictCursor
 from faker import Faker
 import json
 from pprint import pprint
 
+from mongodb_common import MONGO_URI
+from postgresql_common import connect_to_postgresql, release_postgresql, stream_query, EXPORT_ITERSIZE
+
 # Инициализация генератора случайных данных
 fake = Faker('ru_RU')
 
-def connect_to_postgresql():
-    """Подключение к PostgreSQL"""
-    try:
-        # Подключение к существующей базе данных
-        connection = psycopg2.connect(
-            user="postgres",
-            password="postgres",
-            host="localhost",
-            port="5432",
-            database="postgres"
-        )
-        connection.autocommit = True
-
-        # Создаем объект курсора для выполнения операций с базой данных
-        cursor = connection.cursor(cursor_factory=DictCursor)
-        print("✅ Соединение с PostgreSQL установлено")
-        return connection, cursor
-    except Exception as error:
-        print(f"❌ Ошибка при работе с PostgreSQL: {error}")
-        return None, None
-
 def connect_to_mongodb():
     """Установка соединения с MongoDB"""
     try:
         # Подключение к MongoDB без аутентификации
-        client = pymongo.MongoClient("mongodb://localhost:27017/")
+        client = pymongo.MongoClient(MONGO_URI)
         # Проверка соединения
         client.admin.command('ping')
         print("✅ Соединение с MongoDB установлено")
@@ -62,49 +44,53 @@ def create_storage(client):
     
     return db
 
-def add_data(db, pg_cursor):
-    """Добавление данных из PostgreSQL в MongoDB"""
-    # Получаем данные о группах из PostgreSQL
+def add_data(db, pg_cursor, itersize=EXPORT_ITERSIZE):
+    """Добавление данных из PostgreSQL в MongoDB
+
+    Группы со студентами читаются одним запросом, упорядоченным по группе,
+    через серверный курсор блоками по itersize строк; документ группы
+    собирается из подряд идущих строк, поэтому в памяти находится только
+    текущий блок и одна группа.
+    """
+    # Получаем данные о группах вместе с их студентами из PostgreSQL
     groups_query = """
     SELECT g.id, g.name, g.startYear, g.endYear, 
            d.id as department_id, d.name as department_name,
            i.id as institute_id, i.name as institute_name,
-           u.id as university_id, u.name as university_name
+           u.id as university_id, u.name as university_name,
+           s.id as student_id, s.fio as student_fio,
+           s.date_of_recipient as student_date_of_recipient
     FROM groups g
     JOIN departments d ON g.id_kafedr_a = d.id
     JOIN institutes i ON d.id_institutes = i.id
     JOIN universities u ON i.id_univer = u.id
+    LEFT JOIN students s ON s.id_group = g.id
+    ORDER BY g.id, s.id
     """
     
-    pg_cursor.execute(groups_query)
-    groups_data = pg_cursor.fetchall()
-    
-    if not groups_data:
-        print("⚠️ В PostgreSQL не найдены группы для импорта")
-        return None
-    
     # Получаем коллекцию
     groups = db['groups']
     
-    # Для каждой группы получаем список её студентов и создаем документ
-    for group in groups_data:
-        # Получаем список студентов этой группы
-        students_query = """
-        SELECT s.id, s.fio, s.date_of_recipient
-        FROM students s
-        WHERE s.id_group = %s
-        """
-        
-        pg_cursor.execute(students_query, (group['id'],))
-        students_data = pg_cursor.fetchall()
+    rows = itertools.chain.from_iterable(
+        stream_query(pg_cursor.connection, groups_query, itersize=itersize)
+    )
+    
+    # Для каждой группы собираем список её студентов и создаем документ
+    first_group_id = None
+    group_count = 0
+    for _, group_rows in itertools.groupby(rows, key=lambda row: row['id']):
+        group_rows = list(group_rows)
+        group = group_rows[0]
         
         # Формируем список студентов для MongoDB
         students = []
-        for student in students_data:
+        for student in group_rows:
+            if student['student_id'] is None:
+                continue
             students.append({
-                "id": student['id'],
-                "fio": student['fio'],
-                "date_of_recipient": student['date_of_recipient'].strftime('%Y-%m-%d') if student['date_of_recipient'] else None
+                "id": student['student_id'],
+                "fio": student['student_fio'],
+                "date_of_recipient": student['student_date_of_recipient'].strftime('%Y-%m-%d') if student['student_date_of_recipient'] else None
             })
         
         # Создаем документ группы с вложенным списком студентов
@@ -132,8 +118,16 @@ def add_data(db, pg_cursor):
         # Вставляем группу в коллекцию
         result = groups.insert_one(group_doc)
         print(f"✅ Группа '{group['name']}' с {len(students)} студентами импортирована в MongoDB")
+        
+        if first_group_id is None:
+            first_group_id = group['id']
+        group_count += 1
+    
+    if not group_count:
+        print("⚠️ В PostgreSQL не найдены группы для импорта")
+        return None
     
-    print(f"✅ Всего импортировано {len(groups_data)} групп в MongoDB")
+    print(f"✅ Всего импортировано {group_count} групп в MongoDB")
     
     # Создаем индексы для более быстрого поиска
     groups.create_index("id", unique=True)
@@ -141,7 +135,7 @@ def add_data(db, pg_cursor):
     groups.create_index("students.id")
     print("✅ Созданы индексы для оптимизации запросов")
     
-    return groups_data[0]['id'] if groups_data else None
+    return first_group_id
 
 def read_sample(db, group_id=None):
     """Чтение образца данных для проверки"""
@@ -202,12 +196,12 @@ def main():
     # Устанавливаем соединение с MongoDB
     mongo_client = connect_to_mongodb()
     if not mongo_client:
-        return
+        sys.exit(1)
     
     # Подключаемся к PostgreSQL для получения данных
     pg_connection, pg_cursor = connect_to_postgresql()
     if not pg_connection or not pg_cursor:
-        return
+        sys.exit(1)
     
     try:
         # Создаем хранилище
@@ -242,13 +236,14 @@ URI: mongodb://localhost:27017/
 База данных: university
 Коллекция: groups
     """)
+    except Exception as e:
+        print(f"❌ Ошибка при наполнении MongoDB: {e}")
+        sys.exit(1)
     finally:
         # Закрываем соединения
-        if pg_cursor:
-            pg_cursor.close()
         if pg_connection:
-            pg_connection.close()
-            print("✅ Соединение с PostgreSQL закрыто")
+            release_postgresql(pg_connection, pg_cursor)
+            print("✅ Соединение с PostgreSQL возвращено в пул")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
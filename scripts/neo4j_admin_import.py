@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import gzip
+import os
+import shlex
+import time
+
+from postgresql_indexes import format_size
+
+# Формат времени для свойств datetime (ISO 8601 в UTC)
+ISO_DATETIME = 'YYYY-MM-DD"T"HH24:MI:SS"Z"'
+
+# Файлы для offline-загрузки через neo4j-admin database import:
+# (имя файла, nodes/relationships, метка узла или тип связи, заголовок CSV, запрос к PostgreSQL).
+# Колонки запроса идут в порядке заголовка. Идентификаторы каждой таблицы живут
+# в своем пространстве ID(Метка), поэтому одинаковые id разных таблиц не конфликтуют.
+# Свойства совпадают с теми, что создает синхронизация neo4j_sync.sync_graph.
+ADMIN_IMPORT_FILES = [
+    ("departments", "nodes", "Department",
+     ["id:ID(Department)", "name"],
+     "SELECT id, name FROM departments"),
+    ("specialties", "nodes", "Specialty",
+     ["id:ID(Specialty)", "name", "code"],
+     "SELECT id, name, code FROM specialties"),
+    ("courses", "nodes", "Course",
+     ["id:ID(Course)", "name"],
+     "SELECT id, name FROM courses"),
+    ("lectures", "nodes", "Lecture",
+     ["id:ID(Lecture)", "name", "requirements:boolean"],
+     "SELECT id, name, requirements::text FROM lectures"),
+    ("groups", "nodes", "Group",
+     ["id:ID(Group)", "name", "startYear", "endYear"],
+     "SELECT id, name, startYear::text, endYear::text FROM groups"),
+    ("students", "nodes", "Student",
+     ["id:ID(Student)", "fio", "date_of_recipient"],
+     "SELECT id, fio, date_of_recipient::text FROM students"),
+    ("slots", "nodes", "Slot",
+     ["id:ID(Slot)", "startTime:datetime", "endTime:datetime"],
+     f"""
+     SELECT id,
+            to_char(startTime AT TIME ZONE 'UTC', '{ISO_DATETIME}'),
+            to_char(endTime AT TIME ZONE 'UTC', '{ISO_DATETIME}')
+     FROM schedule
+     """),
+    ("course_belongs_to", "relationships", "BELONGS_TO",
+     [":START_ID(Course)", ":END_ID(Department)"],
+     "SELECT id, id_kafedr_a FROM courses WHERE id_kafedr_a IS NOT NULL"),
+    ("group_belongs_to", "relationships", "BELONGS_TO",
+     [":START_ID(Group)", ":END_ID(Department)"],
+     "SELECT id, id_kafedr_a FROM groups WHERE id_kafedr_a IS NOT NULL"),
+    ("course_has_specialty", "relationships", "HAS_SPECIALTY",
+     [":START_ID(Course)", ":END_ID(Specialty)"],
+     "SELECT id, id_spec FROM courses WHERE id_spec IS NOT NULL"),
+    ("lecture_part_of", "relationships", "PART_OF",
+     [":START_ID(Lecture)", ":END_ID(Course)"],
+     "SELECT id, id_course FROM lectures WHERE id_course IS NOT NULL"),
+    ("student_member_of", "relationships", "MEMBER_OF",
+     [":START_ID(Student)", ":END_ID(Group)"],
+     "SELECT id, id_group FROM students WHERE id_group IS NOT NULL"),
+    ("slot_for_lecture", "relationships", "FOR_LECTURE",
+     [":START_ID(Slot)", ":END_ID(Lecture)"],
+     "SELECT id, id_lect FROM schedule WHERE id_lect IS NOT NULL"),
+    ("slot_for_group", "relationships", "FOR_GROUP",
+     [":START_ID(Slot)", ":END_ID(Group)"],
+     "SELECT id, id_group FROM schedule WHERE id_group IS NOT NULL"),
+    ("student_visited", "relationships", "VISITED",
+     [":START_ID(Student)", ":END_ID(Slot)", "id:long", "time:datetime"],
+     f"""
+     SELECT id_student, id_rasp, id, to_char(visitTime AT TIME ZONE 'UTC', '{ISO_DATETIME}')
+     FROM visits
+     """),
+    ("student_attended", "relationships", "ATTENDED",
+     [":START_ID(Student)", ":END_ID(Lecture)", "visitCount:long",
+      "firstVisit:datetime", "lastVisit:datetime", "avgLateness:double"],
+     f"""
+     SELECT v.id_student, s.id_lect, COUNT(*),
+            to_char(MIN(v.visitTime) AT TIME ZONE 'UTC', '{ISO_DATETIME}'),
+            to_char(MAX(v.visitTime) AT TIME ZONE 'UTC', '{ISO_DATETIME}'),
+            (AVG(EXTRACT(EPOCH FROM v.visitTime - s.startTime)) / 60)::float8
+     FROM visits v
+     JOIN schedule s ON v.id_rasp = s.id
+     GROUP BY v.id_student, s.id_lect
+     """)
+]
+
+# Уровень сжатия gzip: быстрое сжатие, файлы все равно в несколько раз меньше
+COMPRESS_LEVEL = 1
+
+def export_file(cursor, path, query):
+    """Потоковая выгрузка результата запроса в сжатый CSV без заголовка
+
+    Строки формирует сервер командой COPY ... TO STDOUT, а клиент сразу
+    сжимает поток в файл, не разбирая и не накапливая строки.
+    """
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=COMPRESS_LEVEL, newline="") as data:
+        cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv)", data)
+    return cursor.rowcount
+
+def import_command(directory, files=ADMIN_IMPORT_FILES, database="neo4j"):
+    """Команда neo4j-admin для загрузки выгруженных файлов в новую базу"""
+    args = ["neo4j-admin", "database", "import", "full", "--id-type=integer", "--overwrite-destination"]
+    for name, kind, label, _, _ in files:
+        header = os.path.join(directory, f"{name}_header.csv")
+        data = os.path.join(directory, f"{name}.csv.gz")
+        args.append(f"--{kind}={label}={header},{data}")
+    args.append(database)
+    return " ".join(shlex.quote(arg) for arg in args)
+
+def export_admin_import(connection, directory, files=ADMIN_IMPORT_FILES):
+    """Выгрузка узлов и связей из PostgreSQL в формате neo4j-admin import
+
+    Для каждого набора создаются файл заголовка NAME_header.csv и сжатый
+    файл данных NAME.csv.gz; рядом записывается import.sh с командой загрузки.
+    Возвращает словарь {имя: (число строк, время в секундах, размер файла)}.
+    """
+    os.makedirs(directory, exist_ok=True)
+    stats = {}
+    with connection.cursor() as cursor:
+        for name, _, label, header, query in files:
+            with open(os.path.join(directory, f"{name}_header.csv"), "w", encoding="utf-8") as header_file:
+                header_file.write(",".join(header) + "\n")
+
+            path = os.path.join(directory, f"{name}.csv.gz")
+            started = time.perf_counter()
+            count = export_file(cursor, path, query)
+            elapsed = time.perf_counter() - started
+            size = os.path.getsize(path)
+            stats[name] = (count, elapsed, size)
+            print(f"✅ {name} ({label}): {count} строк за {elapsed:.2f} с, {format_size(size)}")
+
+    # Пути в команде относительные: скрипт запускается из каталога с файлами
+    with open(os.path.join(directory, "import.sh"), "w", encoding="utf-8") as script:
+        script.write("#!/bin/sh\n")
+        script.write("# Загрузка в новую (пустую) базу; Neo4j должен быть остановлен\n")
+        script.write('cd "$(dirname "$0")"\n')
+        script.write(import_command(".", files) + "\n")
+    os.chmod(os.path.join(directory, "import.sh"), 0o755)
+
+    return stats
@@ -1,111 +1,111 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from neo4j import GraphDatabase
+import argparse
 import json
+import time
 
-class Neo4jDemo:
-    def __init__(self, uri, user, password):
-        """Инициализация драйвера Neo4j"""
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
-        
-    def close(self):
-        """Закрытие соединения"""
-        if self.driver:
-            self.driver.close()
-    
-    def run_query(self, query, **params):
-        """Выполнение запроса к Neo4j"""
-        with self.driver.session() as session:
-            result = session.run(query, **params)
-            return list(result)
-
-def connect_to_neo4j():
-    """Установка соединения с Neo4j"""
-    try:
-        # Параметры подключения
-        uri = "neo4j://localhost:7687"
-        user = "neo4j"
-        password = "neo4j123"
-        
-        # Создание объекта для работы с Neo4j
-        neo4j_demo = Neo4jDemo(uri, user, password)
-        
-        # Проверка соединения
-        result = neo4j_demo.run_query("RETURN 1 AS result")
-        if result and result[0]["result"] == 1:
-            print("✅ Соединение с Neo4j установлено")
-            return neo4j_demo
-        else:
-            print("❌ Ошибка проверки соединения с Neo4j")
-            return None
-    except Exception as e:
-        print(f"❌ Ошибка подключения к Neo4j: {str(e)}")
-        return None
+from neo4j_common import connect_to_neo4j, delete_in_batches, graph_stats, NEO4J_BATCH_SIZE
 
 def check_data(neo4j):
     """Проверка наличия данных в Neo4j"""
-    # Проверяем наличие узлов и связей
-    stats = {
-        "groups": neo4j.run_query("MATCH (g:Group) RETURN count(g) as count")[0]["count"],
-        "students": neo4j.run_query("MATCH (s:Student) RETURN count(s) as count")[0]["count"],
-        "courses": neo4j.run_query("MATCH (c:Course) RETURN count(c) as count")[0]["count"],
-        "relationships": neo4j.run_query("MATCH ()-[r]-() RETURN count(r) as count")[0]["count"]
-    }
+    # Проверяем наличие узлов и связей: все счетчики одним запросом из хранилища счетчиков
+    stats = graph_stats(neo4j)
     
-    if all(value == 0 for value in stats.values()):
+    if stats["nodes"] == 0 and stats["relationships"] == 0:
         print("❌ В Neo4j нет данных для удаления")
         return False
     
     print(f"\n✅ Данные в Neo4j для удаления:")
-    print(f"  - Групп: {stats['groups']}")
-    print(f"  - Студентов: {stats['students']}")
-    print(f"  - Курсов: {stats['courses']}")
+    print(f"  - Групп: {stats['labels']['Group']}")
+    print(f"  - Студентов: {stats['labels']['Student']}")
+    print(f"  - Курсов: {stats['labels']['Course']}")
+    print(f"  - Всего узлов: {stats['nodes']}")
     print(f"  - Связей: {stats['relationships']}")
     
     return True
 
 def show_data_sample(neo4j):
     """Показывает образец данных перед удалением"""
+    samples = neo4j.read_all({
+        "groups": "MATCH (g:Group) RETURN g.name, g.id LIMIT 3",
+        "students": "MATCH (s:Student) RETURN s.fio, s.id LIMIT 3",
+        "courses": "MATCH (c:Course) RETURN c.name, c.id, c.required LIMIT 3"
+    })
+    
     # Пример групп
-    groups = neo4j.run_query("MATCH (g:Group) RETURN g.name, g.id LIMIT 3")
+    groups = samples["groups"]
     if groups:
         print("\nГруппы:")
         for group in groups:
             print(f"  - {group['g.name']} (ID: {group['g.id']})")
     
     # Пример студентов
-    students = neo4j.run_query("MATCH (s:Student) RETURN s.fio, s.id LIMIT 3")
+    students = samples["students"]
     if students:
         print("\nСтуденты:")
         for student in students:
             print(f"  - {student['s.fio']} (ID: {student['s.id']})")
     
     # Пример курсов
-    courses = neo4j.run_query("MATCH (c:Course) RETURN c.name, c.id, c.required LIMIT 3")
+    courses = samples["courses"]
     if courses:
         print("\nКурсы:")
         for course in courses:
             course_type = "обязательный" if course['c.required'] else "по выбору"
             print(f"  - {course['c.name']} (ID: {course['c.id']}, тип: {course_type})")
 
-def delete_all_data(neo4j):
-    """Удаление всех данных из Neo4j"""
+def delete_all_data(neo4j, batch_size=NEO4J_BATCH_SIZE):
+    """Удаление всех данных из Neo4j пачками с выводом прогресса
+
+    Сначала пачками удаляются связи, затем узлы; каждая пачка - отдельная
+    транзакция, поэтому большой граф не упирается в лимит памяти транзакции.
+    """
+    stats = graph_stats(neo4j)
+    
+    def progress(title, total):
+        def report(deleted):
+            percent = deleted * 100 / total if total else 100
+            print(f"\r  {title}: {deleted} из {total} ({percent:.0f}%)", end="", flush=True)
+        return report
+    
     # Удаляем связи
-    rel_count = neo4j.run_query("MATCH ()-[r]-() DELETE r RETURN count(r) as count")[0]["count"] if "count" in neo4j.run_query("MATCH ()-[r]-() DELETE r RETURN count(r) as count")[0] else 0
-    print(f"✅ Удалено связей: {rel_count}")
+    started = time.perf_counter()
+    rel_count = delete_in_batches(neo4j, "()-[r]->()", "r", batch_size,
+                                  progress("Связи", stats["relationships"]))
+    if rel_count:
+        print()
+    print(f"✅ Удалено связей: {rel_count} за {time.perf_counter() - started:.2f} с")
     
     # Удаляем узлы
-    nodes_count = neo4j.run_query("MATCH (n) DELETE n RETURN count(n) as count")[0]["count"] if "count" in neo4j.run_query("MATCH (n) DELETE n RETURN count(n) as count")[0] else 0
-    print(f"✅ Удалено узлов: {nodes_count}")
+    started = time.perf_counter()
+    nodes_count = delete_in_batches(neo4j, "(n)", "n", batch_size,
+                                    progress("Узлы", stats["nodes"]), detach=True)
+    if nodes_count:
+        print()
+    print(f"✅ Удалено узлов: {nodes_count} за {time.perf_counter() - started:.2f} с")
     
     return rel_count, nodes_count
 
+def wipe_database(neo4j, batch_size=NEO4J_BATCH_SIZE):
+    """Полная очистка: пересоздание базы, а если это недоступно - пакетное удаление"""
+    try:
+        started = time.perf_counter()
+        neo4j.recreate_database()
+        print(f"✅ База данных пересоздана за {time.perf_counter() - started:.2f} с "
+              f"(данные, ограничения и индексы удалены)")
+        return True
+    except Exception as e:
+        print(f"⚠️ Пересоздать базу не удалось ({str(e)}), удаляем данные пачками")
+        delete_all_data(neo4j, batch_size)
+        delete_constraints(neo4j)
+        return False
+
 def delete_constraints(neo4j):
-    """Удаление ограничений из Neo4j"""
+    """Удаление ограничений из Neo4j (синтаксис Neo4j 5: SHOW / DROP CONSTRAINT)"""
     try:
-        # Получаем все ограничения
-        constraints = neo4j.run_query("CALL db.constraints()")
+        # Получаем имена всех ограничений
+        constraints = neo4j.run_query("SHOW CONSTRAINTS YIELD name")
         
         if not constraints:
             print("✅ В базе нет ограничений для удаления")
@@ -113,27 +113,13 @@ def delete_constraints(neo4j):
         
         deleted_count = 0
         
-        # Удаляем каждое ограничение по его имени или описанию
+        # Удаляем каждое ограничение по его имени
         for constraint in constraints:
             try:
-                if "name" in constraint:
-                    # Neo4j 4.x
-                    neo4j.run_query(f"DROP CONSTRAINT {constraint['name']}")
-                    deleted_count += 1
-                else:
-                    # Neo4j 3.x - используем описание
-                    constraint_desc = constraint.get("description", "")
-                    if "ON (g:Group) ASSERT g.id IS UNIQUE" in constraint_desc:
-                        neo4j.run_query("DROP CONSTRAINT ON (g:Group) ASSERT g.id IS UNIQUE")
-                        deleted_count += 1
-                    elif "ON (s:Student) ASSERT s.id IS UNIQUE" in constraint_desc:
-                        neo4j.run_query("DROP CONSTRAINT ON (s:Student) ASSERT s.id IS UNIQUE")
-                        deleted_count += 1
-                    elif "ON (c:Course) ASSERT c.id IS UNIQUE" in constraint_desc:
-                        neo4j.run_query("DROP CONSTRAINT ON (c:Course) ASSERT c.id IS UNIQUE")
-                        deleted_count += 1
+                neo4j.run_query(f"DROP CONSTRAINT `{constraint['name']}` IF EXISTS")
+                deleted_count += 1
             except Exception as e:
-                print(f"⚠️ Ошибка при удалении ограничения: {str(e)}")
+                print(f"⚠️ Ошибка при удалении ограничения {constraint['name']}: {str(e)}")
         
         print(f"✅ Удалено {deleted_count} ограничений")
         return deleted_count
@@ -142,8 +128,20 @@ def delete_constraints(neo4j):
         print(f"⚠️ Ошибка при удалении ограничений: {str(e)}")
         return 0
 
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Удаление данных из Neo4j")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=NEO4J_BATCH_SIZE,
+        help="сколько узлов или связей удалять одной транзакцией"
+    )
+    return parser.parse_args()
+
 def main():
     """Основная функция удаления хранилища"""
+    args = parse_args()
     print("\n===== УДАЛЕНИЕ ДАННЫХ ИЗ NEO4J =====")
     
     # Устанавливаем соединение с Neo4j
@@ -162,7 +160,7 @@ def main():
         # Запрашиваем подтверждение
         print("\nВыберите действие:")
         print("1. Удалить только данные (узлы и связи)")
-        print("2. Удалить данные и ограничения")
+        print("2. Удалить данные и ограничения (пересоздание базы, если доступно)")
         print("3. Отмена")
         
         choice = input("Введите номер действия (1-3): ")
@@ -170,14 +168,13 @@ def main():
         if choice == '1':
             confirm = input("Вы точно хотите удалить все данные из Neo4j? (y/n): ")
             if confirm.lower() == 'y':
-                delete_all_data(neo4j)
+                delete_all_data(neo4j, args.batch_size)
             else:
                 print("❌ Операция удаления отменена.")
         elif choice == '2':
             confirm = input("Вы точно хотите удалить все данные и ограничения из Neo4j? (y/n): ")
             if confirm.lower() == 'y':
-                delete_all_data(neo4j)
-                delete_constraints(neo4j)
+                wipe_database(neo4j, args.batch_size)
             else:
                 print("❌ Операция удаления отменена.")
         else:
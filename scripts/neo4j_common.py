@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import itertools
+import os
+
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+
+# Параметры подключения берутся из окружения (или файла .env), по умолчанию - как в docker-compose.yml
+load_dotenv()
+
+NEO4J_SETTINGS = {
+    "uri": os.getenv("NEO4J_URI", "neo4j://localhost:7687"),
+    "user": os.getenv("NEO4J_USER", "neo4j"),
+    "password": os.getenv("NEO4J_PASSWORD", "neo4j123")
+}
+
+# Сколько строк отправлять в Neo4j одной транзакцией
+NEO4J_BATCH_SIZE = 1000
+
+# Сколько секунд управляемые транзакции повторяются при временных ошибках
+# (потеря лидера кластера, взаимоблокировки и т.п.)
+MAX_TRANSACTION_RETRY_TIME = 30
+
+# Метки узлов и типы связей графа университета (для статистики)
+NODE_LABELS = ["Department", "Specialty", "Course", "Lecture", "Group", "Student", "Slot"]
+RELATIONSHIP_TYPES = ["BELONGS_TO", "HAS_SPECIALTY", "PART_OF", "MEMBER_OF", "ATTENDED",
+                      "FOR_LECTURE", "FOR_GROUP", "VISITED", "SIMILAR_TO"]
+
+# Узел с отметкой последней синхронизации и версией графа
+SYNC_STATE_NAME = "postgresql"
+
+def batched(rows, size):
+    """Разбиение итератора на списки по size элементов"""
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+class Neo4jDemo:
+    """Работа с Neo4j через одну долгоживущую сессию
+
+    Сессия открывается при первом запросе и переиспользуется всеми
+    последующими, поэтому установка сессии и получение таблицы маршрутизации
+    выполняются один раз. Методы read/write/read_all выполняют запросы
+    в управляемых транзакциях, которые драйвер повторяет при временных
+    ошибках; stream отдает записи по мере получения, не собирая весь
+    результат в память. Объект не предназначен для использования из
+    нескольких потоков одновременно.
+    """
+
+    def __init__(self, uri, user, password, database=None):
+        """Инициализация драйвера Neo4j"""
+        self.driver = GraphDatabase.driver(
+            uri, auth=(user, password),
+            max_transaction_retry_time=MAX_TRANSACTION_RETRY_TIME
+        )
+        self.database = database
+        self._session = None
+
+    def close(self):
+        """Закрытие сессии и соединения"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        if self.driver:
+            self.driver.close()
+
+    def session(self):
+        """Долгоживущая сессия (открывается при первом обращении)"""
+        if self._session is None or self._session.closed():
+            self._session = self.driver.session(database=self.database)
+        return self._session
+
+    def run_query(self, query, **params):
+        """Выполнение запроса к Neo4j (автокоммит) с получением всех записей"""
+        return list(self.session().run(query, **params))
+
+    def stream(self, query, **params):
+        """Потоковое чтение результата запроса: записи отдаются по мере получения"""
+        yield from self.session().run(query, **params)
+
+    def read(self, query, **params):
+        """Запрос в управляемой транзакции чтения (с повтором при временных ошибках)"""
+        return self.session().execute_read(lambda tx: list(tx.run(query, **params)))
+
+    def read_all(self, queries):
+        """Несколько запросов в одной транзакции чтения
+
+        queries - словарь {имя: запрос} или {имя: (запрос, параметры)}.
+        Возвращает словарь {имя: список записей}.
+        """
+        def work(tx):
+            results = {}
+            for name, query in queries.items():
+                query, params = query if isinstance(query, tuple) else (query, {})
+                results[name] = list(tx.run(query, **params))
+            return results
+        return self.session().execute_read(work)
+
+    def write(self, query, **params):
+        """Запрос в управляемой транзакции записи (с повтором при временных ошибках)"""
+        return self.session().execute_write(lambda tx: list(tx.run(query, **params)))
+
+    def write_batches(self, query, rows, batch_size=NEO4J_BATCH_SIZE, **params):
+        """Запись строк пачками: каждая пачка передается в запрос параметром $rows
+        (вместе с общими параметрами params) и записывается в отдельной
+        управляемой транзакции. Возвращает число строк."""
+        count = 0
+        session = self.session()
+        for batch in batched(rows, batch_size):
+            session.execute_write(lambda tx: tx.run(query, rows=batch, **params).consume())
+            count += len(batch)
+        return count
+
+    def recreate_database(self):
+        """Удаление и создание заново всей базы данных
+
+        Намного быстрее любой пошаговой очистки, но удаляет и ограничения
+        с индексами. Требует Neo4j Enterprise (CREATE OR REPLACE DATABASE
+        выполняется в системной базе); в Community Edition вызывает ошибку.
+        """
+        name = self.database or "neo4j"
+        with self.driver.session(database="system") as session:
+            session.run(f"CREATE OR REPLACE DATABASE `{name}` WAIT").consume()
+        # Прежняя сессия относится к удаленной базе
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+def element_ids(neo4j, pattern, variable, **params):
+    """elementId всех элементов, найденных шаблоном, за один проход чтения"""
+    records = neo4j.read(f"MATCH {pattern} RETURN elementId({variable}) AS id", **params)
+    return [record["id"] for record in records]
+
+def delete_in_batches(neo4j, pattern, variable, batch_size=NEO4J_BATCH_SIZE, progress=None,
+                      detach=False, ids=None, **params):
+    """Удаление найденных шаблоном элементов пачками по batch_size в отдельных транзакциях
+
+    pattern - шаблон MATCH (может содержать WHERE с параметрами params),
+    variable - удаляемая переменная; detach=True удаляет узлы вместе с их связями.
+    Каждая транзакция ограничена batch_size элементами, поэтому объем памяти
+    транзакции не зависит от размера графа.
+    ids - заранее собранные elementId (element_ids): тогда pattern только
+    связывает переменную ("(n)", "()-[r]->()"), и пачки находят элементы
+    по elementId, а не повторным поиском по шаблону.
+    progress(удалено всего) вызывается после каждой пачки.
+    Возвращает число удаленных элементов.
+    """
+    delete = "DETACH DELETE" if detach else "DELETE"
+    if ids is not None:
+        query = f"""
+        UNWIND $ids AS element_id
+        MATCH {pattern} WHERE elementId({variable}) = element_id
+        {delete} {variable}
+        RETURN count(*) AS count
+        """
+        deleted = 0
+        for batch in batched(ids, batch_size):
+            deleted += neo4j.write(query, ids=list(batch), **params)[0]["count"]
+            if progress:
+                progress(deleted)
+        return deleted
+
+    query = f"""
+    MATCH {pattern}
+    WITH {variable} LIMIT $limit
+    {delete} {variable}
+    RETURN count(*) AS count
+    """
+    deleted = 0
+    while True:
+        count = neo4j.write(query, limit=batch_size, **params)[0]["count"]
+        deleted += count
+        if progress and count:
+            progress(deleted)
+        if count < batch_size:
+            return deleted
+
+def sync_state(neo4j):
+    """Состояние синхронизации графа с PostgreSQL из узла SyncState
+
+    Возвращает словарь {"watermark": время отметки (datetime) или None,
+    "version": версия графа}; версия 0 - граф еще не синхронизировался.
+    """
+    records = neo4j.read(
+        "MATCH (st:SyncState {name: $name}) RETURN st.watermark AS watermark, st.version AS version",
+        name=SYNC_STATE_NAME
+    )
+    if not records:
+        return {"watermark": None, "version": 0}
+    watermark = records[0]["watermark"]
+    return {
+        "watermark": watermark.to_native() if watermark is not None else None,
+        "version": records[0]["version"] or 0
+    }
+
+def save_sync_state(neo4j, watermark, version):
+    """Запись отметки и версии графа после успешной синхронизации"""
+    neo4j.write(
+        """
+        MERGE (st:SyncState {name: $name})
+        SET st.watermark = $watermark, st.version = $version, st.syncedAt = datetime()
+        """,
+        name=SYNC_STATE_NAME, watermark=watermark, version=version
+    )
+
+def graph_version(neo4j):
+    """Текущая версия графа: увеличивается каждой синхронизацией"""
+    return sync_state(neo4j)["version"]
+
+def bump_graph_version(neo4j):
+    """Увеличение версии графа после изменений вне синхронизации; возвращает новую версию"""
+    return neo4j.write(
+        """
+        MERGE (st:SyncState {name: $name})
+        SET st.version = coalesce(st.version, 0) + 1
+        RETURN st.version AS version
+        """,
+        name=SYNC_STATE_NAME
+    )[0]["version"]
+
+def graph_stats(neo4j, labels=NODE_LABELS, types=RELATIONSHIP_TYPES):
+    """Количество узлов по меткам и связей по типам одним запросом
+
+    Каждый счетчик - отдельный подзапрос вида MATCH (n:Метка) RETURN count(n)
+    или MATCH ()-[r:ТИП]->() RETURN count(r): такие запросы планировщик
+    обслуживает из хранилища счетчиков (count store) за постоянное время,
+    не обходя граф. Связи считаются по направленному шаблону, то есть
+    каждая связь учитывается один раз.
+    Возвращает словарь {"nodes": всего узлов, "relationships": всего связей,
+    "labels": {метка: число}, "types": {тип: число}}.
+    """
+    subqueries = ["CALL { MATCH (n) RETURN count(n) AS nodes }",
+                  "CALL { MATCH ()-[r]->() RETURN count(r) AS relationships }"]
+    columns = ["nodes", "relationships"]
+    for i, label in enumerate(labels):
+        subqueries.append(f"CALL {{ MATCH (n:`{label}`) RETURN count(n) AS label_{i} }}")
+        columns.append(f"label_{i}")
+    for i, rel_type in enumerate(types):
+        subqueries.append(f"CALL {{ MATCH ()-[r:`{rel_type}`]->() RETURN count(r) AS type_{i} }}")
+        columns.append(f"type_{i}")
+
+    record = neo4j.read("\n".join(subqueries) + "\nRETURN " + ", ".join(columns))[0]
+    return {
+        "nodes": record["nodes"],
+        "relationships": record["relationships"],
+        "labels": {label: record[f"label_{i}"] for i, label in enumerate(labels)},
+        "types": {rel_type: record[f"type_{i}"] for i, rel_type in enumerate(types)}
+    }
+
+def connect_to_neo4j():
+    """Установка соединения с Neo4j"""
+    try:
+        # Создание объекта для работы с Neo4j
+        neo4j_demo = Neo4jDemo(**NEO4J_SETTINGS)
+
+        # Проверка соединения
+        result = neo4j_demo.run_query("RETURN 1 AS result")
+        if result and result[0]["result"] == 1:
+            print("✅ Соединение с Neo4j установлено")
+            return neo4j_demo
+        else:
+            print("❌ Ошибка проверки соединения с Neo4j")
+            neo4j_demo.close()
+            return None
+    except Exception as e:
+        print(f"❌ Ошибка подключения к Neo4j: {str(e)}")
+        return None
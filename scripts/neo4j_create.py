@@ -1,75 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from neo4j import GraphDatabase
 from faker import Faker
+import argparse
 import json
-import psycopg2
-from psycopg2.extras import DictCursor
+import os
+import sys
+import time
+
+from neo4j_admin_import import export_admin_import, import_command
+from neo4j_common import connect_to_neo4j, graph_stats, NEO4J_BATCH_SIZE
+from neo4j_sync import sync_graph
+from postgresql_indexes import format_size
+from postgresql_common import connect_to_postgresql, release_postgresql, EXPORT_ITERSIZE
 
 # Инициализация генератора случайных данных
 fake = Faker('ru_RU')
 
-class Neo4jDemo:
-    def __init__(self, uri, user, password):
-        """Инициализация драйвера Neo4j"""
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
-        
-    def close(self):
-        """Закрытие соединения"""
-        if self.driver:
-            self.driver.close()
-    
-    def run_query(self, query, **params):
-        """Выполнение запроса к Neo4j"""
-        with self.driver.session() as session:
-            result = session.run(query, **params)
-            return list(result)
-
-def connect_to_postgresql():
-    """Подключение к PostgreSQL"""
-    try:
-        # Подключение к существующей базе данных
-        connection = psycopg2.connect(
-            user="postgres",
-            password="postgres",
-            host="localhost",
-            port="5432",
-            database="postgres"
-        )
-        connection.autocommit = True
-
-        # Создаем объект курсора для выполнения операций с базой данных
-        cursor = connection.cursor(cursor_factory=DictCursor)
-        print("✅ Соединение с PostgreSQL установлено")
-        return connection, cursor
-    except Exception as error:
-        print(f"❌ Ошибка при работе с PostgreSQL: {error}")
-        return None, None
-
-def connect_to_neo4j():
-    """Установка соединения с Neo4j"""
-    try:
-        # Параметры подключения
-        uri = "neo4j://localhost:7687"
-        user = "neo4j"
-        password = "neo4j123"
-        
-        # Создание объекта для работы с Neo4j
-        neo4j_demo = Neo4jDemo(uri, user, password)
-        
-        # Проверка соединения
-        result = neo4j_demo.run_query("RETURN 1 AS result")
-        if result and result[0]["result"] == 1:
-            print("✅ Соединение с Neo4j установлено")
-            return neo4j_demo
-        else:
-            print("❌ Ошибка проверки соединения с Neo4j")
-            return None
-    except Exception as e:
-        print(f"❌ Ошибка подключения к Neo4j: {str(e)}")
-        return None
-
 def create_storage(neo4j):
     """Создание схемы данных в Neo4j (ограничения, индексы)"""
     # Создаем ограничения уникальности для основных узлов
@@ -80,7 +27,9 @@ def create_storage(neo4j):
             "CREATE CONSTRAINT IF NOT EXISTS FOR (c:Course) REQUIRE c.id IS UNIQUE",
             "CREATE CONSTRAINT IF NOT EXISTS FOR (l:Lecture) REQUIRE l.id IS UNIQUE",
             "CREATE CONSTRAINT IF NOT EXISTS FOR (d:Department) REQUIRE d.id IS UNIQUE",
-            "CREATE CONSTRAINT IF NOT EXISTS FOR (sp:Specialty) REQUIRE sp.id IS UNIQUE"
+            "CREATE CONSTRAINT IF NOT EXISTS FOR (sp:Specialty) REQUIRE sp.id IS UNIQUE",
+            "CREATE CONSTRAINT IF NOT EXISTS FOR (sl:Slot) REQUIRE sl.id IS UNIQUE",
+            "CREATE CONSTRAINT IF NOT EXISTS FOR (st:SyncState) REQUIRE st.name IS UNIQUE"
         ]
         
         # Пробуем современный синтаксис Neo4j 4.x
@@ -96,7 +45,9 @@ def create_storage(neo4j):
                         "CREATE CONSTRAINT ON (c:Course) ASSERT c.id IS UNIQUE",
                         "CREATE CONSTRAINT ON (l:Lecture) ASSERT l.id IS UNIQUE",
                         "CREATE CONSTRAINT ON (d:Department) ASSERT d.id IS UNIQUE",
-                        "CREATE CONSTRAINT ON (sp:Specialty) ASSERT sp.id IS UNIQUE"
+                        "CREATE CONSTRAINT ON (sp:Specialty) ASSERT sp.id IS UNIQUE",
+                        "CREATE CONSTRAINT ON (sl:Slot) ASSERT sl.id IS UNIQUE",
+                        "CREATE CONSTRAINT ON (st:SyncState) ASSERT st.name IS UNIQUE"
                     ]
                     for old_constraint in old_constraints:
                         neo4j.run_query(old_constraint)
@@ -104,261 +55,199 @@ def create_storage(neo4j):
                 else:
                     raise e
         
+        # Индексы диапазонов по времени занятий: запросы по временному окну
+        # (neo4j_schedule.py) находят занятия поиском по индексу, а не перебором
+        for index in [
+            "CREATE INDEX slot_start_time IF NOT EXISTS FOR (sl:Slot) ON (sl.startTime)",
+            "CREATE INDEX slot_end_time IF NOT EXISTS FOR (sl:Slot) ON (sl.endTime)"
+        ]:
+            neo4j.run_query(index)
+        
         print("✅ Схема данных создана в Neo4j")
     except Exception as e:
         print(f"⚠️ Ошибка при создании схемы данных: {str(e)}")
         print("⚠️ Продолжаем без создания ограничений")
 
-def add_data(neo4j, pg_cursor):
-    """Добавление данных из PostgreSQL в Neo4j"""
-    # Импортируем данные о кафедрах
-    pg_cursor.execute("SELECT * FROM departments")
-    departments = pg_cursor.fetchall()
-    
-    for dept in departments:
-        neo4j.run_query(
-            """
-            CREATE (d:Department {id: $id, name: $name})
-            RETURN d
-            """,
-            id=dept['id'],
-            name=dept['name']
-        )
-    
-    print(f"✅ Импортировано {len(departments)} кафедр в Neo4j")
-    
-    # Импортируем данные о специальностях
-    pg_cursor.execute("SELECT * FROM specialties")
-    specialties = pg_cursor.fetchall()
-    
-    for spec in specialties:
-        neo4j.run_query(
-            """
-            CREATE (sp:Specialty {id: $id, name: $name, code: $code})
-            RETURN sp
-            """,
-            id=spec['id'],
-            name=spec['name'],
-            code=spec['code']
-        )
-    
-    print(f"✅ Импортировано {len(specialties)} специальностей в Neo4j")
-    
-    # Импортируем данные о курсах и связываем с кафедрами и специальностями
-    pg_cursor.execute("SELECT c.*, d.name as dept_name, s.name as spec_name FROM courses c JOIN departments d ON c.id_kafedr_a = d.id JOIN specialties s ON c.id_spec = s.id")
-    courses = pg_cursor.fetchall()
-    
-    for course in courses:
-        neo4j.run_query(
-            """
-            CREATE (c:Course {id: $id, name: $name})
-            WITH c
-            MATCH (d:Department {id: $dept_id})
-            MATCH (s:Specialty {id: $spec_id})
-            CREATE (c)-[:BELONGS_TO]->(d)
-            CREATE (c)-[:HAS_SPECIALTY]->(s)
-            RETURN c
-            """,
-            id=course['id'],
-            name=course['name'],
-            dept_id=course['id_kafedr_a'],
-            spec_id=course['id_spec']
-        )
-    
-    print(f"✅ Импортировано {len(courses)} курсов в Neo4j")
-    
-    # Импортируем данные о лекциях и связываем с курсами
-    pg_cursor.execute("SELECT * FROM lectures")
-    lectures = pg_cursor.fetchall()
-    
-    for lecture in lectures:
-        neo4j.run_query(
-            """
-            CREATE (l:Lecture {id: $id, name: $name, requirements: $requirements})
-            WITH l
-            MATCH (c:Course {id: $course_id})
-            CREATE (l)-[:PART_OF]->(c)
-            RETURN l
-            """,
-            id=lecture['id'],
-            name=lecture['name'],
-            requirements=lecture['requirements'],
-            course_id=lecture['id_course']
-        )
-    
-    print(f"✅ Импортировано {len(lectures)} лекций в Neo4j")
-    
-    # Импортируем данные о группах и связываем с кафедрами
-    pg_cursor.execute("SELECT * FROM groups")
-    groups = pg_cursor.fetchall()
-    
-    for group in groups:
-        neo4j.run_query(
-            """
-            CREATE (g:Group {id: $id, name: $name, startYear: $startYear, endYear: $endYear})
-            WITH g
-            MATCH (d:Department {id: $dept_id})
-            CREATE (g)-[:BELONGS_TO]->(d)
-            RETURN g
-            """,
-            id=group['id'],
-            name=group['name'],
-            startYear=str(group['startyear']),
-            endYear=str(group['endyear']),
-            dept_id=group['id_kafedr_a']
-        )
-    
-    print(f"✅ Импортировано {len(groups)} групп в Neo4j")
-    
-    # Импортируем данных о студентах и связываем с группами
-    pg_cursor.execute("SELECT * FROM students")
-    students = pg_cursor.fetchall()
-    
-    for student in students:
-        neo4j.run_query(
-            """
-            CREATE (s:Student {id: $id, fio: $fio, date_of_recipient: $date_of_recipient})
-            WITH s
-            MATCH (g:Group {id: $group_id})
-            CREATE (s)-[:MEMBER_OF]->(g)
-            RETURN s
-            """,
-            id=student['id'],
-            fio=student['fio'],
-            date_of_recipient=str(student['date_of_recipient']),
-            group_id=student['id_group']
-        )
-    
-    print(f"✅ Импортировано {len(students)} студентов в Neo4j")
+def add_data(neo4j, pg_cursor, itersize=EXPORT_ITERSIZE, batch_size=NEO4J_BATCH_SIZE, full=False):
+    """Добавление данных из PostgreSQL в Neo4j
+
+    Данные переносятся синхронизацией neo4j_sync.sync_graph: таблицы читаются
+    серверными курсорами блоками по itersize строк, а в Neo4j строки
+    отправляются пачками по batch_size через UNWIND $rows ... MERGE.
+    Повторный запуск переносит только строки, измененные с прошлого раза.
+    """
+    sync_graph(neo4j, pg_cursor, full, itersize, batch_size)
     
-    # Создаем связи между студентами и лекциями на основе посещений
+    # Возвращаем ID примеров для проверки
     pg_cursor.execute("""
-    SELECT DISTINCT v.id_student, l.id as lecture_id 
-    FROM visits v 
-    JOIN schedule s ON v.id_rasp = s.id 
-    JOIN lectures l ON s.id_lect = l.id
+    SELECT (SELECT MIN(id) FROM students) AS student_id,
+           (SELECT MIN(id) FROM groups) AS group_id,
+           (SELECT MIN(id) FROM courses) AS course_id,
+           (SELECT MIN(id) FROM lectures) AS lecture_id
     """)
-    student_lectures = pg_cursor.fetchall()
-    
-    for sl in student_lectures:
-        neo4j.run_query(
-            """
-            MATCH (s:Student {id: $student_id}), (l:Lecture {id: $lecture_id})
-            CREATE (s)-[:ATTENDED]->(l)
-            """,
-            student_id=sl['id_student'],
-            lecture_id=sl['lecture_id']
-        )
-    
-    print(f"✅ Создано {len(student_lectures)} связей между студентами и лекциями в Neo4j")
-    
-    # Возвращаем ID примеров для проверки
-    return {
-        "student_id": students[0]['id'] if students else None,
-        "group_id": groups[0]['id'] if groups else None,
-        "course_id": courses[0]['id'] if courses else None,
-        "lecture_id": lectures[0]['id'] if lectures else None
-    }
+    return dict(pg_cursor.fetchone())
 
 def read_sample(neo4j, ids):
-    """Чтение образца данных для проверки"""
-    # Получаем данные о студенте
+    """Чтение образца данных для проверки
+
+    Все запросы выполняются в одной транзакции чтения долгоживущей сессии.
+    """
     student_id = ids["student_id"]
-    student = neo4j.run_query("MATCH (s:Student {id: $id}) RETURN s", id=student_id)
+    results = neo4j.read_all({
+        # Данные о студенте
+        "student": ("MATCH (s:Student {id: $id}) RETURN s", {"id": student_id}),
+        # Группа студента
+        "group": ("""
+            MATCH (s:Student {id: $id})-[:MEMBER_OF]->(g:Group)
+            RETURN g
+            """, {"id": student_id}),
+        # Лекции студента
+        "lectures": ("""
+            MATCH (s:Student {id: $id})-[:ATTENDED]->(l:Lecture)-[:PART_OF]->(c:Course)
+            RETURN l.name as lecture, c.name as course
+            LIMIT 5
+            """, {"id": student_id}),
+        # Интересный запрос: топ-3 самых посещаемых лекций (по числу посещений на связях)
+        "top_lectures": """
+            MATCH (:Student)-[a:ATTENDED]->(l:Lecture)
+            WITH l, sum(a.visitCount) AS attendance
+            RETURN l.name AS lecture, attendance
+            ORDER BY attendance DESC
+            LIMIT 3
+            """,
+        # Студенты с самым большим средним опозданием
+        "late_students": """
+            MATCH (s:Student)-[a:ATTENDED]->(:Lecture)
+            WITH s, sum(a.visitCount) AS visits, sum(a.avgLateness * a.visitCount) AS lateness
+            RETURN s.fio AS fio, visits, lateness / visits AS avg_lateness
+            ORDER BY avg_lateness DESC
+            LIMIT 3
+            """
+    })
+    
+    student = results["student"]
     if student:
         print(f"✅ Найден студент с ID {student_id}: {student[0]['s']['fio']}")
     else:
         print(f"❌ Студент с ID {student_id} не найден")
     
-    # Получаем данные о группе студента
-    result = neo4j.run_query(
-        """
-        MATCH (s:Student {id: $id})-[:MEMBER_OF]->(g:Group)
-        RETURN g
-        """, 
-        id=student_id
-    )
-    
-    if result:
-        group = result[0]["g"]
+    if results["group"]:
+        group = results["group"][0]["g"]
         print(f"✅ Студент состоит в группе: {group['name']}")
     else:
         print(f"❌ Группа студента с ID {student_id} не найдена")
     
-    # Получаем данные о лекциях студента
-    result = neo4j.run_query(
-        """
-        MATCH (s:Student {id: $id})-[:ATTENDED]->(l:Lecture)-[:PART_OF]->(c:Course)
-        RETURN l.name as lecture, c.name as course
-        LIMIT 5
-        """, 
-        id=student_id
-    )
-    
-    if result:
-        lectures = result
+    if results["lectures"]:
+        lectures = results["lectures"]
         print(f"✅ Студент посетил {len(lectures)} лекций (показаны первые 5):")
         for i, lecture in enumerate(lectures):
             print(f"  {i+1}. '{lecture['lecture']}' курса '{lecture['course']}'")
     else:
         print(f"❌ Посещенные лекции студента с ID {student_id} не найдены")
     
-    # Получаем общую статистику по графу
-    stats = {
-        "departments": neo4j.run_query("MATCH (d:Department) RETURN count(d) as count")[0]["count"],
-        "specialties": neo4j.run_query("MATCH (sp:Specialty) RETURN count(sp) as count")[0]["count"],
-        "courses": neo4j.run_query("MATCH (c:Course) RETURN count(c) as count")[0]["count"],
-        "lectures": neo4j.run_query("MATCH (l:Lecture) RETURN count(l) as count")[0]["count"],
-        "groups": neo4j.run_query("MATCH (g:Group) RETURN count(g) as count")[0]["count"],
-        "students": neo4j.run_query("MATCH (s:Student) RETURN count(s) as count")[0]["count"],
-        "relationships": neo4j.run_query("MATCH ()-[r]-() RETURN count(r) as count")[0]["count"]
-    }
+    # Общая статистика по графу из хранилища счетчиков
+    stats = graph_stats(neo4j)
+    labels = stats["labels"]
     
     print(f"\n✅ Общая статистика графа Neo4j:")
-    print(f"  - Кафедр: {stats['departments']}")
-    print(f"  - Специальностей: {stats['specialties']}")
-    print(f"  - Курсов: {stats['courses']}")
-    print(f"  - Лекций: {stats['lectures']}")
-    print(f"  - Групп: {stats['groups']}")
-    print(f"  - Студентов: {stats['students']}")
+    print(f"  - Кафедр: {labels['Department']}")
+    print(f"  - Специальностей: {labels['Specialty']}")
+    print(f"  - Курсов: {labels['Course']}")
+    print(f"  - Лекций: {labels['Lecture']}")
+    print(f"  - Групп: {labels['Group']}")
+    print(f"  - Студентов: {labels['Student']}")
+    print(f"  - Занятий расписания: {labels['Slot']}")
     print(f"  - Связей: {stats['relationships']}")
+    for rel_type, count in stats["types"].items():
+        print(f"    - {rel_type}: {count}")
     
-    # Выполняем интересный запрос: Найти топ-3 самых посещаемых лекций
-    result = neo4j.run_query(
-        """
-        MATCH (s:Student)-[:ATTENDED]->(l:Lecture)
-        WITH l, count(s) AS attendance
-        RETURN l.name AS lecture, attendance
-        ORDER BY attendance DESC
-        LIMIT 3
-        """
-    )
-    
-    if result:
+    if results["top_lectures"]:
         print("\n✅ Топ-3 самых посещаемых лекций:")
-        for i, lecture in enumerate(result):
+        for i, lecture in enumerate(results["top_lectures"]):
             print(f"  {i+1}. '{lecture['lecture']}': {lecture['attendance']} посещений")
+    
+    if results["late_students"]:
+        print("\n✅ Студенты с наибольшим средним опозданием:")
+        for i, student in enumerate(results["late_students"]):
+            print(f"  {i+1}. {student['fio']}: {student['avg_lateness']:.1f} мин "
+                  f"(посещений: {student['visits']})")
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Создание и заполнение Neo4j")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=NEO4J_BATCH_SIZE,
+        help="сколько строк записывать в Neo4j одной транзакцией"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="перенести все строки, а не только измененные с прошлой синхронизации"
+    )
+    parser.add_argument(
+        "--admin-import",
+        metavar="DIR",
+        help="не загружать данные в Neo4j, а выгрузить CSV для neo4j-admin database import в каталог DIR"
+    )
+    return parser.parse_args()
+
+def export_for_admin_import(directory):
+    """Выгрузка графа в CSV для первичной offline-загрузки через neo4j-admin; True при успехе"""
+    pg_connection, pg_cursor = connect_to_postgresql()
+    if not pg_connection or not pg_cursor:
+        return False
+    
+    try:
+        started = time.perf_counter()
+        stats = export_admin_import(pg_connection, directory)
+        total_rows = sum(count for count, _, _ in stats.values())
+        total_size = sum(size for _, _, size in stats.values())
+        print(f"\n✅ Выгружено {total_rows} строк в {len(stats)} файлов за "
+              f"{time.perf_counter() - started:.2f} с, общий размер {format_size(total_size)}")
+        print(f"""
+Для загрузки в новую базу остановите Neo4j и выполните {os.path.join(directory, 'import.sh')}
+или команду из каталога {directory}:
+   {import_command('.')}
+После запуска Neo4j ограничения уникальности создаст обычный запуск python neo4j_create.py
+(первая синхронизация пройдет по всем строкам, но дубликатов не создаст).
+        """)
+        return True
+    except Exception as e:
+        print(f"❌ Ошибка при выгрузке CSV для neo4j-admin: {e}")
+        return False
+    finally:
+        release_postgresql(pg_connection, pg_cursor)
 
 def main():
     """Основная функция создания и наполнения хранилища"""
+    args = parse_args()
     print("\n===== СОЗДАНИЕ И НАПОЛНЕНИЕ NEO4J =====")
     
+    # Offline-режим: только выгрузка файлов, соединение с Neo4j не нужно
+    if args.admin_import:
+        if not export_for_admin_import(args.admin_import):
+            sys.exit(1)
+        return
+    
     # Устанавливаем соединение с Neo4j
     neo4j = connect_to_neo4j()
     if not neo4j:
-        return
+        sys.exit(1)
     
     # Подключаемся к PostgreSQL для получения данных
     pg_connection, pg_cursor = connect_to_postgresql()
     if not pg_connection or not pg_cursor:
-        return
+        neo4j.close()
+        sys.exit(1)
     
     try:
         # Создаем схему данных
         create_storage(neo4j)
         
         # Импортируем данные из PostgreSQL в Neo4j
-        ids = add_data(neo4j, pg_cursor)
+        ids = add_data(neo4j, pg_cursor, batch_size=args.batch_size, full=args.full)
         
         # Читаем образец для проверки
         read_sample(neo4j, ids)
@@ -375,20 +264,22 @@ def main():
    MATCH (l:Lecture) RETURN l;
    MATCH (s:Student)-[:MEMBER_OF]->(g:Group) RETURN s, g LIMIT 10;
    MATCH (s:Student)-[:ATTENDED]->(l:Lecture)-[:PART_OF]->(c:Course) RETURN s, l, c LIMIT 10;
+   MATCH (s:Student)-[a:ATTENDED]->(l:Lecture) RETURN s.fio, l.name, a.visitCount, a.avgLateness ORDER BY a.avgLateness DESC LIMIT 10;
+   MATCH (g:Group)<-[:FOR_GROUP]-(sl:Slot)-[:FOR_LECTURE]->(l:Lecture) RETURN g.name, l.name, sl.startTime ORDER BY sl.startTime LIMIT 10;
 
 Чтобы увидеть визуализацию связей между всеми сущностями:
    MATCH p=(g:Group)<-[:MEMBER_OF]-(s:Student)-[:ATTENDED]->(l:Lecture)-[:PART_OF]->(c:Course) 
    RETURN p LIMIT 5;
         """)
-    
+    except Exception as e:
+        print(f"❌ Ошибка при наполнении Neo4j: {e}")
+        sys.exit(1)
     finally:
         # Закрываем соединения
         if neo4j:
             neo4j.close()
-        if pg_cursor:
-            pg_cursor.close()
         if pg_connection:
-            pg_connection.close()
+            release_postgresql(pg_connection, pg_cursor)
             print("✅ Соединения закрыты")
 
 if __name__ == "__main__":
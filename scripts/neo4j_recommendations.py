@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import collections
+import time
+
+from neo4j_common import connect_to_neo4j, graph_version
+
+# Сколько результатов хранит кэш и как часто (в секундах) проверять версию графа
+CACHE_SIZE = 1024
+VERSION_CHECK_INTERVAL = 5.0
+
+# Кандидаты: еще не посещенные студентом лекции курсов кафедры его группы
+# и курсов его специальностей (по уже посещаемым курсам). Оценка лекции:
+# 2 за кафедру + 1 за специальность + доля "соседей" (одногруппники
+# и похожие студенты SIMILAR_TO), посещавших лекцию.
+# Запросы параметризованы, поэтому план строится один раз и берется из кэша планов Neo4j.
+CANDIDATES_QUERY = """
+MATCH (s:Student {id: $student_id})
+OPTIONAL MATCH (s)-[:MEMBER_OF]->(:Group)-[:BELONGS_TO]->(d:Department)
+OPTIONAL MATCH (s)-[:ATTENDED]->(:Lecture)-[:PART_OF]->(:Course)-[:HAS_SPECIALTY]->(sp:Specialty)
+WITH s, d, collect(DISTINCT sp) AS specialties
+OPTIONAL MATCH (s)-[:MEMBER_OF]->(:Group)<-[:MEMBER_OF]-(mate:Student)
+WHERE mate <> s
+WITH s, d, specialties, collect(mate) AS mates
+OPTIONAL MATCH (s)-[:SIMILAR_TO]->(similar:Student)
+WHERE NOT similar IN mates
+WITH s, d, specialties, mates + collect(similar) AS peers
+MATCH (l:Lecture)-[:PART_OF]->(c:Course)
+WHERE NOT (s)-[:ATTENDED]->(l)
+WITH s, peers, l, c,
+     d IS NOT NULL AND EXISTS { (c)-[:BELONGS_TO]->(d) } AS same_department,
+     any(x IN specialties WHERE EXISTS { (c)-[:HAS_SPECIALTY]->(x) }) AS same_specialty
+WHERE same_department OR same_specialty
+WITH l, c, same_department, same_specialty, size(peers) AS peer_total,
+     size([p IN peers WHERE EXISTS { (p)-[:ATTENDED]->(l) }]) AS peer_count
+WITH l, c, same_department, same_specialty, peer_count,
+     CASE WHEN same_department THEN 2.0 ELSE 0.0 END
+     + CASE WHEN same_specialty THEN 1.0 ELSE 0.0 END
+     + CASE WHEN peer_total > 0 THEN toFloat(peer_count) / peer_total ELSE 0.0 END AS score
+"""
+
+RECOMMENDATION_QUERIES = {
+    "lectures": CANDIDATES_QUERY + """
+RETURN l.id AS id, l.name AS name, c.name AS course,
+       same_department, same_specialty, peer_count, score
+ORDER BY score DESC, id
+LIMIT $limit
+""",
+    "courses": CANDIDATES_QUERY + """
+WITH c, same_department, same_specialty, max(score) AS score,
+     count(l) AS lectures, sum(peer_count) AS peer_count
+RETURN c.id AS id, c.name AS name, lectures,
+       same_department, same_specialty, peer_count, score
+ORDER BY score DESC, id
+LIMIT $limit
+"""
+}
+
+class RecommendationService:
+    """Рекомендации лекций и курсов для студента с кэшем результатов в памяти процесса
+
+    Результаты хранятся в LRU-кэше по ключу (вид, id студента, limit,
+    версия графа). Версия графа увеличивается каждой синхронизацией
+    (neo4j_sync.py) и пересчетом похожести; сервис перечитывает ее
+    не чаще раза в version_check_interval секунд и при смене версии
+    сбрасывает кэш, поэтому повторные запросы панели не обходят граф заново.
+    Как и Neo4jDemo, объект не предназначен для нескольких потоков.
+    """
+
+    def __init__(self, neo4j, maxsize=CACHE_SIZE, version_check_interval=VERSION_CHECK_INTERVAL):
+        """Инициализация сервиса поверх соединения Neo4jDemo"""
+        self.neo4j = neo4j
+        self.maxsize = maxsize
+        self.version_check_interval = version_check_interval
+        self.cache = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._version_checked = None
+
+    def version(self):
+        """Версия графа (с периодической проверкой); при смене версии кэш сбрасывается"""
+        now = time.monotonic()
+        if self._version_checked is None or now - self._version_checked >= self.version_check_interval:
+            version = graph_version(self.neo4j)
+            if version != self._version:
+                self.cache.clear()
+                self._version = version
+            self._version_checked = now
+        return self._version
+
+    def invalidate(self):
+        """Немедленная проверка версии графа (например, после синхронизации в этом же процессе)"""
+        self._version_checked = None
+
+    def recommend(self, kind, student_id, limit=5):
+        """Рекомендации вида kind ("lectures" или "courses") для студента: список словарей"""
+        key = (kind, student_id, limit, self.version())
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return self.cache[key]
+
+        self.misses += 1
+        records = self.neo4j.read(RECOMMENDATION_QUERIES[kind], student_id=student_id, limit=limit)
+        result = [dict(record) for record in records]
+        self.cache[key] = result
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return result
+
+    def recommend_lectures(self, student_id, limit=5):
+        """Рекомендованные лекции для студента"""
+        return self.recommend("lectures", student_id, limit)
+
+    def recommend_courses(self, student_id, limit=5):
+        """Рекомендованные курсы для студента"""
+        return self.recommend("courses", student_id, limit)
+
+    def stats(self):
+        """Статистика кэша: попадания, промахи, размер и версия графа"""
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self.cache), "version": self._version}
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Рекомендации лекций и курсов по графу Neo4j")
+    parser.add_argument("--students", type=int, default=20,
+                        help="для скольких студентов запрашивать рекомендации")
+    parser.add_argument("--limit", type=int, default=5, help="сколько рекомендаций возвращать")
+    return parser.parse_args()
+
+def main():
+    """Пример рекомендаций и сравнение времени с кэшем и без него"""
+    args = parse_args()
+    print("\n===== РЕКОМЕНДАЦИИ ПО ГРАФУ NEO4J =====")
+
+    neo4j = connect_to_neo4j()
+    if not neo4j:
+        return
+
+    try:
+        service = RecommendationService(neo4j)
+        student_ids = [record["id"] for record in neo4j.read(
+            "MATCH (s:Student) RETURN s.id AS id ORDER BY id LIMIT $limit", limit=args.students)]
+        if not student_ids:
+            print("❌ В графе нет студентов")
+            return
+
+        lectures = service.recommend_lectures(student_ids[0], args.limit)
+        print(f"\n✅ Лекции для студента {student_ids[0]}:")
+        for i, lecture in enumerate(lectures):
+            print(f"  {i+1}. '{lecture['name']}' курса '{lecture['course']}' "
+                  f"(оценка {lecture['score']:.2f}, посещают соседей: {lecture['peer_count']})")
+
+        courses = service.recommend_courses(student_ids[0], args.limit)
+        print(f"\n✅ Курсы для студента {student_ids[0]}:")
+        for i, course in enumerate(courses):
+            print(f"  {i+1}. '{course['name']}' (оценка {course['score']:.2f}, лекций: {course['lectures']})")
+
+        # Первый проход заполняет кэш, второй отвечает из него
+        service.cache.clear()
+        for title in ("без кэша", "из кэша"):
+            started = time.perf_counter()
+            for student_id in student_ids:
+                service.recommend_lectures(student_id, args.limit)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"✅ {len(student_ids)} запросов {title}: {elapsed:.1f} мс "
+                  f"({elapsed / len(student_ids):.2f} мс на запрос)")
+
+        stats = service.stats()
+        print(f"✅ Кэш: попаданий {stats['hits']}, промахов {stats['misses']}, "
+              f"записей {stats['size']}, версия графа {stats['version']}")
+    except Exception as e:
+        print(f"❌ Ошибка при получении рекомендаций: {e}")
+    finally:
+        neo4j.close()
+        print("✅ Соединение с Neo4j закрыто")
+
+if __name__ == "__main__":
+    main()
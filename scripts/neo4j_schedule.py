@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import datetime
+import statistics
+import time
+
+from neo4j_common import connect_to_neo4j
+from postgresql_common import connect_to_postgresql, release_postgresql
+
+# Запросы по временному окну [$start, $end): (описание, Cypher, эквивалентный SQL).
+# В Cypher окно накладывается на индексированное свойство Slot.startTime,
+# поэтому планировщик начинает с поиска занятий по индексу диапазона.
+TIME_WINDOW_QUERIES = {
+    "shared_slots": (
+        "Группы на одном занятии лекции",
+        """
+        MATCH (sl:Slot)
+        WHERE sl.startTime >= $start AND sl.startTime < $end
+        MATCH (sl)-[:FOR_LECTURE]->(l:Lecture)
+        MATCH (sl)-[:FOR_GROUP]->(g:Group)
+        WITH l, sl.startTime AS start_time, collect(g.name) AS groups
+        WHERE size(groups) > 1
+        RETURN l.name AS lecture, start_time, groups
+        ORDER BY start_time, lecture
+        LIMIT $limit
+        """,
+        """
+        SELECT l.name AS lecture, s.startTime AS start_time, array_agg(g.name) AS groups
+        FROM schedule s
+        JOIN lectures l ON l.id = s.id_lect
+        JOIN groups g ON g.id = s.id_group
+        WHERE s.startTime >= %(start)s AND s.startTime < %(end)s
+        GROUP BY l.id, l.name, s.startTime
+        HAVING COUNT(*) > 1
+        ORDER BY start_time, lecture
+        LIMIT %(limit)s
+        """
+    ),
+    "attendees": (
+        "Студенты, посещавшие занятия",
+        """
+        MATCH (sl:Slot)
+        WHERE sl.startTime >= $start AND sl.startTime < $end
+        MATCH (s:Student)-[:VISITED]->(sl)
+        RETURN s.id AS id, s.fio AS fio, count(*) AS visits
+        ORDER BY visits DESC, id
+        LIMIT $limit
+        """,
+        """
+        SELECT st.id, st.fio, COUNT(*) AS visits
+        FROM schedule s
+        JOIN visits v ON v.id_rasp = s.id
+        JOIN students st ON st.id = v.id_student
+        WHERE s.startTime >= %(start)s AND s.startTime < %(end)s
+        GROUP BY st.id, st.fio
+        ORDER BY visits DESC, st.id
+        LIMIT %(limit)s
+        """
+    ),
+    "group_load": (
+        "Занятия и посещения по группам",
+        """
+        MATCH (sl:Slot)
+        WHERE sl.startTime >= $start AND sl.startTime < $end
+        MATCH (sl)-[:FOR_GROUP]->(g:Group)
+        OPTIONAL MATCH (:Student)-[v:VISITED]->(sl)
+        WITH g, sl, count(v) AS visits
+        RETURN g.name AS group_name, count(sl) AS slots, sum(visits) AS visits
+        ORDER BY visits DESC, group_name
+        LIMIT $limit
+        """,
+        """
+        SELECT g.name AS group_name, COUNT(DISTINCT s.id) AS slots, COUNT(v.id) AS visits
+        FROM schedule s
+        JOIN groups g ON g.id = s.id_group
+        LEFT JOIN visits v ON v.id_rasp = s.id
+        WHERE s.startTime >= %(start)s AND s.startTime < %(end)s
+        GROUP BY g.id, g.name
+        ORDER BY visits DESC, group_name
+        LIMIT %(limit)s
+        """
+    )
+}
+
+def window_query(neo4j, name, start, end, limit=10):
+    """Выполнение запроса по временному окну в Neo4j; возвращает список записей"""
+    _, cypher, _ = TIME_WINDOW_QUERIES[name]
+    return neo4j.read(cypher, start=start, end=end, limit=limit)
+
+def shared_slots(neo4j, start, end, limit=10):
+    """Занятия лекций в окне, на которых одновременно занимается несколько групп"""
+    return window_query(neo4j, "shared_slots", start, end, limit)
+
+def attendees(neo4j, start, end, limit=10):
+    """Студенты, посещавшие занятия в окне, по убыванию числа посещений"""
+    return window_query(neo4j, "attendees", start, end, limit)
+
+def group_load(neo4j, start, end, limit=10):
+    """Число занятий и посещений каждой группы в окне"""
+    return window_query(neo4j, "group_load", start, end, limit)
+
+def plan_operators(neo4j, query, **params):
+    """Операторы плана запроса (EXPLAIN, без выполнения)"""
+    plan = neo4j.session().run("EXPLAIN " + query, **params).consume().plan
+    operators = set()
+    stack = [plan] if plan else []
+    while stack:
+        node = stack.pop()
+        operators.add(node["operatorType"].split("@")[0])
+        stack.extend(node.get("children", []))
+    return operators
+
+def median_time(run, repeats):
+    """Медианное время выполнения run() в миллисекундах и последний результат"""
+    run()  # прогрев: кэш планов и страниц
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = run()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), result
+
+def benchmark(neo4j, pg_cursor, start, end, repeats=5, limit=10):
+    """Сравнение запросов по временному окну в Neo4j и PostgreSQL
+
+    Возвращает словарь {запрос: (мс Neo4j, мс PostgreSQL, строк Neo4j, строк PostgreSQL)}.
+    """
+    params = {"start": start, "end": end, "limit": limit}
+    results = {}
+    for name, (title, cypher, sql) in TIME_WINDOW_QUERIES.items():
+        def run_sql():
+            pg_cursor.execute(sql, params)
+            return pg_cursor.fetchall()
+
+        neo4j_ms, neo4j_rows = median_time(lambda: neo4j.read(cypher, **params), repeats)
+        sql_ms, sql_rows = median_time(run_sql, repeats)
+        seek = any("IndexSeekByRange" in op for op in plan_operators(neo4j, cypher, **params))
+        results[name] = (neo4j_ms, sql_ms, len(neo4j_rows), len(sql_rows))
+        print(f"✅ {title}: Neo4j {neo4j_ms:.1f} мс ({len(neo4j_rows)} строк), "
+              f"PostgreSQL {sql_ms:.1f} мс ({len(sql_rows)} строк)"
+              + ("" if seek else " ⚠️ план Neo4j без поиска по индексу диапазона"))
+    return results
+
+def default_window(pg_cursor, days):
+    """Окно по умолчанию: первая неделя расписания"""
+    pg_cursor.execute("SELECT date_trunc('week', MIN(startTime)) FROM schedule")
+    start = pg_cursor.fetchone()[0]
+    if start is None:
+        start = datetime.datetime.now(datetime.timezone.utc)
+    return start, start + datetime.timedelta(days=days)
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Запросы по временному окну к графу расписания")
+    parser.add_argument("--start", type=datetime.date.fromisoformat,
+                        help="начало окна (ГГГГ-ММ-ДД); по умолчанию - первая неделя расписания")
+    parser.add_argument("--days", type=int, default=7, help="длина окна в днях")
+    parser.add_argument("--repeats", type=int, default=5, help="сколько раз повторять каждый запрос")
+    parser.add_argument("--limit", type=int, default=10, help="сколько строк возвращать")
+    return parser.parse_args()
+
+def main():
+    """Примеры запросов по временному окну и сравнение с PostgreSQL"""
+    args = parse_args()
+    print("\n===== ЗАПРОСЫ ПО ВРЕМЕННОМУ ОКНУ =====")
+
+    neo4j = connect_to_neo4j()
+    if not neo4j:
+        return
+
+    pg_connection, pg_cursor = connect_to_postgresql()
+    if not pg_connection or not pg_cursor:
+        neo4j.close()
+        return
+
+    try:
+        if args.start:
+            start = datetime.datetime.combine(args.start, datetime.time(), datetime.timezone.utc)
+            end = start + datetime.timedelta(days=args.days)
+        else:
+            start, end = default_window(pg_cursor, args.days)
+        print(f"Окно: {start:%Y-%m-%d %H:%M} - {end:%Y-%m-%d %H:%M}")
+
+        slots = shared_slots(neo4j, start, end, limit=5)
+        if slots:
+            print("\n✅ Занятия с несколькими группами:")
+            for slot in slots:
+                print(f"  - {slot['start_time'].to_native():%Y-%m-%d %H:%M} '{slot['lecture']}': "
+                      f"{', '.join(slot['groups'])}")
+
+        students = attendees(neo4j, start, end, limit=5)
+        if students:
+            print("\n✅ Самые активные студенты:")
+            for student in students:
+                print(f"  - {student['fio']}: {student['visits']} посещений")
+
+        print(f"\n== Сравнение с PostgreSQL (медиана из {args.repeats} запусков) ==")
+        benchmark(neo4j, pg_cursor, start, end, args.repeats, args.limit)
+    except Exception as e:
+        print(f"❌ Ошибка при выполнении запросов: {e}")
+    finally:
+        neo4j.close()
+        release_postgresql(pg_connection, pg_cursor)
+        print("✅ Соединения закрыты")
+
+if __name__ == "__main__":
+    main()
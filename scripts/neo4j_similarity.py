@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import time
+
+import numpy as np
+from scipy import sparse
+
+from neo4j_common import connect_to_neo4j, bump_graph_version, delete_in_batches, NEO4J_BATCH_SIZE
+from postgresql_common import connect_to_postgresql, release_postgresql, stream_query, EXPORT_ITERSIZE
+
+# Сколько студентов обрабатывается в одном блоке умножения матриц
+BLOCK_SIZE = 1024
+
+# Сколько ближайших соседей сохранять для каждого студента
+TOP_K = 10
+
+METRICS = ("cosine", "jaccard")
+
+# Матрица инцидентности: число посещений студентом каждой лекции
+INCIDENCE_QUERY = """
+SELECT v.id_student, s.id_lect, COUNT(*) AS visits
+FROM visits v
+JOIN schedule s ON v.id_rasp = s.id
+GROUP BY v.id_student, s.id_lect
+"""
+
+def load_incidence(pg_connection, itersize=EXPORT_ITERSIZE):
+    """Загрузка матрицы студенты x лекции из PostgreSQL в разреженную матрицу CSR
+
+    Возвращает (матрица, id студентов по строкам, id лекций по столбцам).
+    """
+    students, lectures, visits = [], [], []
+    for rows in stream_query(pg_connection, INCIDENCE_QUERY, itersize=itersize):
+        chunk = np.array([tuple(row) for row in rows], dtype=np.int64)
+        students.append(chunk[:, 0])
+        lectures.append(chunk[:, 1])
+        visits.append(chunk[:, 2])
+
+    if not students:
+        return sparse.csr_matrix((0, 0)), np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+
+    student_ids, rows = np.unique(np.concatenate(students), return_inverse=True)
+    lecture_ids, cols = np.unique(np.concatenate(lectures), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.concatenate(visits).astype(np.float64), (rows, cols)),
+        shape=(len(student_ids), len(lecture_ids))
+    )
+    return matrix, student_ids, lecture_ids
+
+def similarity_blocks(matrix, metric="cosine", top_k=TOP_K, block_size=BLOCK_SIZE, min_score=0.0):
+    """Блочный расчет top-k похожих студентов
+
+    Для блока строк вычисляется разреженное произведение X[блок] * X^T,
+    то есть совместные посещения только для реально пересекающихся пар;
+    плотная матрица всех пар не строится. cosine считается по числу
+    посещений, jaccard - по множествам посещенных лекций.
+    Генерирует (номер блока, строки-источники, строки-соседи, оценки, время расчета).
+    """
+    if metric == "jaccard":
+        matrix = matrix.copy()
+        matrix.data[:] = 1.0
+        sizes = np.asarray(matrix.sum(axis=1)).ravel()
+    else:
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    transposed = matrix.T.tocsc()
+
+    for number, start in enumerate(range(0, matrix.shape[0], block_size), 1):
+        started = time.perf_counter()
+        block = (matrix[start:start + block_size] @ transposed).tocoo()
+        rows = block.row.astype(np.int64) + start
+        cols = block.col.astype(np.int64)
+        common = block.data
+
+        # Сам студент в число соседей не входит
+        other = rows != cols
+        rows, cols, common = rows[other], cols[other], common[other]
+
+        if metric == "jaccard":
+            scores = common / (sizes[rows] + sizes[cols] - common)
+        else:
+            scores = common / (norms[rows] * norms[cols])
+
+        # Сортировка по студенту и убыванию оценки, затем первые top_k в каждой группе
+        order = np.lexsort((-scores, rows))
+        rows, cols, scores = rows[order], cols[order], scores[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side="left")
+        keep = (rank < top_k) & (scores > min_score)
+
+        yield number, rows[keep], cols[keep], scores[keep], time.perf_counter() - started
+
+def delete_similarity(neo4j, batch_size=NEO4J_BATCH_SIZE):
+    """Удаление ранее рассчитанных связей SIMILAR_TO пачками"""
+    return delete_in_batches(neo4j, "(:Student)-[r:SIMILAR_TO]->(:Student)", "r", batch_size)
+
+def build_similarity(neo4j, pg_connection, metric="cosine", top_k=TOP_K,
+                     block_size=BLOCK_SIZE, min_score=0.0, batch_size=NEO4J_BATCH_SIZE):
+    """Расчет графа похожести студентов и запись связей SIMILAR_TO {score} в Neo4j"""
+    started = time.perf_counter()
+    matrix, student_ids, _ = load_incidence(pg_connection)
+    print(f"✅ Матрица посещений {matrix.shape[0]} x {matrix.shape[1]} "
+          f"({matrix.nnz} ненулевых) загружена за {time.perf_counter() - started:.2f} с")
+
+    deleted = delete_similarity(neo4j, batch_size)
+    if deleted:
+        print(f"⚠️ Удалено {deleted} прежних связей SIMILAR_TO")
+
+    blocks = -(-matrix.shape[0] // block_size)
+    total = 0
+    for number, rows, cols, scores, compute_time in similarity_blocks(
+            matrix, metric, top_k, block_size, min_score):
+        write_started = time.perf_counter()
+        pairs = (
+            {"source": int(source), "target": int(target), "score": float(score)}
+            for source, target, score in zip(student_ids[rows], student_ids[cols], scores)
+        )
+        count = neo4j.write_batches(
+            """
+            UNWIND $rows AS row
+            MATCH (a:Student {id: row.source})
+            MATCH (b:Student {id: row.target})
+            MERGE (a)-[r:SIMILAR_TO]->(b)
+            SET r.score = row.score
+            """,
+            pairs,
+            batch_size
+        )
+        total += count
+        print(f"✅ Блок {number}/{blocks}: {count} связей, расчет {compute_time:.2f} с, "
+              f"запись {time.perf_counter() - write_started:.2f} с")
+
+    print(f"✅ Создано {total} связей SIMILAR_TO ({metric}, top-{top_k}) "
+          f"за {time.perf_counter() - started:.2f} с")
+
+    # Связи похожести влияют на рекомендации: кэши результатов должны обновиться
+    version = bump_graph_version(neo4j)
+    print(f"✅ Версия графа увеличена до {version}")
+    return total
+
+def show_similar(neo4j, limit=5):
+    """Пример: самые похожие студенты для первого студента"""
+    result = neo4j.read(
+        """
+        MATCH (s:Student)
+        WITH s ORDER BY s.id LIMIT 1
+        MATCH (s)-[r:SIMILAR_TO]->(other:Student)
+        RETURN s.fio AS student, other.fio AS similar, r.score AS score
+        ORDER BY score DESC
+        LIMIT $limit
+        """,
+        limit=limit
+    )
+    if result:
+        print(f"\n✅ Студенты, похожие на {result[0]['student']}:")
+        for i, row in enumerate(result):
+            print(f"  {i+1}. {row['similar']}: {row['score']:.3f}")
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Граф похожести студентов по совместным посещениям")
+    parser.add_argument("--metric", choices=METRICS, default="cosine",
+                        help="мера похожести: cosine по числу посещений или jaccard по множествам лекций")
+    parser.add_argument("--top-k", type=int, default=TOP_K,
+                        help="сколько соседей сохранять для каждого студента")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE,
+                        help="сколько студентов обрабатывать в одном блоке")
+    parser.add_argument("--min-score", type=float, default=0.0,
+                        help="не сохранять связи с оценкой не выше указанной")
+    parser.add_argument("--batch-size", type=int, default=NEO4J_BATCH_SIZE,
+                        help="сколько связей записывать в Neo4j одной транзакцией")
+    return parser.parse_args()
+
+def main():
+    """Расчет и запись графа похожести студентов"""
+    args = parse_args()
+    print("\n===== ГРАФ ПОХОЖЕСТИ СТУДЕНТОВ =====")
+
+    neo4j = connect_to_neo4j()
+    if not neo4j:
+        return
+
+    pg_connection, pg_cursor = connect_to_postgresql()
+    if not pg_connection or not pg_cursor:
+        neo4j.close()
+        return
+
+    try:
+        build_similarity(neo4j, pg_connection, args.metric, args.top_k,
+                         args.block_size, args.min_score, args.batch_size)
+        show_similar(neo4j)
+    except Exception as e:
+        print(f"❌ Ошибка при расчете похожести: {e}")
+    finally:
+        neo4j.close()
+        release_postgresql(pg_connection, pg_cursor)
+        print("✅ Соединения закрыты")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Синхронизация графа Neo4j с PostgreSQL (полная и инкрементальная)
+
+Инкрементальный запуск выбирает строки с updated_at после отметки прошлого
+запуска. Полнота выборки держится на отметке WATERMARK_QUERY: это начало самой
+старой открытой транзакции базы (или now(), если открытых нет), поэтому строки
+транзакций, зафиксированных после запуска, не теряются. Запас SYNC_OVERLAP
+(1 с) лишь повторно выбирает строки на границе отметки. Фиксированного окна
+перекрытия нет: транзакции, не видимые роли синхронизации в pg_stat_activity
+(без pg_read_all_stats), не удерживают отметку, и их строки догоняет только
+полная синхронизация.
+"""
+
+import argparse
+import datetime
+import time
+
+from neo4j_common import (connect_to_neo4j, delete_in_batches, element_ids, sync_state, save_sync_state,
+                          NEO4J_BATCH_SIZE)
+from postgresql_common import (connect_to_postgresql, release_postgresql, stream_query,
+                               EXPORT_ITERSIZE, SYNC_RESETS_TABLE)
+from postgresql_migrations import DELETIONS_TABLE, VISIT_CHANGES_TABLE
+
+# updated_at = now(), то есть время начала транзакции записи, и строки видны
+# только после ее фиксации. Поэтому отметка синхронизации - не now(), а начало
+# самой старой открытой транзакции в этой базе: строки еще не зафиксированных
+# транзакций попадут в следующий запуск. Транзакции других ролей видны
+# в pg_stat_activity только роли с правами pg_read_all_stats (или суперпользователю).
+WATERMARK_QUERY = """
+SELECT LEAST(now(), min(xact_start))
+FROM pg_stat_activity
+WHERE datname = current_database()
+  AND backend_type = 'client backend'
+  AND pid <> pg_backend_pid()
+"""
+
+# Небольшой запас к отметке: строки с updated_at, равным отметке, тоже выбираются.
+# Повторная обработка безопасна - запись в граф идет через MERGE.
+SYNC_OVERLAP = datetime.timedelta(seconds=1)
+
+# Агрегаты посещений по всем парам студент-лекция (полная синхронизация)
+ATTENDED_FULL_QUERY = """
+SELECT v.id_student AS student_id, s.id_lect AS lecture_id,
+       COUNT(*) AS visit_count,
+       MIN(v.visitTime) AS first_visit,
+       MAX(v.visitTime) AS last_visit,
+       (AVG(EXTRACT(EPOCH FROM v.visitTime - s.startTime)) / 60)::float8 AS avg_lateness
+FROM visits v
+JOIN schedule s ON v.id_rasp = s.id
+GROUP BY v.id_student, s.id_lect
+"""
+
+# Агрегаты только для пар, затронутых изменениями: текущие пары измененных
+# посещений и занятий и прежние пары из журнала sync_visit_changes (удаленные
+# посещения, смена студента или занятия посещения, смена лекции занятия).
+# Каждая пара пересчитывается целиком по индексу visits (id_student, ...);
+# пара без посещений дает visit_count = 0 и удаляет связь.
+ATTENDED_CHANGES_QUERY = f"""
+WITH changed AS (
+    SELECT v.id_student, s.id_lect
+    FROM visits v JOIN schedule s ON v.id_rasp = s.id
+    WHERE v.updated_at > %(since)s
+    UNION
+    SELECT v.id_student, s.id_lect
+    FROM schedule s JOIN visits v ON v.id_rasp = s.id
+    WHERE s.updated_at > %(since)s
+    UNION
+    SELECT id_student, id_lect
+    FROM {VISIT_CHANGES_TABLE}
+    WHERE changed_at > %(since)s AND id_student IS NOT NULL AND id_lect IS NOT NULL
+)
+SELECT c.id_student AS student_id, c.id_lect AS lecture_id, agg.*
+FROM changed c
+CROSS JOIN LATERAL (
+    SELECT COUNT(*) AS visit_count,
+           MIN(v.visitTime) AS first_visit,
+           MAX(v.visitTime) AS last_visit,
+           (AVG(EXTRACT(EPOCH FROM v.visitTime - s.startTime)) / 60)::float8 AS avg_lateness
+    FROM visits v JOIN schedule s ON v.id_rasp = s.id
+    WHERE v.id_student = c.id_student AND s.id_lect = c.id_lect
+) agg
+"""
+
+# Синхронизация графа: (сообщение, запрос к PostgreSQL, запрос Cypher для пачки строк $rows).
+# Запросы выбирают только строки, измененные после %(since)s (при полной синхронизации
+# это -infinity); для связей ATTENDED заданы отдельные запросы полного и частичного
+# пересчета. Узлы обновляются через MERGE по id, устаревшие связи узла с прежними
+# родителями удаляются; $version отмечает записанные элементы.
+IMPORT_STEPS = [
+    (
+        "Синхронизировано {count} кафедр",
+        "SELECT id, name FROM departments WHERE updated_at > %(since)s",
+        """
+        UNWIND $rows AS row
+        MERGE (d:Department {id: row.id})
+        SET d.name = row.name, d.syncVersion = $version
+        """
+    ),
+    (
+        "Синхронизировано {count} специальностей",
+        "SELECT id, name, code FROM specialties WHERE updated_at > %(since)s",
+        """
+        UNWIND $rows AS row
+        MERGE (sp:Specialty {id: row.id})
+        SET sp.name = row.name, sp.code = row.code, sp.syncVersion = $version
+        """
+    ),
+    (
+        "Синхронизировано {count} курсов",
+        """
+        SELECT id, name, id_kafedr_a AS dept_id, id_spec AS spec_id
+        FROM courses WHERE updated_at > %(since)s
+        """,
+        """
+        UNWIND $rows AS row
+        MERGE (c:Course {id: row.id})
+        SET c.name = row.name, c.syncVersion = $version
+        WITH c, row
+        CALL {
+            WITH c, row
+            MATCH (c)-[old:BELONGS_TO]->(d:Department)
+            WHERE row.dept_id IS NULL OR d.id <> row.dept_id
+            DELETE old
+        }
+        CALL {
+            WITH c, row
+            MATCH (c)-[old:HAS_SPECIALTY]->(s:Specialty)
+            WHERE row.spec_id IS NULL OR s.id <> row.spec_id
+            DELETE old
+        }
+        MATCH (d:Department {id: row.dept_id})
+        MATCH (s:Specialty {id: row.spec_id})
+        MERGE (c)-[:BELONGS_TO]->(d)
+        MERGE (c)-[:HAS_SPECIALTY]->(s)
+        """
+    ),
+    (
+        "Синхронизировано {count} лекций",
+        """
+        SELECT id, name, requirements, id_course AS course_id
+        FROM lectures WHERE updated_at > %(since)s
+        """,
+        """
+        UNWIND $rows AS row
+        MERGE (l:Lecture {id: row.id})
+        SET l.name = row.name, l.requirements = row.requirements, l.syncVersion = $version
+        WITH l, row
+        CALL {
+            WITH l, row
+            MATCH (l)-[old:PART_OF]->(c:Course)
+            WHERE row.course_id IS NULL OR c.id <> row.course_id
+            DELETE old
+        }
+        MATCH (c:Course {id: row.course_id})
+        MERGE (l)-[:PART_OF]->(c)
+        """
+    ),
+    (
+        "Синхронизировано {count} групп",
+        """
+        SELECT id, name, startYear::text AS start_year, endYear::text AS end_year, id_kafedr_a AS dept_id
+        FROM groups WHERE updated_at > %(since)s
+        """,
+        """
+        UNWIND $rows AS row
+        MERGE (g:Group {id: row.id})
+        SET g.name = row.name, g.startYear = row.start_year, g.endYear = row.end_year,
+            g.syncVersion = $version
+        WITH g, row
+        CALL {
+            WITH g, row
+            MATCH (g)-[old:BELONGS_TO]->(d:Department)
+            WHERE row.dept_id IS NULL OR d.id <> row.dept_id
+            DELETE old
+        }
+        MATCH (d:Department {id: row.dept_id})
+        MERGE (g)-[:BELONGS_TO]->(d)
+        """
+    ),
+    (
+        "Синхронизировано {count} студентов",
+        """
+        SELECT id, fio, date_of_recipient::text AS date_of_recipient, id_group AS group_id
+        FROM students WHERE updated_at > %(since)s
+        """,
+        """
+        UNWIND $rows AS row
+        MERGE (s:Student {id: row.id})
+        SET s.fio = row.fio, s.date_of_recipient = row.date_of_recipient, s.syncVersion = $version
+        WITH s, row
+        CALL {
+            WITH s, row
+            MATCH (s)-[old:MEMBER_OF]->(g:Group)
+            WHERE row.group_id IS NULL OR g.id <> row.group_id
+            DELETE old
+        }
+        MATCH (g:Group {id: row.group_id})
+        MERGE (s)-[:MEMBER_OF]->(g)
+        """
+    ),
+    (
+        # Занятия расписания: узел Slot с временем начала и окончания
+        "Синхронизировано {count} занятий расписания",
+        """
+        SELECT id, startTime AS start_time, endTime AS end_time,
+               id_lect AS lecture_id, id_group AS group_id
+        FROM schedule WHERE updated_at > %(since)s
+        """,
+        """
+        UNWIND $rows AS row
+        MERGE (sl:Slot {id: row.id})
+        SET sl.startTime = row.start_time, sl.endTime = row.end_time, sl.syncVersion = $version
+        WITH sl, row
+        CALL {
+            WITH sl, row
+            MATCH (sl)-[old:FOR_LECTURE]->(l:Lecture)
+            WHERE row.lecture_id IS NULL OR l.id <> row.lecture_id
+            DELETE old
+        }
+        CALL {
+            WITH sl, row
+            MATCH (sl)-[old:FOR_GROUP]->(g:Group)
+            WHERE row.group_id IS NULL OR g.id <> row.group_id
+            DELETE old
+        }
+        MATCH (l:Lecture {id: row.lecture_id})
+        MATCH (g:Group {id: row.group_id})
+        MERGE (sl)-[:FOR_LECTURE]->(l)
+        MERGE (sl)-[:FOR_GROUP]->(g)
+        """
+    ),
+    (
+        # Отдельные посещения: связь студента с занятием (не больше одной на пару)
+        "Синхронизировано {count} посещений занятий",
+        """
+        SELECT id, id_student AS student_id, id_rasp AS slot_id, visitTime AS visit_time
+        FROM visits WHERE updated_at > %(since)s
+        """,
+        """
+        UNWIND $rows AS row
+        MATCH (s:Student {id: row.student_id})
+        MATCH (sl:Slot {id: row.slot_id})
+        CALL {
+            WITH s, row
+            MATCH (s)-[old:VISITED {id: row.id}]->(other:Slot)
+            WHERE other.id <> row.slot_id
+            DELETE old
+        }
+        MERGE (s)-[v:VISITED]->(sl)
+        SET v.id = row.id, v.time = row.visit_time, v.syncVersion = $version
+        """
+    ),
+    (
+        # Посещения агрегируются в SQL: одна связь на пару студент-лекция
+        # с числом посещений, первым/последним посещением и средним опозданием в минутах
+        "Синхронизировано {count} связей между студентами и лекциями",
+        {"full": ATTENDED_FULL_QUERY, "changes": ATTENDED_CHANGES_QUERY},
+        """
+        UNWIND $rows AS row
+        MATCH (s:Student {id: row.student_id})
+        MATCH (l:Lecture {id: row.lecture_id})
+        MERGE (s)-[a:ATTENDED]->(l)
+        SET a.visitCount = row.visit_count,
+            a.firstVisit = row.first_visit,
+            a.lastVisit = row.last_visit,
+            a.avgLateness = row.avg_lateness,
+            a.syncVersion = $version
+        WITH a WHERE a.visitCount = 0
+        DELETE a
+        """
+    )
+]
+
+# Удаление узлов по журналу удалений: (таблица, метка). Зависимые сущности идут первыми.
+DELETION_STEPS = [
+    ("schedule", "Slot"),
+    ("students", "Student"),
+    ("groups", "Group"),
+    ("lectures", "Lecture"),
+    ("courses", "Course"),
+    ("specialties", "Specialty"),
+    ("departments", "Department")
+]
+
+def apply_deletions(neo4j, pg_connection, since, itersize=EXPORT_ITERSIZE, batch_size=NEO4J_BATCH_SIZE):
+    """Удаление из графа посещений и узлов, строки которых удалены в PostgreSQL после since
+
+    Связь VISITED удаляется, если у студента не осталось ни одного посещения
+    прежнего занятия (посещение удалено или перенесено на другое занятие).
+    """
+    rows = (
+        dict(row)
+        for chunk in stream_query(
+            pg_connection,
+            f"""
+            SELECT DISTINCT c.id_student AS student_id, c.id_rasp AS slot_id
+            FROM {VISIT_CHANGES_TABLE} c
+            WHERE c.changed_at > %(since)s
+              AND NOT EXISTS (
+                  SELECT 1 FROM visits v WHERE v.id_student = c.id_student AND v.id_rasp = c.id_rasp
+              )
+            """,
+            {"since": since},
+            itersize=itersize
+        )
+        for row in chunk
+    )
+    total = neo4j.write_batches(
+        """
+        UNWIND $rows AS row
+        MATCH (:Student {id: row.student_id})-[v:VISITED]->(:Slot {id: row.slot_id})
+        DELETE v
+        """,
+        rows,
+        batch_size
+    )
+    if total:
+        print(f"✅ Удалено посещений: {total}")
+
+    for table, label in DELETION_STEPS:
+        rows = (
+            dict(row)
+            for chunk in stream_query(
+                pg_connection,
+                f"SELECT DISTINCT row_id AS id FROM {DELETIONS_TABLE} "
+                f"WHERE table_name = %(table)s AND deleted_at > %(since)s",
+                {"table": table, "since": since},
+                itersize=itersize
+            )
+            for row in chunk
+        )
+        count = neo4j.write_batches(
+            f"UNWIND $rows AS row MATCH (n:{label} {{id: row.id}}) DETACH DELETE n",
+            rows,
+            batch_size
+        )
+        if count:
+            print(f"✅ Удалено узлов {label}: {count}")
+        total += count
+    return total
+
+def delete_stale(neo4j, version, batch_size=NEO4J_BATCH_SIZE):
+    """Удаление узлов и связей ATTENDED/VISITED, не записанных полной синхронизацией version
+
+    Так убираются строки, исчезнувшие без записи в журнале удалений
+    (TRUNCATE, удаление недельных секций visits) - о них сообщают отметки sync_resets.
+    Устаревшие элементы каждого типа находятся одним проходом, а пачки
+    удаляют их по elementId.
+    """
+    stale = "WHERE x.syncVersion IS NULL OR x.syncVersion <> $version"
+    total = 0
+    for pattern in ("(:Student)-[x:ATTENDED]->(:Lecture)", "(:Student)-[x:VISITED]->(:Slot)"):
+        ids = element_ids(neo4j, f"{pattern} {stale}", "x", version=version)
+        total += delete_in_batches(neo4j, "()-[x]->()", "x", batch_size, ids=ids)
+    for _, label in DELETION_STEPS:
+        ids = element_ids(neo4j, f"(x:{label}) {stale}", "x", version=version)
+        total += delete_in_batches(neo4j, "(x)", "x", batch_size, detach=True, ids=ids)
+    if total:
+        print(f"✅ Удалено устаревших узлов и связей: {total}")
+    return total
+
+def prune_deletions(pg_cursor, before):
+    """Очистка журналов удалений и изменений посещений от записей, уже учтенных синхронизацией"""
+    pg_cursor.execute(f"DELETE FROM {DELETIONS_TABLE} WHERE deleted_at < %s", (before,))
+    pruned = pg_cursor.rowcount
+    pg_cursor.execute(f"DELETE FROM {VISIT_CHANGES_TABLE} WHERE changed_at < %s", (before,))
+    return pruned + pg_cursor.rowcount
+
+def pending_reset(pg_cursor):
+    """Номер последней отметки сброса данных (sync_resets) или None, если сбросов не было"""
+    pg_cursor.execute(f"SELECT max(id), string_agg(DISTINCT source, ', ') FROM {SYNC_RESETS_TABLE}")
+    reset_id, sources = pg_cursor.fetchone()
+    if reset_id is not None:
+        print(f"⚠️ Данные изменены в обход журналов синхронизации ({sources}): выполняется полная синхронизация")
+    return reset_id
+
+def sync_graph(neo4j, pg_cursor, full=False, itersize=EXPORT_ITERSIZE, batch_size=NEO4J_BATCH_SIZE):
+    """Синхронизация графа Neo4j с PostgreSQL
+
+    Инкрементальный режим переносит только строки, измененные после отметки
+    прошлой синхронизации (хранится в узле SyncState), и удаляет узлы
+    по журналу удалений, поэтому время работы пропорционально объему изменений.
+    Полный режим (или первый запуск) переносит все строки и затем удаляет
+    из графа все, что не было записано. Полный режим включается и сам, если
+    после прошлого запуска данные сбрасывались без журналов (TRUNCATE,
+    удаление или отключение секций visits, пересоздание схемы): иначе в графе
+    остались бы удаленные узлы, а MERGE по заново выданным id связал бы
+    старые узлы с новыми строками. После успешной синхронизации
+    сохраняются новая отметка и увеличенная версия графа.
+    Отметка не позже начала самой старой открытой транзакции базы, видимой
+    в pg_stat_activity (WATERMARK_QUERY); транзакции ролей, чьи сеансы
+    текущей роли не видны, не учитываются - их изменения, зафиксированные
+    позже следующего запуска, могут быть пропущены до полной синхронизации.
+    Возвращает новую версию графа.
+    """
+    pg_connection = pg_cursor.connection
+    state = sync_state(neo4j)
+    version = state["version"] + 1
+
+    # Новая отметка - время начала чтения или начало самой старой открытой
+    # транзакции: изменения во время синхронизации попадут в следующий запуск
+    pg_cursor.execute("SELECT now()")
+    now = pg_cursor.fetchone()[0]
+    pg_cursor.execute(WATERMARK_QUERY)
+    watermark = pg_cursor.fetchone()[0]
+    if now - watermark > SYNC_OVERLAP:
+        print(f"⚠️ Отметка синхронизации сдвинута на {now - watermark} назад: "
+              f"в базе есть открытая транзакция")
+
+    reset_id = pending_reset(pg_cursor)
+    full = full or state["watermark"] is None or reset_id is not None
+    since = "-infinity" if full else state["watermark"] - SYNC_OVERLAP
+    print(f"Синхронизация: {'полная' if full else f'изменения после {since:%Y-%m-%d %H:%M:%S}'}, "
+          f"версия графа {version}")
+
+    if not full:
+        apply_deletions(neo4j, pg_connection, since, itersize, batch_size)
+
+    for message, sql, cypher in IMPORT_STEPS:
+        if isinstance(sql, dict):
+            sql = sql["full" if full else "changes"]
+        rows = (
+            dict(row)
+            for chunk in stream_query(pg_connection, sql, {"since": since}, itersize=itersize)
+            for row in chunk
+        )
+        started = time.perf_counter()
+        count = neo4j.write_batches(cypher, rows, batch_size, version=version)
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed > 0 else 0
+        print(f"✅ {message.format(count=count)} ({elapsed:.2f} с, {rate:,.0f} строк/с)")
+
+    if full:
+        delete_stale(neo4j, version, batch_size)
+
+    save_sync_state(neo4j, watermark, version)
+
+    # Учтенные отметки сброса убираются; появившиеся во время синхронизации останутся
+    if reset_id is not None:
+        pg_cursor.execute(f"DELETE FROM {SYNC_RESETS_TABLE} WHERE id <= %s", (reset_id,))
+
+    # Записи журнала старше отметки с запасом больше не понадобятся
+    pruned = prune_deletions(pg_cursor, watermark - SYNC_OVERLAP)
+    if pruned:
+        print(f"✅ Из журналов синхронизации убрано {pruned} учтенных записей")
+    return version
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Синхронизация графа Neo4j с PostgreSQL")
+    parser.add_argument("--full", action="store_true",
+                        help="перенести все строки и удалить из графа отсутствующие в PostgreSQL")
+    parser.add_argument("--batch-size", type=int, default=NEO4J_BATCH_SIZE,
+                        help="сколько строк записывать в Neo4j одной транзакцией")
+    return parser.parse_args()
+
+def main():
+    """Синхронизация графа с выводом затраченного времени"""
+    args = parse_args()
+    print("\n===== СИНХРОНИЗАЦИЯ NEO4J =====")
+
+    neo4j = connect_to_neo4j()
+    if not neo4j:
+        return
+
+    pg_connection, pg_cursor = connect_to_postgresql()
+    if not pg_connection or not pg_cursor:
+        neo4j.close()
+        return
+
+    try:
+        started = time.perf_counter()
+        version = sync_graph(neo4j, pg_cursor, args.full, batch_size=args.batch_size)
+        print(f"\n✅ Граф синхронизирован за {time.perf_counter() - started:.2f} с, версия {version}")
+    except Exception as e:
+        print(f"❌ Ошибка при синхронизации: {e}")
+    finally:
+        neo4j.close()
+        release_postgresql(pg_connection, pg_cursor)
+        print("✅ Соединения закрыты")
+
+if __name__ == "__main__":
+    main()
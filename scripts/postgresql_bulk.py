@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import time
+
+import numpy as np
+
+from postgresql_common import SCHEMA_TABLES
+
+# Порядок загрузки таблиц с учетом внешних ключей (сначала родительские таблицы)
+TABLES_IN_FK_ORDER = SCHEMA_TABLES
+
+# Размер блока, которым psycopg2 читает данные для COPY
+COPY_BUFFER_SIZE = 64 * 1024
+
+def format_copy_value(value):
+    """Преобразование значения Python в текстовый формат COPY"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    text = str(value)
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+class CopyStream:
+    """Файлоподобный объект, отдающий строки итератора в текстовом формате COPY
+
+    Строки формируются по мере чтения, поэтому в памяти одновременно
+    находится только один блок данных, а не вся таблица.
+    """
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = ""
+        self.row_count = 0
+
+    def read(self, size=-1):
+        parts = [self._buffer]
+        length = len(self._buffer)
+        while size < 0 or length < size:
+            try:
+                row = next(self._rows)
+            except StopIteration:
+                break
+            line = "\t".join(format_copy_value(value) for value in row) + "\n"
+            parts.append(line)
+            length += len(line)
+            self.row_count += 1
+
+        data = "".join(parts)
+        if size < 0 or len(data) <= size:
+            self._buffer = ""
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+class ColumnBatches:
+    """Поток данных таблицы в виде блоков колонок (кортежей массивов NumPy)
+
+    Каждый блок - кортеж массивов одинаковой длины, по одному на колонку.
+    Блоки преобразуются в текст COPY целиком, без обхода строк в Python.
+    Массивы datetime64 интерпретируются как время в UTC.
+    """
+
+    def __init__(self, batches):
+        self._batches = batches
+
+    def __iter__(self):
+        return iter(self._batches)
+
+    def rows(self):
+        """Построчный обход (для резервной загрузки через INSERT)"""
+        for batch in self:
+            columns = [
+                column.astype("datetime64[us]").astype(datetime.datetime).tolist()
+                if column.dtype.kind == "M" else column.tolist()
+                for column in batch
+            ]
+            for row in zip(*columns):
+                yield tuple(
+                    value.replace(tzinfo=datetime.timezone.utc)
+                    if isinstance(value, datetime.datetime) else value
+                    for value in row
+                )
+
+def format_copy_column(column):
+    """Векторное преобразование колонки NumPy в список строк формата COPY"""
+    if column.dtype.kind == "M":
+        return np.datetime_as_string(column, timezone="UTC").tolist()
+    if column.dtype.kind == "b":
+        return np.where(column, "t", "f").tolist()
+    return column.astype(str).tolist()
+
+class ColumnCopyStream:
+    """Файлоподобный объект для COPY, формирующий текст из блоков колонок"""
+
+    def __init__(self, batches):
+        self._batches = iter(batches)
+        self._buffer = ""
+        self.row_count = 0
+
+    def read(self, size=-1):
+        parts = [self._buffer]
+        length = len(self._buffer)
+        while size < 0 or length < size:
+            try:
+                batch = next(self._batches)
+            except StopIteration:
+                break
+            columns = [format_copy_column(column) for column in batch]
+            text = "".join("\t".join(values) + "\n" for values in zip(*columns))
+            parts.append(text)
+            length += len(text)
+            self.row_count += len(batch[0])
+
+        data = "".join(parts)
+        if size < 0 or len(data) <= size:
+            self._buffer = ""
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+def copy_rows(cursor, table, columns, rows):
+    """Потоковая загрузка строк в таблицу через COPY FROM STDIN
+
+    rows - итератор кортежей или ColumnBatches с блоками колонок.
+    """
+    stream = ColumnCopyStream(rows) if isinstance(rows, ColumnBatches) else CopyStream(rows)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN",
+        stream,
+        size=COPY_BUFFER_SIZE
+    )
+    return stream.row_count
+
+def insert_rows(cursor, table, columns, rows):
+    """Построчная загрузка через INSERT (резервный способ)"""
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    if isinstance(rows, ColumnBatches):
+        rows = rows.rows()
+    count = 0
+    for row in rows:
+        cursor.execute(query, row)
+        count += 1
+    return count
+
+def reset_sequences(cursor, tables):
+    """Синхронизация SERIAL-последовательностей с явно загруженными id"""
+    for table in tables:
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {table}",
+            (table,)
+        )
+
+def load_tables(connection, tables, bulk=True):
+    """Загрузка данных в таблицы в порядке внешних ключей в одной транзакции
+
+    tables - словарь {таблица: (список колонок, итерируемый набор строк
+    или ColumnBatches)}.
+    При bulk=True используется COPY FROM STDIN, иначе построчный INSERT.
+    Возвращает словарь {таблица: (число строк, время загрузки в секундах)}.
+    """
+    load = copy_rows if bulk else insert_rows
+    ordered = [table for table in TABLES_IN_FK_ORDER if table in tables]
+    ordered += [table for table in tables if table not in ordered]
+
+    autocommit = connection.autocommit
+    connection.autocommit = False
+    stats = {}
+    try:
+        with connection.cursor() as cursor:
+            for table in ordered:
+                columns, rows = tables[table]
+                started = time.perf_counter()
+                count = load(cursor, table, columns, rows)
+                elapsed = time.perf_counter() - started
+                stats[table] = (count, elapsed)
+
+                rate = count / elapsed if elapsed > 0 else float("inf")
+                print(f"✅ {table}: {count} строк за {elapsed:.2f} с ({rate:,.0f} строк/с)")
+
+            reset_sequences(cursor, ordered)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.autocommit = autocommit
+
+    return stats
@@ -1,51 +1,39 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import psycopg2
-from psycopg2.extras import DictCursor
 from psycopg2 import Error
+import argparse
 import json
+import datetime
+import time
 
-def connect_to_postgresql():
-    """Подключение к PostgreSQL"""
-    try:
-        # Подключение к существующей базе данных
-        connection = psycopg2.connect(
-            user="postgres",
-            password="postgres",
-            host="localhost",
-            port="5432",
-            database="postgres"
-        )
-        connection.autocommit = True
+from postgresql_common import connect_to_postgresql, release_postgresql, table_stats, SCHEMA_TABLES
+from postgresql_migrations import MIGRATIONS_TABLE, SYNC_JOURNAL_TABLES, SYNC_TRIGGER_FUNCTIONS
+from postgresql_partitions import drop_weeks_before, drop_all_partitions, list_week_partitions
 
-        # Создаем объект курсора для выполнения операций с базой данных
-        cursor = connection.cursor(cursor_factory=DictCursor)
-        print("✅ Соединение с PostgreSQL установлено")
-        return connection, cursor
-    except (Exception, Error) as error:
-        print(f"❌ Ошибка при работе с PostgreSQL: {error}")
-        return None, None
+# Таблицы схемы университета в порядке зависимостей (сначала зависимые)
+TABLES_IN_ORDER = list(reversed(SCHEMA_TABLES))
 
 def check_data(cursor):
     """Проверка наличия данных в базе"""
     try:
-        tables = ["faculties", "departments", "students", "courses", "teachers", "schedule", "attendance"]
         data_exists = False
         
         print("\n== Проверка данных в таблицах ==")
         
-        for table in tables:
-            # Проверяем существование таблицы
-            cursor.execute(f"SELECT to_regclass('public.{table}')")
-            if cursor.fetchone()[0] is None:
+        # Точное количество строк (COUNT(*)) существующих таблиц одним запросом: оценки
+        # планировщика для еще не анализированной таблицы показали бы "данных нет"
+        cursor.execute("SELECT name FROM unnest(%s::text[]) AS name WHERE to_regclass(name) IS NOT NULL",
+                       (TABLES_IN_ORDER,))
+        tables = [row[0] for row in cursor.fetchall()]
+        stats = table_stats(cursor, exact=True, tables=tables) if tables else {}
+        
+        for table in reversed(TABLES_IN_ORDER):
+            if table not in stats:
                 print(f"❌ Таблица '{table}' не существует")
                 continue
-                
-            # Проверяем наличие данных в таблице
-            cursor.execute(f"SELECT COUNT(*) FROM {table}")
-            count = cursor.fetchone()[0]
             
+            count = stats[table][0]
             if count > 0:
                 print(f"✅ Таблица '{table}': найдено {count} записей")
                 data_exists = True
@@ -62,9 +50,10 @@ def show_data_sample(cursor):
     try:
         # Примеры студентов
         cursor.execute("""
-        SELECT s.id, s.full_name, d.name as department_name, s.year
+        SELECT s.id, s.fio, g.name as group_name, d.name as department_name
         FROM students s
-        JOIN departments d ON s.department_id = d.id
+        JOIN groups g ON s.id_group = g.id
+        JOIN departments d ON g.id_kafedr_a = d.id
         LIMIT 3
         """)
         
@@ -72,14 +61,14 @@ def show_data_sample(cursor):
         if students:
             print("\n== Примеры студентов для удаления ==")
             for student in students:
-                print(f"  - ID: {student['id']}, Имя: {student['full_name']}")
-                print(f"    Кафедра: {student['department_name']}, Курс: {student['year']}")
+                print(f"  - ID: {student['id']}, ФИО: {student['fio']}")
+                print(f"    Группа: {student['group_name']}, Кафедра: {student['department_name']}")
         
         # Примеры кафедр
         cursor.execute("""
-        SELECT d.id, d.name, f.name as faculty_name, d.head
+        SELECT d.id, d.name, i.name as institute_name
         FROM departments d
-        JOIN faculties f ON d.faculty_id = f.id
+        JOIN institutes i ON d.id_institutes = i.id
         LIMIT 2
         """)
         
@@ -88,61 +77,70 @@ def show_data_sample(cursor):
             print("\n== Примеры кафедр для удаления ==")
             for dept in departments:
                 print(f"  - ID: {dept['id']}, Название: {dept['name']}")
-                print(f"    Факультет: {dept['faculty_name']}, Заведующий: {dept['head']}")
+                print(f"    Институт: {dept['institute_name']}")
         
         # Примеры расписания
         cursor.execute("""
-        SELECT s.id, c.name as course_name, t.full_name as teacher_name, 
-               s.room, s.day_of_week, s.start_time, s.end_time
+        SELECT s.id, l.name as lecture_name, g.name as group_name,
+               s.startTime, s.endTime
         FROM schedule s
-        JOIN courses c ON s.course_id = c.id
-        JOIN teachers t ON s.teacher_id = t.id
+        JOIN lectures l ON s.id_lect = l.id
+        JOIN groups g ON s.id_group = g.id
         LIMIT 2
         """)
         
         schedule = cursor.fetchall()
         if schedule:
-            day_names = ['', 'Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье']
             print("\n== Примеры расписания для удаления ==")
             for item in schedule:
-                day = day_names[item['day_of_week']] if 1 <= item['day_of_week'] <= 7 else 'Неизвестный день'
-                print(f"  - ID: {item['id']}, Курс: {item['course_name']}")
-                print(f"    Преподаватель: {item['teacher_name']}, Аудитория: {item['room']}")
-                print(f"    День: {day}, Время: {item['start_time']} - {item['end_time']}")
+                print(f"  - ID: {item['id']}, Лекция: {item['lecture_name']}, Группа: {item['group_name']}")
+                print(f"    Время: {item['starttime']} - {item['endtime']}")
+        
+        # Недельные секции посещений
+        partitions = list_week_partitions(cursor)
+        if partitions:
+            print(f"\n== Недельных секций посещений: {len(partitions)} ==")
+            print(f"  С {min(partitions)} по {max(partitions)}")
                 
         return True
     except (Exception, Error) as error:
         print(f"❌ Ошибка при получении образцов данных: {error}")
         return False
 
-def delete_table_data(cursor, table_name):
-    """Удаление данных из определенной таблицы"""
+def reset_data(cursor, drop_partitions=False):
+    """Быстрый сброс всех данных одной командой TRUNCATE ... RESTART IDENTITY CASCADE
+
+    Все таблицы схемы очищаются одним оператором в одной транзакции,
+    SERIAL-последовательности сбрасываются. При drop_partitions=True
+    недельные секции visits удаляются целиком (в той же транзакции) и
+    будут созданы заново при следующей загрузке.
+    Возвращает время сброса в секундах.
+    """
+    connection = cursor.connection
+    autocommit = connection.autocommit
+    connection.autocommit = False
     try:
-        cursor.execute(f"DELETE FROM {table_name}")
-        print(f"✅ Данные из таблицы '{table_name}' удалены")
-        return True
-    except (Exception, Error) as error:
-        print(f"❌ Ошибка при удалении данных из таблицы '{table_name}': {error}")
-        return False
+        started = time.perf_counter()
+        if drop_partitions:
+            drop_all_partitions(cursor)
+        cursor.execute("SELECT name FROM unnest(%s::text[]) AS name WHERE to_regclass(name) IS NOT NULL",
+                       (TABLES_IN_ORDER,))
+        tables = [row[0] for row in cursor.fetchall()]
+        if tables:
+            cursor.execute(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE")
+        connection.commit()
+        return time.perf_counter() - started
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.autocommit = autocommit
 
-def delete_all_data(cursor):
-    """Удаление всех данных из всех таблиц с учетом зависимостей"""
+def delete_all_data(cursor, drop_partitions=False):
+    """Удаление всех данных из всех таблиц (структура сохраняется)"""
     try:
-        # Удаляем данные в правильном порядке (с учетом зависимостей)
-        tables_in_order = [
-            "attendance",     # Сначала удаляем данные из зависимых таблиц
-            "schedule",
-            "students",
-            "teachers",
-            "courses",
-            "departments",
-            "faculties"
-        ]
-        
-        for table in tables_in_order:
-            delete_table_data(cursor, table)
-            
-        print("\n✅ Все данные успешно удалены")
+        elapsed = reset_data(cursor, drop_partitions)
+        print(f"\n✅ Все данные успешно удалены за {elapsed * 1000:.0f} мс")
         return True
     except (Exception, Error) as error:
         print(f"❌ Ошибка при удалении всех данных: {error}")
@@ -151,33 +149,24 @@ def delete_all_data(cursor):
 def drop_all_tables(cursor):
     """Удаление всех таблиц"""
     try:
-        # Сначала удаляем партиции таблицы attendance
-        cursor.execute("""
-        SELECT tablename 
-        FROM pg_tables 
-        WHERE tablename LIKE 'attendance_week_%'
-        """)
-        
-        partition_tables = [row['tablename'] for row in cursor.fetchall()]
-        
-        for table in partition_tables:
-            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        # Сначала удаляем недельные секции таблицы visits (включая отключенные)
+        for table in drop_all_partitions(cursor):
             print(f"✅ Партиция '{table}' удалена")
             
         # Удаляем основные таблицы в правильном порядке
-        tables_in_order = [
-            "attendance",     # Сначала удаляем зависимые таблицы
-            "schedule",
-            "students",
-            "teachers",
-            "courses",
-            "departments",
-            "faculties"
-        ]
-        
-        for table in tables_in_order:
+        for table in TABLES_IN_ORDER:
             cursor.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
             print(f"✅ Таблица '{table}' удалена")
+        
+        # Журналы синхронизации и функции их триггеров
+        for table in SYNC_JOURNAL_TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            print(f"✅ Таблица '{table}' удалена")
+        cursor.execute(f"DROP FUNCTION IF EXISTS {', '.join(SYNC_TRIGGER_FUNCTIONS)}")
+        
+        # История миграций удаляется вместе со схемой, иначе схема не будет создана повторно
+        cursor.execute(f"DROP TABLE IF EXISTS {MIGRATIONS_TABLE}")
+        print(f"✅ Таблица '{MIGRATIONS_TABLE}' удалена")
             
         print("\n✅ Все таблицы успешно удалены")
         return True
@@ -185,8 +174,36 @@ def drop_all_tables(cursor):
         print(f"❌ Ошибка при удалении таблиц: {error}")
         return False
 
+def drop_visit_weeks(cursor, before):
+    """Удаление посещений за недели до указанной даты целыми секциями (без DELETE)"""
+    try:
+        dropped = drop_weeks_before(cursor, before)
+        for table in dropped:
+            print(f"✅ Партиция '{table}' удалена")
+        print(f"\n✅ Удалено недельных секций посещений: {len(dropped)}")
+        return True
+    except (Exception, Error) as error:
+        print(f"❌ Ошибка при удалении недельных секций: {error}")
+        return False
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Удаление данных PostgreSQL")
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="без вопросов очистить все таблицы (TRUNCATE ... RESTART IDENTITY CASCADE)"
+    )
+    parser.add_argument(
+        "--drop-partitions",
+        action="store_true",
+        help="при сбросе удалить недельные секции visits целиком"
+    )
+    return parser.parse_args()
+
 def main():
     """Основная функция очистки данных PostgreSQL"""
+    args = parse_args()
     print("\n===== УДАЛЕНИЕ ДАННЫХ POSTGRESQL =====")
     
     # Подключаемся к PostgreSQL
@@ -195,6 +212,11 @@ def main():
         return
         
     try:
+        # Неинтерактивный сброс (например, между итерациями бенчмарков)
+        if args.reset:
+            delete_all_data(cursor, drop_partitions=args.drop_partitions)
+            return
+        
         # Проверяем наличие данных
         data_exists = check_data(cursor)
         
@@ -219,9 +241,10 @@ def main():
         print("\nВыберите действие:")
         print("1. Удалить только данные из таблиц (структуру сохранить)")
         print("2. Удалить таблицы полностью (вместе с данными)")
-        print("3. Отмена")
+        print("3. Удалить посещения за недели до указанной даты")
+        print("4. Отмена")
         
-        choice = input("Введите номер действия (1-3): ")
+        choice = input("Введите номер действия (1-4): ")
         
         if choice == '1':
             confirm = input("Вы точно хотите удалить ВСЕ данные из таблиц? (y/n): ")
@@ -235,6 +258,10 @@ def main():
                 drop_all_tables(cursor)
             else:
                 print("❌ Операция удаления отменена.")
+        elif choice == '3':
+            value = input("Удалить недели, начавшиеся до даты (ГГГГ-ММ-ДД): ")
+            before = datetime.datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc)
+            drop_visit_weeks(cursor, before)
         else:
             print("❌ Операция удаления отменена.")
             
@@ -242,11 +269,9 @@ def main():
         print(f"❌ Неожиданная ошибка: {e}")
     finally:
         # Закрываем соединение
-        if cursor:
-            cursor.close()
         if connection:
-            connection.close()
-            print("✅ Соединение с PostgreSQL закрыто")
+            release_postgresql(connection, cursor)
+            print("✅ Соединение с PostgreSQL возвращено в пул")
     
     print("\n===== УДАЛЕНИЕ POSTGRESQL ЗАВЕРШЕНО =====")
 
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import atexit
+import itertools
+import os
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import Error
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.extras import DictCursor
+from dotenv import load_dotenv
+
+# Параметры подключения берутся из окружения (или файла .env), по умолчанию - как в docker-compose.yml
+load_dotenv()
+
+POSTGRES_SETTINGS = {
+    "user": os.getenv("POSTGRES_USER", "postgres"),
+    "password": os.getenv("POSTGRES_PASSWORD", "postgres"),
+    "host": os.getenv("POSTGRES_HOST", "localhost"),
+    "port": os.getenv("POSTGRES_PORT", "5432"),
+    "database": os.getenv("POSTGRES_DB", "postgres")
+}
+
+# Таблицы схемы в порядке внешних ключей (сначала родительские таблицы)
+SCHEMA_TABLES = [
+    "universities", "institutes", "departments", "specialties",
+    "courses", "groups", "students", "lectures", "materials",
+    "schedule", "visits"
+]
+
+POOL_MIN_SIZE = int(os.getenv("POSTGRES_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.getenv("POSTGRES_POOL_MAX", "10"))
+# Ограничение времени выполнения одного запроса в миллисекундах (0 - без ограничения)
+STATEMENT_TIMEOUT_MS = int(os.getenv("POSTGRES_STATEMENT_TIMEOUT_MS", "0"))
+# Размер блока строк, который выгрузка в другие хранилища получает с сервера за раз
+EXPORT_ITERSIZE = int(os.getenv("POSTGRES_EXPORT_ITERSIZE", "2000"))
+
+class PoolTimeout(Error):
+    """Не удалось получить соединение из пула за отведенное время"""
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений с PostgreSQL
+
+    Соединения открываются лениво до max_size; при исчерпании пула запрос
+    соединения ждет, пока другое соединение не будет возвращено. Перед
+    выдачей простаивавшее соединение проверяется запросом SELECT 1 и при
+    необходимости переоткрывается. Все соединения работают в режиме
+    autocommit с заданным statement_timeout.
+    Пул общий только для одного процесса: этапы create_all.py выполняются
+    отдельными процессами и соединениями между собой не делятся.
+    """
+
+    def __init__(self, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+                 statement_timeout=STATEMENT_TIMEOUT_MS, health_check=True, **settings):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_timeout = statement_timeout
+        self.health_check = health_check
+        self.settings = settings or POSTGRES_SETTINGS
+
+        self._idle = []
+        self._size = 0
+        self._condition = threading.Condition()
+
+        for _ in range(min_size):
+            self._idle.append(self._open())
+            self._size += 1
+
+    def _open(self):
+        """Открытие нового соединения"""
+        connection = psycopg2.connect(
+            options=f"-c statement_timeout={self.statement_timeout}",
+            **self.settings
+        )
+        connection.autocommit = True
+        return connection
+
+    def _is_healthy(self, connection):
+        """Проверка, что соединение живо и готово к работе"""
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except (Exception, Error):
+            return False
+
+    def getconn(self, timeout=None):
+        """Получение соединения из пула (с ожиданием, если все заняты)"""
+        with self._condition:
+            while not self._idle and self._size >= self.max_size:
+                if not self._condition.wait(timeout):
+                    raise PoolTimeout(f"Нет свободных соединений в пуле (максимум {self.max_size})")
+            connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                self._size += 1
+
+        try:
+            if connection is None:
+                return self._open()
+            if self.health_check and not self._is_healthy(connection):
+                connection.close()
+                return self._open()
+            return connection
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def putconn(self, connection, close=False):
+        """Возврат соединения в пул; незавершенная транзакция откатывается"""
+        if not connection.closed and not close:
+            try:
+                if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+                connection.autocommit = True
+            except (Exception, Error):
+                close = True
+
+        with self._condition:
+            if connection.closed or close:
+                connection.close()
+                self._size -= 1
+            else:
+                self._idle.append(connection)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Соединение из пула на время блока with"""
+        connection = self.getconn(timeout)
+        try:
+            yield connection
+        finally:
+            self.putconn(connection)
+
+    def closeall(self):
+        """Закрытие всех простаивающих соединений"""
+        with self._condition:
+            for connection in self._idle:
+                connection.close()
+            self._size -= len(self._idle)
+            self._idle = []
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Общий пул соединений процесса (создается при первом обращении)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+            atexit.register(_pool.closeall)
+        return _pool
+
+def connect_to_postgresql():
+    """Подключение к PostgreSQL: соединение из общего пула и курсор DictCursor"""
+    try:
+        connection = get_pool().getconn()
+
+        # Создаем объект курсора для выполнения операций с базой данных
+        cursor = connection.cursor(cursor_factory=DictCursor)
+        print("✅ Соединение с PostgreSQL установлено")
+        return connection, cursor
+    except (Exception, Error) as error:
+        print(f"❌ Ошибка при работе с PostgreSQL: {error}")
+        return None, None
+
+def release_postgresql(connection, cursor=None):
+    """Закрытие курсора и возврат соединения в общий пул"""
+    if cursor is not None and not cursor.closed:
+        cursor.close()
+    if connection is not None:
+        get_pool().putconn(connection)
+
+_cursor_names = itertools.count(1)
+
+def stream_query(connection, query, params=None, itersize=EXPORT_ITERSIZE):
+    """Потоковое чтение результата запроса блоками по itersize строк
+
+    Запрос выполняется через именованный (серверный) курсор, поэтому
+    клиент держит в памяти только текущий блок, а не весь результат.
+    Именованный курсор живет внутри транзакции: для соединения в режиме
+    autocommit она открывается на время чтения и затем откатывается.
+    Генерирует списки строк DictRow.
+    """
+    autocommit = connection.autocommit
+    if autocommit:
+        connection.autocommit = False
+    cursor = connection.cursor(name=f"export_{next(_cursor_names)}", cursor_factory=DictCursor)
+    cursor.itersize = itersize
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(itersize)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+        if autocommit:
+            connection.rollback()
+            connection.autocommit = True
+
+# Отметки об изменениях данных в обход журналов синхронизации (TRUNCATE,
+# удаление и отключение секций visits): следующая синхронизация графа будет полной
+SYNC_RESETS_TABLE = "sync_resets"
+
+def record_sync_reset(cursor, source):
+    """Отметка о том, что данные source изменились без записи в журналы синхронизации"""
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (SYNC_RESETS_TABLE,))
+    if cursor.fetchone()[0]:
+        cursor.execute(f"INSERT INTO {SYNC_RESETS_TABLE} (source) VALUES (%s)", (source,))
+
+def table_stats(cursor, exact=False, tables=SCHEMA_TABLES):
+    """Количество строк и размер на диске для всех таблиц за один запрос
+
+    В быстром режиме (exact=False) количество строк берется из статистики
+    планировщика (pg_class.reltuples, а для ни разу не анализированных
+    таблиц - pg_stat_user_tables.n_live_tup), поэтому запрос не читает
+    сами таблицы, а отсутствующие таблицы просто пропускаются. В точном
+    режиме по каждой таблице выполняется COUNT(*), но тоже одним
+    обращением к серверу; все таблицы при этом должны существовать.
+    Для секционированной таблицы значения суммируются по секциям.
+    Возвращает словарь {таблица: (количество строк, размер в байтах)}.
+    """
+    if exact:
+        counts = ", ".join(f"('{table}', (SELECT COUNT(*) FROM {table}))" for table in tables)
+    else:
+        counts = ", ".join(f"('{table}', NULL::bigint)" for table in tables)
+
+    cursor.execute(f"""
+    SELECT t.name, COALESCE(t.exact_count, parts.estimate) AS row_count, parts.size
+    FROM (VALUES {counts}) AS t(name, exact_count)
+    JOIN pg_class c ON c.oid = to_regclass(t.name)
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(SUM(CASE WHEN p.reltuples >= 0 THEN p.reltuples
+                                 ELSE COALESCE(s.n_live_tup, 0) END), 0)::bigint AS estimate,
+               COALESCE(SUM(pg_total_relation_size(p.oid)), 0)::bigint AS size
+        FROM pg_class p
+        LEFT JOIN pg_stat_user_tables s ON s.relid = p.oid
+        WHERE p.oid IN (
+            SELECT c.oid WHERE c.relkind <> 'p'
+            UNION
+            SELECT relid FROM pg_partition_tree(c.oid) WHERE isleaf
+        )
+    ) parts
+    """)
+    stats = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+    return {table: stats[table] for table in tables if table in stats}
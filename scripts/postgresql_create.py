@@ -1,387 +1,85 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import psycopg2
-from psycopg2.extras import DictCursor
 from psycopg2 import Error
-from faker import Faker
-import random
-import datetime
-from datetime import timedelta
 import json
+import argparse
+import sys
 
-# Создаем генератор случайных данных
-fake = Faker('ru_RU')
-Faker.seed(42)  # Для воспроизводимости результатов
-random.seed(42)
+from data_generator import DataGenerator
+from postgresql_common import connect_to_postgresql, release_postgresql, table_stats
+from postgresql_bulk import load_tables
+from postgresql_indexes import create_indexes, format_size
+from postgresql_migrations import migrate, drop_schema, current_version
+from postgresql_partitions import (
+    ensure_partitions, ensure_upcoming_weeks, list_week_partitions,
+    week_attendance, explain_week_attendance, week_start
+)
 
-def connect_to_postgresql():
-    """Подключение к PostgreSQL"""
-    try:
-        # Подключение к существующей базе данных
-        connection = psycopg2.connect(
-            user="postgres",
-            password="postgres",
-            host="localhost",
-            port="5432",
-            database="postgres"
-        )
-        connection.autocommit = True
-
-        # Создаем объект курсора для выполнения операций с базой данных
-        cursor = connection.cursor(cursor_factory=DictCursor)
-        print("✅ Соединение с PostgreSQL установлено")
-        return connection, cursor
-    except (Exception, Error) as error:
-        print(f"❌ Ошибка при работе с PostgreSQL: {error}")
-        return None, None
+def create_schema(cursor, rebuild=False):
+    """Создание схемы для аналитической БД университета через версионные миграции
 
-def create_schema(cursor):
-    """Создание схемы для аналитической БД университета в соответствии с требуемой структурой"""
+    Применяются только еще не примененные миграции, существующие таблицы
+    и данные сохраняются. При rebuild=True схема предварительно удаляется
+    целиком и создается заново.
+    """
     try:
-        # Сначала удаляем таблицы, если они существуют
-        tables = [
-            "visits", "schedule", "materials", "students", "lectures", 
-            "groups", "courses", "departments", "specialties", 
-            "institutes", "universities"
-        ]
-        
-        for table in tables:
-            cursor.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
-        
-        print("✅ Старые таблицы удалены (если существовали)")
-        
-        # 1. Создаем таблицу universities (университеты)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS universities (
-            id SERIAL PRIMARY KEY,
-            name VARCHAR(100) NOT NULL
-        )
-        """)
-
-        # 2. Создаем таблицу institutes (институты)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS institutes (
-            id SERIAL PRIMARY KEY,
-            id_univer INTEGER REFERENCES universities(id),
-            name VARCHAR(100) NOT NULL
-        )
-        """)
-
-        # 3. Создаем таблицу departments (кафедры)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS departments (
-            id SERIAL PRIMARY KEY,
-            id_institutes INTEGER REFERENCES institutes(id),
-            name VARCHAR(100) NOT NULL
-        )
-        """)
-
-        # 4. Создаем таблицу specialties (специальности)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS specialties (
-            id SERIAL PRIMARY KEY,
-            name VARCHAR(100) NOT NULL,
-            code VARCHAR(20) NOT NULL
-        )
-        """)
-
-        # 5. Создаем таблицу courses (курсы)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS courses (
-            id SERIAL PRIMARY KEY,
-            id_kafedr_a INTEGER REFERENCES departments(id),
-            id_spec INTEGER REFERENCES specialties(id),
-            name VARCHAR(100) NOT NULL,
-            term DATE
-        )
-        """)
-
-        # 6. Создаем таблицу groups (группы)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS groups (
-            id SERIAL PRIMARY KEY,
-            id_kafedr_a INTEGER REFERENCES departments(id),
-            name VARCHAR(100) NOT NULL,
-            startYear DATE,
-            endYear DATE
-        )
-        """)
+        if rebuild:
+            drop_schema(cursor)
+            print("✅ Старые таблицы удалены (перестроение схемы)")
 
-        # 7. Создаем таблицу students (студенты)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS students (
-            id SERIAL PRIMARY KEY,
-            id_group INTEGER REFERENCES groups(id),
-            fio VARCHAR(100) NOT NULL,
-            date_of_recipient DATE
-        )
-        """)
-
-        # 8. Создаем таблицу lectures (лекции)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS lectures (
-            id SERIAL PRIMARY KEY,
-            id_course INTEGER REFERENCES courses(id),
-            name VARCHAR(100) NOT NULL,
-            requirements BOOLEAN DEFAULT FALSE
-        )
-        """)
-
-        # 9. Создаем таблицу materials (материалы)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS materials (
-            id SERIAL PRIMARY KEY,
-            id_lect INTEGER REFERENCES lectures(id),
-            name VARCHAR(100) NOT NULL,
-            content TEXT
-        )
-        """)
-
-        # 10. Создаем таблицу schedule (расписание)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS schedule (
-            id SERIAL PRIMARY KEY,
-            id_lect INTEGER REFERENCES lectures(id),
-            id_group INTEGER REFERENCES groups(id),
-            startTime TIMESTAMP WITH TIME ZONE,
-            endTime TIMESTAMP WITH TIME ZONE
-        )
-        """)
-
-        # 11. Создаем таблицу visits (посещения)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS visits (
-            id SERIAL PRIMARY KEY,
-            id_student INTEGER REFERENCES students(id),
-            id_rasp INTEGER REFERENCES schedule(id),
-            visitTime TIMESTAMP WITH TIME ZONE
-        )
-        """)
-
-        print("✅ Схема данных успешно создана")
+        applied = migrate(cursor.connection)
+        if applied:
+            print(f"✅ Схема данных обновлена до версии {current_version(cursor)}")
+        else:
+            print(f"✅ Схема данных актуальна (версия {current_version(cursor)})")
         return True
     except (Exception, Error) as error:
         print(f"❌ Ошибка при создании схемы: {error}")
         return False
 
-def add_data(cursor):
-    """Добавление тестовых данных в таблицы"""
-    try:
-        # 1. Добавляем университеты
-        universities = [
-            ('Московский Государственный Университет'),
-            ('Санкт-Петербургский Государственный Университет'),
-            ('Казанский Федеральный Университет')
-        ]
-        
-        for university in universities:
-            cursor.execute(
-                "INSERT INTO universities (name) VALUES (%s) RETURNING id",
-                (university,)
-            )
-            university_id = cursor.fetchone()['id']
-        
-        print(f"✅ Добавлено {len(universities)} университетов")
-        
-        # 2. Добавляем институты
-        institutes = [
-            (1, 'Институт компьютерных наук'),
-            (1, 'Институт математики'),
-            (2, 'Институт информационных технологий'),
-            (3, 'Институт физики')
-        ]
-        
-        for institute in institutes:
-            cursor.execute(
-                "INSERT INTO institutes (id_univer, name) VALUES (%s, %s) RETURNING id",
-                institute
-            )
-            institute_id = cursor.fetchone()['id']
-        
-        print(f"✅ Добавлено {len(institutes)} институтов")
-        
-        # 3. Добавляем кафедры
-        departments = [
-            (1, 'Кафедра программной инженерии'),
-            (1, 'Кафедра баз данных'),
-            (2, 'Кафедра высшей математики'),
-            (3, 'Кафедра искусственного интеллекта'),
-            (4, 'Кафедра теоретической физики')
-        ]
-        
-        for dept in departments:
-            cursor.execute(
-                "INSERT INTO departments (id_institutes, name) VALUES (%s, %s) RETURNING id",
-                dept
-            )
-            dept_id = cursor.fetchone()['id']
-        
-        print(f"✅ Добавлено {len(departments)} кафедр")
-        
-        # 4. Добавляем специальности
-        specialties = [
-            ('Информатика и вычислительная техника', '09.03.01'),
-            ('Программная инженерия', '09.03.04'),
-            ('Прикладная математика', '01.03.04'),
-            ('Информационная безопасность', '10.03.01')
-        ]
-        
-        for spec in specialties:
-            cursor.execute(
-                "INSERT INTO specialties (name, code) VALUES (%s, %s) RETURNING id",
-                spec
-            )
-            spec_id = cursor.fetchone()['id']
-        
-        print(f"✅ Добавлено {len(specialties)} специальностей")
-
-        # 5. Добавляем курсы
-        courses = [
-            (1, 1, 'Введение в программирование', '2023-09-01'),
-            (2, 1, 'Базы данных', '2023-09-01'),
-            (3, 3, 'Математический анализ', '2023-09-01'),
-            (4, 2, 'Машинное обучение', '2023-09-01'),
-            (5, 4, 'Физика', '2023-09-01')
-        ]
-        
-        for course in courses:
-            cursor.execute(
-                "INSERT INTO courses (id_kafedr_a, id_spec, name, term) VALUES (%s, %s, %s, %s) RETURNING id",
-                course
-            )
-            course_id = cursor.fetchone()['id']
-        
-        print(f"✅ Добавлено {len(courses)} курсов")
+def has_data(cursor):
+    """Проверка, загружены ли уже данные в базу"""
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM students)")
+    return cursor.fetchone()[0]
 
-        # 6. Добавляем группы
-        groups = [
-            (1, 'ПИ-101', '2020-09-01', '2024-06-30'),
-            (2, 'БД-102', '2020-09-01', '2024-06-30'),
-            (3, 'МА-201', '2021-09-01', '2025-06-30'),
-            (4, 'ИИ-301', '2022-09-01', '2026-06-30')
-        ]
-        
-        for group in groups:
-            cursor.execute(
-                "INSERT INTO groups (id_kafedr_a, name, startYear, endYear) VALUES (%s, %s, %s, %s) RETURNING id",
-                group
-            )
-            group_id = cursor.fetchone()['id']
-        
-        print(f"✅ Добавлено {len(groups)} групп")
+def add_data(cursor, bulk=True, scale=1.0, seed=42):
+    """Добавление синтетических данных в таблицы
 
-        # 7. Добавляем студентов
-        students = []
-        for i in range(1, 20):  # 20 студентов
-            group_id = random.randint(1, 4)
-            student = (
-                group_id,
-                fake.name(),
-                fake.date_between(start_date='-5y', end_date='today')
-            )
-            students.append(student)
-        
-        for student in students:
-            cursor.execute(
-                """INSERT INTO students (id_group, fio, date_of_recipient) VALUES (%s, %s, %s) RETURNING id""",
-                student
-            )
-            student_id = cursor.fetchone()['id']
-        
-        print(f"✅ Добавлено {len(students)} студентов")
+    Данные строит DataGenerator с коэффициентом масштаба scale и зерном seed.
+    По умолчанию данные загружаются через COPY FROM STDIN одной транзакцией.
+    Построчный INSERT используется как резервный способ, если COPY недоступен
+    или явно запрошен режим bulk=False.
+    """
+    try:
+        generator = DataGenerator(scale=scale, seed=seed)
+        planned = generator.row_counts()
+        print(f"Масштаб данных: {scale} (студентов: {planned['students']}, "
+              f"занятий: {planned['schedule']}, посещений: ~{planned['visits']})")
 
-        # 8. Добавляем лекции
-        lectures = [
-            (1, 'Введение в алгоритмы', True),
-            (1, 'Основы синтаксиса', True),
-            (2, 'Реляционная модель', True),
-            (2, 'SQL и нормализация', True),
-            (3, 'Пределы и производные', True),
-            (4, 'Нейронные сети', False),
-            (5, 'Механика', True)
-        ]
-        
-        for lecture in lectures:
-            cursor.execute(
-                """INSERT INTO lectures (id_course, name, requirements) VALUES (%s, %s, %s) RETURNING id""",
-                lecture
-            )
-            lecture_id = cursor.fetchone()['id']
-        
-        print(f"✅ Добавлено {len(lectures)} лекций")
+        # Секции visits должны существовать до загрузки: создаем недели,
+        # покрывающие все занятия, и несколько будущих недель
+        first_visit, last_visit = generator.visit_time_range()
+        created = ensure_partitions(cursor, first_visit, last_visit)
+        created += ensure_upcoming_weeks(cursor)
+        print(f"✅ Создано {len(created)} недельных секций таблицы visits")
 
-        # 9. Добавляем материалы
-        materials = [
-            (1, 'Слайды по введению в алгоритмы', 'Содержимое слайдов по введению в алгоритмы'),
-            (1, 'Примеры кода', 'Примеры алгоритмов на Python'),
-            (2, 'Основы синтаксиса', 'Базовые конструкции языка'),
-            (3, 'Презентация по БД', 'Основные понятия и определения СУБД'),
-            (5, 'Формулы и теоремы', 'Основные формулы математического анализа')
-        ]
-        
-        for material in materials:
-            cursor.execute(
-                """INSERT INTO materials (id_lect, name, content) VALUES (%s, %s, %s) RETURNING id""",
-                material
-            )
-            material_id = cursor.fetchone()['id']
-        
-        print(f"✅ Добавлено {len(materials)} материалов")
+        if bulk:
+            try:
+                print("Загрузка данных через COPY FROM STDIN...")
+                stats = load_tables(cursor.connection, generator.tables(), bulk=True)
+            except (Exception, Error) as error:
+                print(f"⚠️ Ошибка пакетной загрузки: {error}")
+                print("⚠️ Переключаемся на построчную вставку")
+                bulk = False
 
-        # 10. Добавляем расписание
-        now = datetime.datetime.now()
-        schedules = []
-        for i in range(10):
-            lecture_id = random.randint(1, 7)
-            group_id = random.randint(1, 4)
-            start_time = now + timedelta(days=i, hours=random.randint(9, 16))
-            end_time = start_time + timedelta(hours=1, minutes=30)
-            
-            schedules.append((
-                lecture_id,
-                group_id,
-                start_time,
-                end_time
-            ))
-        
-        for schedule in schedules:
-            cursor.execute(
-                """INSERT INTO schedule (id_lect, id_group, startTime, endTime) VALUES (%s, %s, %s, %s) RETURNING id""",
-                schedule
-            )
-            schedule_id = cursor.fetchone()['id']
-        
-        print(f"✅ Добавлено {len(schedules)} записей расписания")
+        if not bulk:
+            print("Построчная загрузка данных через INSERT...")
+            stats = load_tables(cursor.connection, generator.tables(), bulk=False)
 
-        # 11. Добавляем посещения
-        visits = []
-        for i in range(30):  # 30 записей о посещениях
-            student_id = random.randint(1, len(students))
-            schedule_id = random.randint(1, len(schedules))
-            
-            # Получаем время начала занятия
-            cursor.execute("SELECT startTime FROM schedule WHERE id = %s", (schedule_id,))
-            start_time = cursor.fetchone()['starttime']
-            
-            # Генерируем время визита (либо вовремя, либо с небольшим опозданием)
-            delay = random.randint(0, 15)  # Опоздание от 0 до 15 минут
-            visit_time = start_time + timedelta(minutes=delay)
-            
-            visits.append((
-                student_id,
-                schedule_id,
-                visit_time
-            ))
-        
-        for visit in visits:
-            cursor.execute(
-                """INSERT INTO visits (id_student, id_rasp, visitTime) VALUES (%s, %s, %s)""",
-                visit
-            )
-        
-        print(f"✅ Добавлено {len(visits)} записей о посещениях")
-        
+        total_rows = sum(count for count, _ in stats.values())
+        total_time = sum(elapsed for _, elapsed in stats.values())
+        print(f"✅ Всего загружено {total_rows} строк за {total_time:.2f} с")
         return True
     except (Exception, Error) as error:
         print(f"❌ Ошибка при добавлении данных: {error}")
@@ -433,90 +131,127 @@ def read_sample_data(cursor):
         for student in students:
             print(f"ID: {student['id']}, ФИО: {student['fio']}, Группа: {student['group_name']}, Дата: {student['date_of_recipient']}")
         
-        # 5. Статистика
-        cursor.execute("SELECT COUNT(*) as universities_count FROM universities")
-        universities_count = cursor.fetchone()['universities_count']
-        
-        cursor.execute("SELECT COUNT(*) as institutes_count FROM institutes")
-        institutes_count = cursor.fetchone()['institutes_count']
-        
-        cursor.execute("SELECT COUNT(*) as departments_count FROM departments")
-        departments_count = cursor.fetchone()['departments_count']
-        
-        cursor.execute("SELECT COUNT(*) as specialties_count FROM specialties")
-        specialties_count = cursor.fetchone()['specialties_count']
-        
-        cursor.execute("SELECT COUNT(*) as courses_count FROM courses")
-        courses_count = cursor.fetchone()['courses_count']
-        
-        cursor.execute("SELECT COUNT(*) as groups_count FROM groups")
-        groups_count = cursor.fetchone()['groups_count']
-        
-        cursor.execute("SELECT COUNT(*) as students_count FROM students")
-        students_count = cursor.fetchone()['students_count']
-        
-        cursor.execute("SELECT COUNT(*) as lectures_count FROM lectures")
-        lectures_count = cursor.fetchone()['lectures_count']
-        
-        cursor.execute("SELECT COUNT(*) as materials_count FROM materials")
-        materials_count = cursor.fetchone()['materials_count']
-        
-        cursor.execute("SELECT COUNT(*) as schedule_count FROM schedule")
-        schedule_count = cursor.fetchone()['schedule_count']
-        
-        cursor.execute("SELECT COUNT(*) as visits_count FROM visits")
-        visits_count = cursor.fetchone()['visits_count']
-        
+        # 5. Статистика: количество строк и размер всех таблиц одним запросом.
+        # После загрузки выполнен ANALYZE, поэтому оценки планировщика точны.
+        stats = table_stats(cursor)
+        
+        # 6. Посещаемость за неделю: запрос читает только одну секцию
+        partitions = list_week_partitions(cursor)
+        cursor.execute("SELECT MIN(visitTime) AS first_visit FROM visits")
+        first_visit = cursor.fetchone()['first_visit']
+        if partitions and first_visit:
+            week = week_start(first_visit)
+            visits, visitors = week_attendance(cursor, week)
+            scanned = explain_week_attendance(cursor, week)
+            print(f"\n== Посещаемость за неделю с {week:%Y-%m-%d} ==")
+            print(f"Посещений: {visits}, студентов: {visitors}")
+            print(f"Прочитано секций: {len(scanned)} из {len(partitions)} ({', '.join(scanned)})")
+
+        labels = {
+            "universities": "Университетов",
+            "institutes": "Институтов",
+            "departments": "Кафедр",
+            "specialties": "Специальностей",
+            "courses": "Курсов",
+            "groups": "Групп",
+            "students": "Студентов",
+            "lectures": "Лекций",
+            "materials": "Материалов",
+            "schedule": "Записей расписания",
+            "visits": "Записей посещений"
+        }
         print("\n== Статистика ==")
-        print(f"Университетов: {universities_count}")
-        print(f"Институтов: {institutes_count}")
-        print(f"Кафедр: {departments_count}")
-        print(f"Специальностей: {specialties_count}")
-        print(f"Курсов: {courses_count}")
-        print(f"Групп: {groups_count}")
-        print(f"Студентов: {students_count}")
-        print(f"Лекций: {lectures_count}")
-        print(f"Материалов: {materials_count}")
-        print(f"Записей расписания: {schedule_count}")
-        print(f"Записей посещений: {visits_count}")
+        for table, (rows, size) in stats.items():
+            print(f"{labels.get(table, table)}: {rows} ({format_size(size)})")
         
         return True
     except (Exception, Error) as error:
         print(f"❌ Ошибка при чтении данных: {error}")
         return False
 
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Создание и заполнение PostgreSQL")
+    parser.add_argument(
+        "--row-by-row",
+        action="store_true",
+        help="загружать данные построчным INSERT вместо COPY"
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="коэффициент объема синтетических данных (1.0 - около 5 тыс. студентов)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=42,
+        help="зерно генератора для воспроизводимых данных"
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="удалить схему и данные и загрузить все заново"
+    )
+    parser.add_argument(
+        "--no-indexes",
+        action="store_true",
+        help="не строить индексы по внешним ключам после загрузки"
+    )
+    parser.add_argument(
+        "--index-workers",
+        type=int,
+        default=4,
+        help="количество параллельных соединений для построения индексов"
+    )
+    return parser.parse_args()
+
 def main():
     """Основная функция управления демонстрацией PostgreSQL"""
+    args = parse_args()
     print("\n===== СОЗДАНИЕ И ЗАПОЛНЕНИЕ POSTGRESQL =====")
     
     # Подключаемся к PostgreSQL
     connection, cursor = connect_to_postgresql()
     if not connection or not cursor:
-        return
+        sys.exit(1)
         
     try:
-        # Создаем схему БД
-        success = create_schema(cursor)
+        # Создаем или обновляем схему БД
+        success = create_schema(cursor, rebuild=args.rebuild)
         if not success:
-            return
+            sys.exit(1)
             
-        # Заполняем данными
-        success = add_data(cursor)
-        if not success:
-            return
+        if has_data(cursor):
+            # Повторный запуск на заполненной базе: данные не перезагружаем,
+            # только поддерживаем секции будущих недель
+            created = ensure_upcoming_weeks(cursor)
+            print(f"✅ Данные уже загружены, загрузка пропущена (создано новых секций: {len(created)})")
+            print("⚠️ Для полной перезагрузки данных используйте --rebuild")
+        else:
+            # Заполняем данными
+            success = add_data(cursor, bulk=not args.row_by_row, scale=args.scale, seed=args.seed)
+            if not success:
+                sys.exit(1)
+            cursor.execute("ANALYZE")
+
+        # Индексы строим после загрузки: так быстрее, чем поддерживать их при вставке.
+        # Уже существующие индексы пропускаются.
+        if not args.no_indexes:
+            create_indexes(workers=args.index_workers)
             
         # Читаем данные
         read_sample_data(cursor)
             
     except Exception as e:
         print(f"❌ Неожиданная ошибка: {e}")
+        sys.exit(1)
     finally:
         # Закрываем соединение
-        if cursor:
-            cursor.close()
         if connection:
-            connection.close()
-            print("✅ Соединение с PostgreSQL закрыто")
+            release_postgresql(connection, cursor)
+            print("✅ Соединение с PostgreSQL возвращено в пул")
     
     print("\n===== ОПЕРАЦИИ С POSTGRESQL ЗАВЕРШЕНЫ =====")
     print("\nДля проверки данных в PostgreSQL вы можете использовать:")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from psycopg2 import Error
+
+from postgresql_common import get_pool
+
+# Индексы по внешним ключам и основным путям доступа: (имя, таблица, определение).
+# Самые крупные индексы идут первыми, чтобы параллельные потоки загружались равномерно.
+INDEXES = [
+    ("visits_id_student_idx", "visits", "(id_student, visitTime)"),
+    ("visits_id_rasp_idx", "visits", "(id_rasp)"),
+    ("visits_visittime_brin", "visits", "USING brin (visitTime)"),
+    ("visits_updated_at_idx", "visits", "(updated_at)"),
+    ("schedule_id_group_starttime_idx", "schedule", "(id_group, startTime)"),
+    ("schedule_id_lect_idx", "schedule", "(id_lect)"),
+    ("students_id_group_idx", "students", "(id_group)"),
+    ("materials_id_lect_idx", "materials", "(id_lect)"),
+    ("lectures_id_course_idx", "lectures", "(id_course)"),
+    ("groups_id_kafedr_a_idx", "groups", "(id_kafedr_a)"),
+    ("courses_id_kafedr_a_idx", "courses", "(id_kafedr_a)"),
+    ("courses_id_spec_idx", "courses", "(id_spec)"),
+    ("departments_id_institutes_idx", "departments", "(id_institutes)"),
+    ("institutes_id_univer_idx", "institutes", "(id_univer)"),
+    # Выборка строк, измененных после отметки синхронизации графа (neo4j_sync.py)
+    ("schedule_updated_at_idx", "schedule", "(updated_at)"),
+    ("students_updated_at_idx", "students", "(updated_at)"),
+    ("groups_updated_at_idx", "groups", "(updated_at)"),
+    ("lectures_updated_at_idx", "lectures", "(updated_at)"),
+    ("courses_updated_at_idx", "courses", "(updated_at)")
+]
+
+# Память для сортировки при построении одного индекса
+MAINTENANCE_WORK_MEM = "256MB"
+
+def index_size(cursor, name):
+    """Размер индекса на диске; для индекса секционированной таблицы - сумма по секциям"""
+    cursor.execute("""
+    SELECT GREATEST(
+        pg_relation_size(%s::regclass),
+        (SELECT COALESCE(SUM(pg_relation_size(relid)), 0) FROM pg_partition_tree(%s::regclass))
+    )
+    """, (name, name))
+    return cursor.fetchone()[0]
+
+def format_size(size):
+    """Человекочитаемый размер"""
+    for unit in ("Б", "КБ", "МБ"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГБ"
+
+def build_index(pool, name, table, definition):
+    """Построение одного индекса на отдельном соединении из пула"""
+    with pool.connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SET maintenance_work_mem = '{MAINTENANCE_WORK_MEM}'")
+            try:
+                started = time.perf_counter()
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} {definition}")
+                elapsed = time.perf_counter() - started
+                return name, elapsed, index_size(cursor, name)
+            finally:
+                cursor.execute("RESET maintenance_work_mem")
+
+def create_indexes(workers=4, indexes=INDEXES):
+    """Параллельное построение индексов после загрузки данных
+
+    Каждый поток строит свои индексы на собственном соединении из общего пула.
+    Возвращает словарь {имя индекса: (время построения, размер в байтах)}.
+    """
+    pool = get_pool()
+    print(f"Построение {len(indexes)} индексов в {workers} потоков...")
+    started = time.perf_counter()
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(build_index, pool, name, table, definition): name
+            for name, table, definition in indexes
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                name, elapsed, size = future.result()
+                results[name] = (elapsed, size)
+                print(f"✅ {name}: {elapsed:.2f} с, {format_size(size)}")
+            except (Exception, Error) as error:
+                print(f"❌ Ошибка при построении индекса {name}: {error}")
+
+    total_size = sum(size for _, size in results.values())
+    print(f"✅ Построено {len(results)} индексов за {time.perf_counter() - started:.2f} с, "
+          f"общий размер {format_size(total_size)}")
+    return results
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import time
+
+from psycopg2 import Error
+
+from postgresql_common import connect_to_postgresql, release_postgresql, SCHEMA_TABLES, SYNC_RESETS_TABLE
+from postgresql_partitions import drop_all_partitions, ensure_partitions, DEFAULT_PARTITION
+
+# Таблица с номерами примененных миграций
+MIGRATIONS_TABLE = "schema_migrations"
+
+# Ключ рекомендательной блокировки: не дает двум процессам применять миграции одновременно
+MIGRATIONS_LOCK_KEY = 20240901
+
+# Таблицы, изменения которых отслеживаются для синхронизации графа Neo4j
+SYNC_TABLES = ["departments", "specialties", "courses", "lectures", "groups", "students", "schedule", "visits"]
+
+# Журнал удаленных строк отслеживаемых таблиц
+DELETIONS_TABLE = "sync_deletions"
+
+# Журнал прежних значений посещений: удаленные посещения, посещения с измененными
+# студентом или занятием и посещения занятий, у которых сменилась лекция
+VISIT_CHANGES_TABLE = "sync_visit_changes"
+
+# visits (посещения), секционированная по неделям visitTime.
+# Ключ секционирования обязан входить в первичный ключ.
+VISITS_TABLE = """
+CREATE TABLE IF NOT EXISTS visits (
+    id SERIAL,
+    id_student INTEGER REFERENCES students(id),
+    id_rasp INTEGER REFERENCES schedule(id),
+    visitTime TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (id, visitTime)
+) PARTITION BY RANGE (visitTime)
+"""
+
+# Таблица visits до секционирования (схема, созданная до появления миграций)
+LEGACY_VISITS_TABLE = "visits_legacy"
+
+def partition_legacy_visits(cursor):
+    """Преобразование обычной таблицы visits в секционированную
+
+    Схема, созданная до появления миграций, содержит visits как обычную
+    таблицу, и CREATE TABLE IF NOT EXISTS ее не меняет. Старая таблица
+    переименовывается, создается секционированная visits с секциями на весь
+    диапазон visitTime, строки переносятся, старая таблица удаляется.
+    Счетчик id сохраняется. Выполняется в транзакции миграции.
+    """
+    cursor.execute("""
+    SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('visits'))
+    """)
+    if cursor.fetchone()[0]:
+        return
+
+    cursor.execute("SELECT COUNT(*) FROM visits WHERE visitTime IS NULL")
+    without_time = cursor.fetchone()[0]
+    if without_time:
+        raise Error(f"В таблице visits {without_time} строк без visitTime: их нельзя разместить "
+                    f"в недельных секциях. Заполните visitTime или перестройте схему с --rebuild")
+
+    print("⚠️ Таблица visits не секционирована: выполняется преобразование")
+    cursor.execute(f"ALTER TABLE visits RENAME TO {LEGACY_VISITS_TABLE}")
+    # Освобождаем имена, которые займет новая таблица
+    cursor.execute(f"ALTER INDEX IF EXISTS visits_pkey RENAME TO {LEGACY_VISITS_TABLE}_pkey")
+    cursor.execute(f"ALTER SEQUENCE IF EXISTS visits_id_seq RENAME TO {LEGACY_VISITS_TABLE}_id_seq")
+    cursor.execute(VISITS_TABLE)
+
+    cursor.execute(f"SELECT MIN(visitTime), MAX(visitTime), MAX(id) FROM {LEGACY_VISITS_TABLE}")
+    first_visit, last_visit, last_id = cursor.fetchone()
+    if first_visit:
+        created = ensure_partitions(cursor, first_visit, last_visit)
+        print(f"✅ Создано секций visits: {len(created)}")
+    cursor.execute(f"""
+    INSERT INTO visits (id, id_student, id_rasp, visitTime)
+    SELECT id, id_student, id_rasp, visitTime FROM {LEGACY_VISITS_TABLE}
+    """)
+    print(f"✅ Перенесено посещений: {cursor.rowcount}")
+    if last_id:
+        cursor.execute("SELECT setval(pg_get_serial_sequence('visits', 'id'), %s)", (last_id,))
+    cursor.execute(f"DROP TABLE {LEGACY_VISITS_TABLE}")
+
+# Миграции схемы: (версия, описание, список шагов). Шаг - SQL-команда
+# или функция, которой передается курсор (для преобразований с логикой).
+# Примененная миграция никогда не меняется - изменения схемы добавляются
+# новой миграцией со следующим номером.
+MIGRATIONS = [
+    (1, "Начальная схема университета", [
+        # universities (университеты)
+        """
+        CREATE TABLE IF NOT EXISTS universities (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(100) NOT NULL
+        )
+        """,
+        # institutes (институты)
+        """
+        CREATE TABLE IF NOT EXISTS institutes (
+            id SERIAL PRIMARY KEY,
+            id_univer INTEGER REFERENCES universities(id),
+            name VARCHAR(100) NOT NULL
+        )
+        """,
+        # departments (кафедры)
+        """
+        CREATE TABLE IF NOT EXISTS departments (
+            id SERIAL PRIMARY KEY,
+            id_institutes INTEGER REFERENCES institutes(id),
+            name VARCHAR(100) NOT NULL
+        )
+        """,
+        # specialties (специальности)
+        """
+        CREATE TABLE IF NOT EXISTS specialties (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            code VARCHAR(20) NOT NULL
+        )
+        """,
+        # courses (курсы)
+        """
+        CREATE TABLE IF NOT EXISTS courses (
+            id SERIAL PRIMARY KEY,
+            id_kafedr_a INTEGER REFERENCES departments(id),
+            id_spec INTEGER REFERENCES specialties(id),
+            name VARCHAR(100) NOT NULL,
+            term DATE
+        )
+        """,
+        # groups (группы)
+        """
+        CREATE TABLE IF NOT EXISTS groups (
+            id SERIAL PRIMARY KEY,
+            id_kafedr_a INTEGER REFERENCES departments(id),
+            name VARCHAR(100) NOT NULL,
+            startYear DATE,
+            endYear DATE
+        )
+        """,
+        # students (студенты)
+        """
+        CREATE TABLE IF NOT EXISTS students (
+            id SERIAL PRIMARY KEY,
+            id_group INTEGER REFERENCES groups(id),
+            fio VARCHAR(100) NOT NULL,
+            date_of_recipient DATE
+        )
+        """,
+        # lectures (лекции)
+        """
+        CREATE TABLE IF NOT EXISTS lectures (
+            id SERIAL PRIMARY KEY,
+            id_course INTEGER REFERENCES courses(id),
+            name VARCHAR(100) NOT NULL,
+            requirements BOOLEAN DEFAULT FALSE
+        )
+        """,
+        # materials (материалы)
+        """
+        CREATE TABLE IF NOT EXISTS materials (
+            id SERIAL PRIMARY KEY,
+            id_lect INTEGER REFERENCES lectures(id),
+            name VARCHAR(100) NOT NULL,
+            content TEXT
+        )
+        """,
+        # schedule (расписание)
+        """
+        CREATE TABLE IF NOT EXISTS schedule (
+            id SERIAL PRIMARY KEY,
+            id_lect INTEGER REFERENCES lectures(id),
+            id_group INTEGER REFERENCES groups(id),
+            startTime TIMESTAMP WITH TIME ZONE,
+            endTime TIMESTAMP WITH TIME ZONE
+        )
+        """,
+        # visits (посещения), секционированная по неделям visitTime
+        VISITS_TABLE,
+        # Схема до миграций: обычная visits преобразуется в секционированную
+        partition_legacy_visits
+    ]),
+    (2, "Отметки изменений для инкрементальной синхронизации", [
+        # Время последнего изменения строки: выставляется при вставке (DEFAULT)
+        # и при обновлении (триггер). now() не изменчива внутри транзакции,
+        # поэтому ADD COLUMN не переписывает таблицы.
+        *[
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at "
+            f"TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()"
+            for table in SYNC_TABLES
+        ],
+        """
+        CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := now();
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        *[
+            f"CREATE OR REPLACE TRIGGER {table}_updated_at BEFORE UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+            for table in SYNC_TABLES
+        ],
+        # Удаленные строки (надгробия): по ним синхронизация удаляет узлы и связи.
+        # Имя таблицы передается аргументом триггера: для секций visits
+        # TG_TABLE_NAME вернул бы имя секции.
+        f"""
+        CREATE TABLE IF NOT EXISTS {DELETIONS_TABLE} (
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            old_row JSONB NOT NULL,
+            deleted_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        )
+        """,
+        f"CREATE INDEX IF NOT EXISTS {DELETIONS_TABLE}_deleted_at_idx ON {DELETIONS_TABLE} (deleted_at)",
+        f"""
+        CREATE OR REPLACE FUNCTION record_deletion() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO {DELETIONS_TABLE} (table_name, row_id, old_row)
+            VALUES (TG_ARGV[0], OLD.id, to_jsonb(OLD));
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        *[
+            f"CREATE OR REPLACE TRIGGER {table}_record_deletion AFTER DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION record_deletion('{table}')"
+            for table in SYNC_TABLES
+        ]
+    ]),
+    (3, "Журнал прежних пар студент-занятие-лекция для синхронизации посещений", [
+        # Синхронизации нужны только студент, занятие и лекция прежней строки:
+        # они хранятся в типизированных колонках вместо JSONB-копии строки
+        f"""
+        CREATE TABLE IF NOT EXISTS {VISIT_CHANGES_TABLE} (
+            row_id INTEGER NOT NULL,
+            id_student INTEGER,
+            id_rasp INTEGER,
+            id_lect INTEGER,
+            changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        )
+        """,
+        f"CREATE INDEX IF NOT EXISTS {VISIT_CHANGES_TABLE}_changed_at_idx ON {VISIT_CHANGES_TABLE} (changed_at)",
+        # Надгробия посещений, еще не учтенные синхронизацией, переносятся в новый журнал
+        f"""
+        INSERT INTO {VISIT_CHANGES_TABLE} (row_id, id_student, id_rasp, id_lect, changed_at)
+        SELECT d.row_id, (d.old_row->>'id_student')::int, (d.old_row->>'id_rasp')::int, s.id_lect, d.deleted_at
+        FROM {DELETIONS_TABLE} d
+        LEFT JOIN schedule s ON s.id = (d.old_row->>'id_rasp')::int
+        WHERE d.table_name = 'visits'
+        """,
+        f"DELETE FROM {DELETIONS_TABLE} WHERE table_name = 'visits'",
+        "DROP TRIGGER IF EXISTS visits_record_deletion ON visits",
+        # Триггеры уровня оператора с переходными таблицами: одна вставка
+        # в журнал на оператор, без построчного вызова функции
+        f"""
+        CREATE OR REPLACE FUNCTION record_visit_deletions() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO {VISIT_CHANGES_TABLE} (row_id, id_student, id_rasp, id_lect)
+            SELECT o.id, o.id_student, o.id_rasp, s.id_lect
+            FROM old_rows o LEFT JOIN schedule s ON s.id = o.id_rasp;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        # При обновлении в журнал попадают только посещения со сменой студента или занятия
+        f"""
+        CREATE OR REPLACE FUNCTION record_visit_moves() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO {VISIT_CHANGES_TABLE} (row_id, id_student, id_rasp, id_lect)
+            SELECT o.id, o.id_student, o.id_rasp, s.id_lect
+            FROM old_rows o LEFT JOIN schedule s ON s.id = o.id_rasp
+            WHERE NOT EXISTS (
+                SELECT 1 FROM new_rows n
+                WHERE n.id = o.id
+                  AND n.id_student IS NOT DISTINCT FROM o.id_student
+                  AND n.id_rasp IS NOT DISTINCT FROM o.id_rasp
+            );
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        # Смена лекции занятия: прежние пары всех посетивших его студентов
+        f"""
+        CREATE OR REPLACE FUNCTION record_lecture_moves() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO {VISIT_CHANGES_TABLE} (row_id, id_student, id_rasp, id_lect)
+            SELECT v.id, v.id_student, v.id_rasp, o.id_lect
+            FROM old_rows o
+            JOIN new_rows n ON n.id = o.id
+            JOIN visits v ON v.id_rasp = o.id
+            WHERE n.id_lect IS DISTINCT FROM o.id_lect;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE TRIGGER visits_record_deletions AFTER DELETE ON visits
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION record_visit_deletions()
+        """,
+        """
+        CREATE OR REPLACE TRIGGER visits_record_moves AFTER UPDATE ON visits
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION record_visit_moves()
+        """,
+        """
+        CREATE OR REPLACE TRIGGER schedule_record_lecture_moves AFTER UPDATE ON schedule
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION record_lecture_moves()
+        """
+    ]),
+    (4, "Отметки сброса данных для принудительной полной синхронизации", [
+        # Строчные триггеры не срабатывают на TRUNCATE, а удаление секций visits
+        # вообще не вызывает триггеров: такие изменения отмечаются здесь
+        # (TRUNCATE - триггером, секции - postgresql_partitions.py), и следующая
+        # синхронизация графа выполняется полностью
+        f"""
+        CREATE TABLE IF NOT EXISTS {SYNC_RESETS_TABLE} (
+            id SERIAL PRIMARY KEY,
+            source TEXT NOT NULL,
+            reset_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        )
+        """,
+        f"""
+        CREATE OR REPLACE FUNCTION record_truncate() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO {SYNC_RESETS_TABLE} (source) VALUES (TG_ARGV[0]);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        *[
+            f"CREATE OR REPLACE TRIGGER {table}_record_truncate AFTER TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION record_truncate('{table}')"
+            for table in SYNC_TABLES
+        ],
+        # Схема создана заново (или журналы только что появились): граф,
+        # синхронизированный раньше, нельзя обновлять по изменениям
+        f"INSERT INTO {SYNC_RESETS_TABLE} (source) VALUES ('schema')"
+    ]),
+    (5, "Секция посещений по умолчанию", [
+        # Недельные секции есть только для загруженных данных и ближайших недель;
+        # посещения других недель попадают в visits_default, а не завершаются
+        # ошибкой "no partition of relation visits found for row". При создании
+        # недельной секции ее строки переносятся из visits_default.
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF visits DEFAULT"
+    ])
+]
+
+# Журналы синхронизации и функции их триггеров (удаляются вместе со схемой)
+SYNC_JOURNAL_TABLES = [DELETIONS_TABLE, VISIT_CHANGES_TABLE, SYNC_RESETS_TABLE]
+SYNC_TRIGGER_FUNCTIONS = ["set_updated_at()", "record_deletion()", "record_visit_deletions()",
+                          "record_visit_moves()", "record_lecture_moves()", "record_truncate()"]
+
+def ensure_migrations_table(cursor):
+    """Создание таблицы учета миграций (если ее еще нет)"""
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+    )
+    """)
+
+def applied_versions(cursor):
+    """Номера уже примененных миграций"""
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (MIGRATIONS_TABLE,))
+    if not cursor.fetchone()[0]:
+        return set()
+    cursor.execute(f"SELECT version FROM {MIGRATIONS_TABLE}")
+    return {row[0] for row in cursor.fetchall()}
+
+def current_version(cursor):
+    """Текущая версия схемы (0 - схема не создана)"""
+    return max(applied_versions(cursor), default=0)
+
+def migrate(connection, migrations=MIGRATIONS):
+    """Применение недостающих миграций
+
+    Каждая миграция выполняется в отдельной транзакции вместе с записью
+    о ней в schema_migrations, поэтому прерванная миграция не оставляет
+    схему в промежуточном состоянии. Уже примененные миграции пропускаются,
+    так что повторный запуск на актуальной схеме ничего не меняет.
+    Возвращает список примененных версий.
+    """
+    autocommit = connection.autocommit
+    connection.autocommit = False
+    applied = []
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATIONS_LOCK_KEY,))
+            try:
+                ensure_migrations_table(cursor)
+                connection.commit()
+                done = applied_versions(cursor)
+
+                for version, description, statements in sorted(migrations, key=lambda m: m[0]):
+                    if version in done:
+                        continue
+                    started = time.perf_counter()
+                    try:
+                        for statement in statements:
+                            if callable(statement):
+                                statement(cursor)
+                            else:
+                                cursor.execute(statement)
+                        cursor.execute(
+                            f"INSERT INTO {MIGRATIONS_TABLE} (version, description) VALUES (%s, %s)",
+                            (version, description)
+                        )
+                        connection.commit()
+                    except Exception:
+                        connection.rollback()
+                        raise
+                    applied.append(version)
+                    print(f"✅ Миграция {version} ({description}) применена "
+                          f"за {time.perf_counter() - started:.2f} с")
+            finally:
+                connection.rollback()
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATIONS_LOCK_KEY,))
+                connection.commit()
+    finally:
+        connection.autocommit = autocommit
+
+    return applied
+
+def drop_schema(cursor):
+    """Полное удаление схемы вместе с историей миграций (для перестроения с нуля)"""
+    drop_all_partitions(cursor)
+    for table in reversed(SCHEMA_TABLES):
+        cursor.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
+    for table in SYNC_JOURNAL_TABLES:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    cursor.execute(f"DROP FUNCTION IF EXISTS {', '.join(SYNC_TRIGGER_FUNCTIONS)}")
+    cursor.execute(f"DROP TABLE IF EXISTS {MIGRATIONS_TABLE}")
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Миграции схемы PostgreSQL")
+    parser.add_argument("--status", action="store_true",
+                        help="только показать примененные и ожидающие миграции")
+    return parser.parse_args()
+
+def main():
+    """Применение миграций и вывод состояния схемы"""
+    args = parse_args()
+    print("\n===== МИГРАЦИИ POSTGRESQL =====")
+
+    connection, cursor = connect_to_postgresql()
+    if not connection or not cursor:
+        return
+
+    try:
+        if not args.status:
+            applied = migrate(connection)
+            print(f"✅ Применено миграций: {len(applied)}")
+
+        done = applied_versions(cursor)
+        print(f"\n== Версия схемы: {max(done, default=0)} ==")
+        for version, description, _ in MIGRATIONS:
+            status = "применена" if version in done else "ожидает"
+            print(f"  - {version}: {description} ({status})")
+    except (Exception, Error) as error:
+        print(f"❌ Ошибка при применении миграций: {error}")
+    finally:
+        release_postgresql(connection, cursor)
+        print("✅ Соединение с PostgreSQL возвращено в пул")
+
+if __name__ == "__main__":
+    main()
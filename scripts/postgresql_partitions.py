@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import datetime
+import re
+from datetime import timedelta
+
+from psycopg2 import Error
+
+from postgresql_common import connect_to_postgresql, release_postgresql, record_sync_reset
+
+# Родительская секционированная таблица и шаблон имен недельных секций
+PARENT_TABLE = "visits"
+PARTITION_PREFIX = "visits_week_"
+PARTITION_PATTERN = r"^visits_week_\d{8}$"
+# Секция по умолчанию: посещения недель, для которых нет недельной секции
+# (между загруженными данными и текущей неделей, в прошлом, в далеком будущем)
+DEFAULT_PARTITION = "visits_default"
+
+def week_start(moment):
+    """Начало недели (понедельник, 00:00 UTC), в которую попадает момент времени"""
+    if isinstance(moment, datetime.datetime):
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(datetime.timezone.utc)
+        moment = moment.date()
+    monday = moment - timedelta(days=moment.weekday())
+    return datetime.datetime(monday.year, monday.month, monday.day, tzinfo=datetime.timezone.utc)
+
+def partition_name(week):
+    """Имя секции для недели, начинающейся с week"""
+    return f"{PARTITION_PREFIX}{week_start(week):%Y%m%d}"
+
+def week_from_name(name):
+    """Начало недели по имени секции"""
+    moment = datetime.datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d")
+    return moment.replace(tzinfo=datetime.timezone.utc)
+
+def week_bounds(week):
+    """Границы недели [начало, конец)"""
+    start = week_start(week)
+    return start, start + timedelta(weeks=1)
+
+def list_week_partitions(cursor):
+    """Список недельных секций: {имя: подключена ли секция к visits}"""
+    cursor.execute("""
+    SELECT c.relname,
+           EXISTS (
+               SELECT 1 FROM pg_inherits i
+               WHERE i.inhrelid = c.oid AND i.inhparent = to_regclass(%s)
+           ) AS attached
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = current_schema()
+      AND c.relkind = 'r'
+      AND c.relname ~ %s
+    ORDER BY c.relname
+    """, (PARENT_TABLE, PARTITION_PATTERN))
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+def create_week_partition(cursor, week):
+    """Создание секции visits для одной недели (если ее еще нет)
+
+    Если посещения недели уже попали в секцию по умолчанию, они переносятся
+    в новую секцию: PostgreSQL не создаст секцию, пока ее строки лежат в visits_default.
+    """
+    start, end = week_bounds(week)
+    name = partition_name(start)
+    cursor.execute(f"""
+    SELECT to_regclass(%s) IS NULL AND to_regclass(%s) IS NOT NULL
+       AND EXISTS (SELECT 1 FROM {PARENT_TABLE} WHERE visitTime >= %s AND visitTime < %s)
+    """, (name, DEFAULT_PARTITION, start, end))
+    if cursor.fetchone()[0]:
+        move_default_rows(cursor, name, start, end)
+    else:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} FOR VALUES FROM (%s) TO (%s)",
+            (start, end)
+        )
+    return name
+
+def move_default_rows(cursor, name, start, end):
+    """Перенос посещений недели [start, end) из секции по умолчанию в новую секцию name
+
+    Новая таблица заполняется до подключения к visits, поэтому перенос не
+    попадает в журналы синхронизации (id и пары студент-занятие не меняются).
+    Все шаги выполняются в одной транзакции.
+    """
+    connection = cursor.connection
+    autocommit = connection.autocommit
+    if autocommit:
+        connection.autocommit = False
+    try:
+        cursor.execute(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)")
+        cursor.execute(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE visitTime >= %s AND visitTime < %s RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """, (start, end))
+        cursor.execute(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+            (start, end)
+        )
+        if autocommit:
+            connection.commit()
+    except Exception:
+        if autocommit:
+            connection.rollback()
+        raise
+    finally:
+        if autocommit:
+            connection.autocommit = True
+
+def ensure_partitions(cursor, start, end):
+    """Создание секций для всех недель в интервале [start, end]"""
+    existing = list_week_partitions(cursor)
+    created = []
+    week = week_start(start)
+    while week <= end:
+        name = partition_name(week)
+        if name not in existing:
+            create_week_partition(cursor, week)
+            created.append(name)
+        week += timedelta(weeks=1)
+    return created
+
+def ensure_upcoming_weeks(cursor, weeks_ahead=4, now=None):
+    """Заблаговременное создание секций на текущую и weeks_ahead следующих недель"""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    current = week_start(now)
+    return ensure_partitions(cursor, current, current + timedelta(weeks=weeks_ahead))
+
+def attach_week_partition(cursor, week):
+    """Подключение ранее отключенной секции обратно к visits"""
+    start, end = week_bounds(week)
+    name = partition_name(start)
+    cursor.execute(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+        (start, end)
+    )
+    record_sync_reset(cursor, name)
+    return name
+
+def detach_weeks_before(cursor, before):
+    """Отключение секций недель, закончившихся до before (данные сохраняются в отдельных таблицах)"""
+    limit = week_start(before)
+    detached = []
+    for name, attached in list_week_partitions(cursor).items():
+        if attached and week_from_name(name) < limit:
+            cursor.execute(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}")
+            detached.append(name)
+    if detached:
+        record_sync_reset(cursor, PARENT_TABLE)
+    return detached
+
+def drop_weeks_before(cursor, before):
+    """Мгновенное удаление посещений за недели до before удалением целых секций"""
+    limit = week_start(before)
+    dropped = []
+    for name in list_week_partitions(cursor):
+        if week_from_name(name) < limit:
+            cursor.execute(f"DROP TABLE IF EXISTS {name}")
+            dropped.append(name)
+    if dropped:
+        record_sync_reset(cursor, PARENT_TABLE)
+    return dropped
+
+def drop_all_partitions(cursor):
+    """Удаление всех недельных секций (подключенных и отключенных)"""
+    names = list(list_week_partitions(cursor))
+    for name in names:
+        cursor.execute(f"DROP TABLE IF EXISTS {name}")
+    if names:
+        record_sync_reset(cursor, PARENT_TABLE)
+    return names
+
+def week_attendance(cursor, week):
+    """Посещаемость за неделю; условие по visitTime позволяет отсечь все секции, кроме одной"""
+    start, end = week_bounds(week)
+    cursor.execute("""
+    SELECT COUNT(*) AS visits, COUNT(DISTINCT id_student) AS students
+    FROM visits
+    WHERE visitTime >= %s AND visitTime < %s
+    """, (start, end))
+    row = cursor.fetchone()
+    return row[0], row[1]
+
+def explain_week_attendance(cursor, week):
+    """Список секций, которые реально читает запрос посещаемости за неделю"""
+    start, end = week_bounds(week)
+    cursor.execute("""
+    EXPLAIN SELECT COUNT(*) FROM visits
+    WHERE visitTime >= %s AND visitTime < %s
+    """, (start, end))
+    plan = [row[0] for row in cursor.fetchall()]
+    return sorted({
+        word for line in plan for word in line.split()
+        if re.match(PARTITION_PATTERN, word)
+    })
+
+def parse_date(value):
+    """Разбор даты из аргумента командной строки"""
+    return datetime.datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc)
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Управление недельными секциями таблицы visits")
+    parser.add_argument("--weeks-ahead", type=int, default=4,
+                        help="на сколько недель вперед создавать секции")
+    parser.add_argument("--detach-before", type=parse_date, metavar="YYYY-MM-DD",
+                        help="отключить секции недель до указанной даты")
+    parser.add_argument("--drop-before", type=parse_date, metavar="YYYY-MM-DD",
+                        help="удалить секции недель до указанной даты")
+    parser.add_argument("--attach", type=parse_date, metavar="YYYY-MM-DD",
+                        help="подключить обратно секцию недели, содержащей дату")
+    return parser.parse_args()
+
+def main():
+    """Обслуживание секций: создание будущих недель, отключение и удаление старых"""
+    args = parse_args()
+    print("\n===== ОБСЛУЖИВАНИЕ СЕКЦИЙ VISITS =====")
+
+    connection, cursor = connect_to_postgresql()
+    if not connection or not cursor:
+        return
+
+    try:
+        created = ensure_upcoming_weeks(cursor, args.weeks_ahead)
+        print(f"✅ Создано новых секций: {len(created)}")
+
+        if args.attach:
+            print(f"✅ Подключена секция {attach_week_partition(cursor, args.attach)}")
+        if args.detach_before:
+            detached = detach_weeks_before(cursor, args.detach_before)
+            print(f"✅ Отключено секций: {len(detached)}")
+        if args.drop_before:
+            dropped = drop_weeks_before(cursor, args.drop_before)
+            print(f"✅ Удалено секций: {len(dropped)}")
+
+        partitions = list_week_partitions(cursor)
+        print(f"\n== Секции visits ({len(partitions)}) ==")
+        for name, attached in partitions.items():
+            status = "подключена" if attached else "отключена"
+            print(f"  - {name}: {status}")
+    except (Exception, Error) as error:
+        print(f"❌ Ошибка при обслуживании секций: {error}")
+    finally:
+        release_postgresql(connection, cursor)
+        print("✅ Соединение с PostgreSQL возвращено в пул")
+
+if __name__ == "__main__":
+    main()
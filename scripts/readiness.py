@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Клиентские библиотеки и параметры подключения (*_common.py, окружение и .env)
+# импортируются внутри проверок: модуль используется в setup.py еще до установки
+# зависимостей, а каждому этапу нужна только своя.
+
+# Таймаут одной попытки проверки в секундах
+PROBE_TIMEOUT = 2
+
+# Паузы между попытками: начальная и максимальная (пауза удваивается)
+INITIAL_DELAY = 0.2
+MAX_DELAY = 5
+
+class NotRetryableError(Exception):
+    """Ошибка, которую повторные попытки не исправят (например, неверный пароль)"""
+
+def probe_redis():
+    """Redis принимает команды: PING"""
+    import redis
+    from redis.backoff import NoBackoff
+    from redis.retry import Retry
+    from redis_common import REDIS_SETTINGS
+    # Повторы выполняет сам цикл ожидания, встроенные повторы клиента отключены
+    client = redis.Redis(**REDIS_SETTINGS, retry=Retry(NoBackoff(), 0),
+                         socket_connect_timeout=PROBE_TIMEOUT, socket_timeout=PROBE_TIMEOUT)
+    try:
+        client.ping()
+    except redis.AuthenticationError as e:
+        raise NotRetryableError(f"ошибка аутентификации: {e}") from e
+    finally:
+        client.close()
+
+def probe_mongodb():
+    """MongoDB принимает команды: ping"""
+    import pymongo
+    from mongodb_common import MONGO_URI
+    client = pymongo.MongoClient(MONGO_URI, serverSelectionTimeoutMS=PROBE_TIMEOUT * 1000)
+    try:
+        client.admin.command("ping")
+    finally:
+        client.close()
+
+def probe_neo4j():
+    """Neo4j выполняет запросы: RETURN 1 (прямое bolt-соединение, без таблицы маршрутизации)"""
+    from neo4j import GraphDatabase
+    from neo4j.exceptions import AuthError
+    from neo4j_common import NEO4J_SETTINGS
+    uri = NEO4J_SETTINGS["uri"]
+    if uri.startswith("neo4j"):
+        uri = "bolt" + uri[len("neo4j"):]
+    driver = GraphDatabase.driver(uri, auth=(NEO4J_SETTINGS["user"], NEO4J_SETTINGS["password"]),
+                                  connection_timeout=PROBE_TIMEOUT)
+    try:
+        with driver.session() as session:
+            session.run("RETURN 1").consume()
+    except AuthError as e:
+        raise NotRetryableError(f"ошибка аутентификации: {e}") from e
+    finally:
+        driver.close()
+
+def probe_elasticsearch():
+    """Кластер Elasticsearch в состоянии не хуже yellow"""
+    from elasticsearch import Elasticsearch
+    from elasticsearch_common import ELASTICSEARCH_URL
+    client = Elasticsearch(ELASTICSEARCH_URL, request_timeout=PROBE_TIMEOUT)
+    try:
+        health = client.cluster.health(wait_for_status="yellow", timeout=f"{PROBE_TIMEOUT}s")
+        if health["status"] not in ("yellow", "green"):
+            raise RuntimeError(f"состояние кластера {health['status']}")
+    finally:
+        client.close()
+
+def probe_postgresql():
+    """PostgreSQL выполняет запросы: SELECT 1"""
+    import psycopg2
+    from postgresql_common import POSTGRES_SETTINGS
+    try:
+        connection = psycopg2.connect(connect_timeout=PROBE_TIMEOUT, **POSTGRES_SETTINGS)
+    except psycopg2.OperationalError as e:
+        if "authentication failed" in str(e):
+            raise NotRetryableError(f"ошибка аутентификации: {e}") from e
+        raise
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    finally:
+        connection.close()
+
+# Сервисы: имя -> (название, проверка, предельное время ожидания в секундах).
+# Elasticsearch и Neo4j при холодном старте поднимаются заметно дольше остальных.
+SERVICES = {
+    "postgresql": ("PostgreSQL", probe_postgresql, 60),
+    "redis": ("Redis", probe_redis, 30),
+    "mongodb": ("MongoDB", probe_mongodb, 60),
+    "neo4j": ("Neo4j", probe_neo4j, 180),
+    "elasticsearch": ("Elasticsearch", probe_elasticsearch, 180)
+}
+
+def wait_for_service(name, deadline=None):
+    """Ожидание готовности одного сервиса с нарастающей паузой между попытками
+
+    NotRetryableError (неверные учетные данные) прекращает ожидание сразу.
+    Возвращает кортеж (готов ли сервис, время ожидания, число попыток,
+    последняя ошибка).
+    """
+    _, probe, default_deadline = SERVICES[name]
+    deadline = default_deadline if deadline is None else deadline
+    started = time.monotonic()
+    delay = INITIAL_DELAY
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            probe()
+            return True, time.monotonic() - started, attempts, None
+        except NotRetryableError as e:
+            return False, time.monotonic() - started, attempts, e
+        except Exception as e:
+            error = e
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            return False, time.monotonic() - started, attempts, error
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, MAX_DELAY)
+
+def wait_for_services(names=None, deadlines=None):
+    """Параллельное ожидание готовности сервисов
+
+    Все сервисы проверяются одновременно, поэтому общее время ожидания
+    определяется самым медленным из них. deadlines - необязательный
+    словарь {сервис: предельное время} для переопределения значений
+    по умолчанию. Возвращает словарь {сервис: готов ли}.
+    """
+    names = list(SERVICES) if names is None else list(names)
+    deadlines = deadlines or {}
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=len(names) or 1) as executor:
+        futures = {
+            executor.submit(wait_for_service, name, deadlines.get(name)): name
+            for name in names
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            title = SERVICES[name][0]
+            ready, elapsed, attempts, error = future.result()
+            results[name] = ready
+            if ready:
+                print(f"✅ {title} готов за {elapsed:.1f} с (попыток: {attempts})")
+            else:
+                print(f"❌ {title} не готов за {elapsed:.1f} с (попыток: {attempts}): {error}")
+
+    return results
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Ожидание готовности хранилищ данных")
+    parser.add_argument("services", nargs="*", metavar="service",
+                        help=f"сервисы для проверки ({', '.join(SERVICES)}); по умолчанию - все")
+    parser.add_argument("--timeout", type=float,
+                        help="общее предельное время ожидания для всех сервисов, с")
+    args = parser.parse_args()
+    unknown = [name for name in args.services if name not in SERVICES]
+    if unknown:
+        parser.error(f"неизвестные сервисы: {', '.join(unknown)}")
+    return args
+
+def main():
+    """Проверка готовности сервисов; код возврата 1, если какой-то не готов"""
+    args = parse_args()
+    names = args.services or list(SERVICES)
+    deadlines = {name: args.timeout for name in names} if args.timeout is not None else None
+
+    print("\n===== ПРОВЕРКА ГОТОВНОСТИ СЕРВИСОВ =====")
+    results = wait_for_services(names, deadlines)
+    if not all(results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import collections
+import os
+import statistics
+import time
+import uuid
+
+from psycopg2.extras import DictCursor
+
+from redis_common import (connect_to_redis, raw_client, read_students, write_students, write_not_found,
+                          student_format, student_record, org_entries, OrgCache, PipelineWriter,
+                          FORMAT_KEY, STUDENT_FORMAT, STUDENT_QUERY, STUDENT_TTL)
+from postgresql_common import get_pool
+
+# Сколько секунд ждать загрузки студента другим процессом, прежде чем читать PostgreSQL самому
+LOCK_TIMEOUT = float(os.getenv("REDIS_LOCK_TIMEOUT", "2.0"))
+# Сколько секунд помнить, что студента нет в PostgreSQL (повторные запросы не идут в базу)
+NOT_FOUND_TTL = float(os.getenv("REDIS_NOT_FOUND_TTL", "30"))
+# Пауза между проверками, появилась ли запись, загружаемая другим процессом
+WAIT_INTERVAL = 0.02
+# Сколько последних замеров времени хранить для перцентилей
+LATENCY_WINDOW = 10000
+
+LOCK_PREFIX = "lock:student:"
+
+# Снятие блокировок, которые все еще принадлежат нам (блокировка могла истечь
+# и достаться другому процессу - ее удалять нельзя)
+RELEASE_LOCKS = """
+local released = 0
+for _, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        released = released + redis.call('DEL', key)
+    end
+end
+return released
+"""
+
+class StudentCache:
+    """Кэш студентов в Redis со сквозным чтением (cache-aside) из PostgreSQL
+
+    Запрошенные записи читаются из Redis одной командой (MGET или конвейер
+    HGETALL), промахи дочитываются из PostgreSQL тем же запросом, что и при
+    загрузке redis_create.py, и записываются обратно с временем жизни ttl
+    и случайным разбросом, чтобы записи не истекали одновременно.
+    От лавины одинаковых запросов к PostgreSQL при промахе защищает короткая
+    блокировка lock:student:{id} (SET NX PX): студента загружает только
+    получивший блокировку, остальные ждут появления записи не дольше
+    lock_timeout секунд. Студенты, которых нет в PostgreSQL, запоминаются
+    короткой отметкой на not_found_ttl секунд: повторный запрос - попадание
+    с ответом None, без блокировки и обращения к базе.
+    Как и RecommendationService, объект не предназначен для нескольких
+    потоков: каждому потоку - свой экземпляр.
+    """
+
+    def __init__(self, r=None, ttl=STUDENT_TTL, lock_timeout=LOCK_TIMEOUT, fmt=None,
+                 not_found_ttl=NOT_FOUND_TTL):
+        """Инициализация кэша поверх соединения Redis без decode_responses"""
+        self.r = r or raw_client()
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.not_found_ttl = not_found_ttl
+        # Формат берется из загрузки; если хранилище пустое - фиксируется формат по умолчанию
+        self.r.set(FORMAT_KEY, fmt or STUDENT_FORMAT, nx=True)
+        self.fmt = student_format(self.r)
+        self.orgs = OrgCache(self.r)
+        self.release_locks = self.r.register_script(RELEASE_LOCKS)
+        self.hits = 0
+        self.misses = 0
+        self.loaded = 0
+        self.not_found = 0
+        self.waits = 0
+        self.fallbacks = 0
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def get_student(self, student_id):
+        """Студент по id (словарь вида записи json) или None, если его нет и в PostgreSQL"""
+        return self.get_students([student_id])[int(student_id)]
+
+    def get_students(self, student_ids):
+        """Студенты по списку id: {id: словарь студента или None}"""
+        started = time.perf_counter()
+        ids = list(dict.fromkeys(int(student_id) for student_id in student_ids))
+        not_found = set()
+        students = read_students(self.r, ids, self.fmt, self.orgs, not_found=not_found)
+        missing = [student_id for student_id, student in students.items()
+                   if student is None and student_id not in not_found]
+        self.hits += len(ids) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            students.update(self._fill(missing))
+        self.latencies.append(time.perf_counter() - started)
+        return students
+
+    def invalidate(self, *student_ids):
+        """Удаление записей студентов из кэша (например, после изменения в PostgreSQL)"""
+        if not student_ids:
+            return 0
+        return self.r.delete(*(f"student:{student_id}" for student_id in student_ids))
+
+    def _fill(self, missing):
+        """Загрузка промахов: под блокировкой из PostgreSQL или ожидание чужой загрузки"""
+        token = uuid.uuid4().hex
+        found = {}
+        deadline = time.monotonic() + self.lock_timeout
+        while missing:
+            acquired = self._lock(missing, token)
+            if acquired:
+                try:
+                    found.update(self._load(acquired))
+                finally:
+                    self.release_locks(keys=[LOCK_PREFIX + str(student_id) for student_id in acquired],
+                                       args=[token])
+                missing = [student_id for student_id in missing if student_id not in acquired]
+                if not missing:
+                    break
+
+            # Остальных загружает другой процесс: ждем записи, но не дольше lock_timeout
+            if time.monotonic() >= deadline:
+                self.fallbacks += len(missing)
+                found.update(self._load(missing))
+                break
+            time.sleep(WAIT_INTERVAL)
+            self.waits += 1
+            not_found = set()
+            students = read_students(self.r, missing, self.fmt, self.orgs, not_found=not_found)
+            found.update({student_id: student for student_id, student in students.items() if student})
+            missing = [student_id for student_id, student in students.items()
+                       if student is None and student_id not in not_found]
+        return found
+
+    def _lock(self, student_ids, token):
+        """Попытка взять блокировки загрузки; возвращает множество id, для которых она получена"""
+        pipe = self.r.pipeline(transaction=False)
+        for student_id in student_ids:
+            pipe.set(LOCK_PREFIX + str(student_id), token, nx=True, px=int(self.lock_timeout * 1000))
+        return {student_id for student_id, ok in zip(student_ids, pipe.execute()) if ok}
+
+    def _load(self, student_ids):
+        """Чтение студентов из PostgreSQL и запись в Redis: {id: словарь студента}
+
+        Для id, которых нет в PostgreSQL, записываются отметки на not_found_ttl секунд.
+        """
+        with get_pool().connection() as connection:
+            with connection.cursor(cursor_factory=DictCursor) as cursor:
+                cursor.execute(STUDENT_QUERY + " WHERE s.id = ANY(%s)", (list(student_ids),))
+                rows = cursor.fetchall()
+
+        absent = set(student_ids) - {row['id'] for row in rows}
+        with PipelineWriter(self.r) as writer:
+            write_students(writer, rows, self.fmt, ttl=self.ttl)
+            write_not_found(writer, absent, self.fmt, int(self.not_found_ttl * 1000))
+
+        # Свежие названия организаций сразу попадают и в кэш процесса
+        for row in rows:
+            for level, org_id, fields in org_entries(row):
+                self.orgs.entries[(level, org_id)] = (fields["name"], fields.get("parent"))
+
+        self.loaded += len(rows)
+        self.not_found += len(absent)
+        return {row['id']: student_record(row) for row in rows}
+
+    def stats(self):
+        """Счетчики кэша: попадания, промахи, загрузки из PostgreSQL и время ответа в мс"""
+        latencies = sorted(self.latencies)
+        result = {"hits": self.hits, "misses": self.misses,
+                  "hit_rate": self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0,
+                  "loaded": self.loaded, "not_found": self.not_found,
+                  "waits": self.waits, "fallbacks": self.fallbacks, "requests": len(latencies)}
+        if latencies:
+            result.update({"p50_ms": statistics.median(latencies) * 1000,
+                           "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+                           "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000})
+        return result
+
+def print_stats(cache):
+    """Вывод счетчиков кэша"""
+    stats = cache.stats()
+    print(f"✅ Попаданий {stats['hits']}, промахов {stats['misses']} ({stats['hit_rate']:.0%} попаданий), "
+          f"загружено из PostgreSQL {stats['loaded']}, не найдено {stats['not_found']}, "
+          f"ожиданий {stats['waits']}, загрузок без блокировки {stats['fallbacks']}")
+    if stats['requests']:
+        print(f"✅ Время ответа по {stats['requests']} запросам: p50 {stats['p50_ms']:.2f} мс, "
+              f"p95 {stats['p95_ms']:.2f} мс, p99 {stats['p99_ms']:.2f} мс")
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Кэш студентов в Redis со сквозным чтением из PostgreSQL")
+    parser.add_argument("--students", type=int, default=200, help="сколько студентов запрашивать")
+    parser.add_argument("--ttl", type=int, default=STUDENT_TTL,
+                        help="время жизни записей, загруженных из PostgreSQL, в секундах")
+    return parser.parse_args()
+
+def main():
+    """Пример: холодное и теплое чтение студентов через кэш"""
+    args = parse_args()
+    print("\n===== КЭШ СТУДЕНТОВ REDIS + POSTGRESQL =====")
+
+    if not connect_to_redis():
+        return
+
+    try:
+        cache = StudentCache(ttl=args.ttl)
+        with get_pool().connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT id FROM students ORDER BY id LIMIT %s", (args.students,))
+                student_ids = [row[0] for row in cursor.fetchall()]
+        if not student_ids:
+            print("❌ В PostgreSQL нет студентов")
+            return
+
+        # Холодный проход: записи удаляются и дочитываются из PostgreSQL
+        cache.invalidate(*student_ids)
+        for title in ("холодный кэш", "теплый кэш"):
+            started = time.perf_counter()
+            students = cache.get_students(student_ids)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"✅ {len(students)} студентов одним запросом ({title}): {elapsed:.1f} мс")
+
+        started = time.perf_counter()
+        for student_id in student_ids:
+            cache.get_student(student_id)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"✅ {len(student_ids)} запросов по одному студенту: {elapsed:.1f} мс "
+              f"({elapsed / len(student_ids):.3f} мс на запрос)")
+
+        student = cache.get_student(student_ids[0])
+        print(f"✅ Пример: {student['fio']}, группа {student['group']['name']}, "
+              f"TTL записи {cache.r.ttl(f'student:{student_ids[0]}')} с")
+        print_stats(cache)
+    except Exception as e:
+        print(f"❌ Ошибка при работе с кэшем: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,9 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import redis
 import json
 
-def connect_to_redis():
-    """Установка соединения с Redis"""
-    try:
-        # Подключение к Redis
-        r = redis.Redis(host='localhost', port=6379, decode_responses=True)
-        # Проверка соединения
-        r.ping()
-        print("✅ Соединение с Redis установлено")
-        return r
-    except redis.ConnectionError as e:
-        print(f"❌ Ошибка подключения к Redis: {str(e)}")
-        return None
+from redis_common import connect_to_redis, FORMAT_KEY
 
 def check_data(r):
     """Проверка наличия данных студентов в Redis"""
@@ -46,9 +34,16 @@ def delete_storage(r):
     
     print(f"✅ Удалено {deleted_count} записей о студентах")
     
+    # Удаляем общие записи организаций компактных форматов
+    org_keys = r.keys("org:*")
+    if org_keys:
+        r.delete(*org_keys)
+        print(f"✅ Удалено {len(org_keys)} записей организаций org:*")
+    
     # Удаляем служебные ключи
     r.delete("students:all")
     r.delete("students:info")
+    r.delete(FORMAT_KEY)
     
     print("✅ Хранилище данных студентов удалено")
     
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import random
+import time
+
+import msgpack
+import redis
+from dotenv import load_dotenv
+
+# Параметры подключения берутся из окружения (или файла .env), по умолчанию - как в docker-compose.yml
+load_dotenv()
+
+REDIS_SETTINGS = {
+    "host": os.getenv("REDIS_HOST", "localhost"),
+    "port": int(os.getenv("REDIS_PORT", "6379"))
+}
+
+# Сколько команд накапливать в конвейере перед отправкой
+REDIS_PIPELINE_SIZE = int(os.getenv("REDIS_PIPELINE_SIZE", "1000"))
+
+# Форматы записей студентов:
+#   json    - строка JSON с полными названиями группы, кафедры, института и университета;
+#   hash    - хеш student:{id} с полями fio, date_of_recipient, group_id;
+#   msgpack - строка msgpack [fio, date_of_recipient, group_id].
+# В компактных форматах (hash, msgpack) названия хранятся один раз в хешах
+# org:{уровень}:{id} с полями name и parent (id вышестоящей организации).
+STUDENT_FORMATS = ("json", "hash", "msgpack")
+STUDENT_FORMAT = os.getenv("REDIS_STUDENT_FORMAT", "msgpack")
+
+# Время жизни записей студентов в кэше (секунды) и доля случайного разброса:
+# записи, загруженные одновременно, истекают не в одну секунду
+STUDENT_TTL = int(os.getenv("REDIS_STUDENT_TTL", "3600"))
+TTL_JITTER = float(os.getenv("REDIS_TTL_JITTER", "0.1"))
+
+# Студенты с цепочкой организаций из PostgreSQL
+STUDENT_QUERY = """
+SELECT s.id, s.fio, s.date_of_recipient,
+       g.id as group_id, g.name as group_name,
+       d.id as department_id, d.name as department_name,
+       i.id as institute_id, i.name as institute_name,
+       u.id as university_id, u.name as university_name
+FROM students s
+JOIN groups g ON s.id_group = g.id
+JOIN departments d ON g.id_kafedr_a = d.id
+JOIN institutes i ON d.id_institutes = i.id
+JOIN universities u ON i.id_univer = u.id
+"""
+
+# Ключ, в котором загрузка сохраняет формат записей студентов
+FORMAT_KEY = "students:format"
+
+# Отметка студента, которого нет в PostgreSQL (кэш redis_cache.py): пустая
+# строка student:{id}, а для формата hash - хеш из единственного поля not_found
+NOT_FOUND_FIELD = "not_found"
+
+# Цепочка организаций от группы до университета
+ORG_CHAIN = ["group", "department", "institute", "university"]
+
+def _text(value):
+    """Строка из ответа Redis (клиент может возвращать bytes)"""
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+def student_record(student):
+    """Словарь студента с полными названиями организаций (вид записи json) из строки выборки"""
+    date = student['date_of_recipient'].strftime('%Y-%m-%d') if student['date_of_recipient'] else None
+    return {
+        "id": student['id'],
+        "fio": student['fio'],
+        "date_of_recipient": date,
+        "group": {"id": student['group_id'], "name": student['group_name']},
+        "department": {"id": student['department_id'], "name": student['department_name']},
+        "institute": {"id": student['institute_id'], "name": student['institute_name']},
+        "university": {"id": student['university_id'], "name": student['university_name']}
+    }
+
+def encode_student(student, fmt=STUDENT_FORMAT):
+    """Значение для ключа student:{id} из строки выборки студента
+
+    Для hash возвращается словарь полей для HSET, для остальных форматов - строка для SET.
+    """
+    record = student_record(student)
+    if fmt == "hash":
+        return {"fio": record['fio'], "date_of_recipient": record['date_of_recipient'] or "",
+                "group_id": student['group_id']}
+    if fmt == "msgpack":
+        return msgpack.packb([record['fio'], record['date_of_recipient'], student['group_id']])
+    return json.dumps(record, ensure_ascii=False)
+
+def org_entries(student):
+    """Хеши org:* для организаций студента: список (уровень, id, поля)"""
+    entries = []
+    for level, parent in zip(ORG_CHAIN, ORG_CHAIN[1:] + [None]):
+        fields = {"name": student[f"{level}_name"]}
+        if parent:
+            fields["parent"] = student[f"{parent}_id"]
+        entries.append((level, student[f"{level}_id"], fields))
+    return entries
+
+def jittered_ttl(ttl, jitter=TTL_JITTER):
+    """Время жизни ttl со случайным отклонением в пределах доли jitter"""
+    return max(1, round(ttl * random.uniform(1 - jitter, 1 + jitter)))
+
+def write_students(writer, students, fmt=STUDENT_FORMAT, written_orgs=None, prefix="", ttl=None):
+    """Добавление в конвейер writer записей студентов в формате fmt
+
+    Для компактных форматов добавляются и записи org:*, которых еще нет
+    в множестве written_orgs (оно пополняется). prefix добавляется ко всем ключам.
+    При заданном ttl записи студентов истекают через jittered_ttl(ttl) секунд;
+    общие записи org:* не истекают.
+    """
+    written_orgs = set() if written_orgs is None else written_orgs
+    for student in students:
+        value = encode_student(student, fmt)
+        key = f"{prefix}student:{student['id']}"
+        expire = jittered_ttl(ttl) if ttl else None
+        if fmt == "hash":
+            writer.add("hset", key, mapping=value)
+            if expire:
+                writer.add("expire", key, expire)
+        else:
+            writer.add("set", key, value, ex=expire)
+
+        # Общие записи организаций (только для компактных форматов)
+        if fmt != "json":
+            for level, org_id, fields in org_entries(student):
+                if (level, org_id) not in written_orgs:
+                    written_orgs.add((level, org_id))
+                    writer.add("hset", f"{prefix}org:{level}:{org_id}", mapping=fields)
+    return written_orgs
+
+def write_not_found(writer, student_ids, fmt=STUDENT_FORMAT, ttl_ms=1000, prefix=""):
+    """Добавление в конвейер writer отметок студентов, которых нет в PostgreSQL (истекают через ttl_ms)"""
+    for student_id in student_ids:
+        key = f"{prefix}student:{student_id}"
+        if fmt == "hash":
+            writer.add("hset", key, mapping={NOT_FOUND_FIELD: 1})
+            writer.add("pexpire", key, ttl_ms)
+        else:
+            writer.add("set", key, "", px=ttl_ms)
+
+def is_not_found(value):
+    """Является ли прочитанное значение student:{id} отметкой отсутствующего студента"""
+    if isinstance(value, dict):
+        return len(value) == 1 and _text(next(iter(value))) == NOT_FOUND_FIELD
+    return value is not None and len(value) == 0
+
+class OrgCache:
+    """Кэш организаций org:* в памяти процесса
+
+    Названия групп, кафедр, институтов и университетов общие для многих
+    студентов и почти не меняются, поэтому читаются из Redis один раз:
+    недостающие записи запрашиваются конвейером по одному уровню цепочки.
+    """
+
+    def __init__(self, r, prefix=""):
+        self.r = r
+        self.prefix = prefix
+        self.entries = {}
+
+    def resolve(self, group_ids):
+        """Загрузка цепочек организаций для групп, которых еще нет в кэше"""
+        ids = set(group_ids)
+        for level in ORG_CHAIN:
+            missing = [org_id for org_id in ids if (level, org_id) not in self.entries]
+            if missing:
+                pipe = self.r.pipeline(transaction=False)
+                for org_id in missing:
+                    pipe.hgetall(f"{self.prefix}org:{level}:{org_id}")
+                for org_id, fields in zip(missing, pipe.execute()):
+                    fields = {_text(k): _text(v) for k, v in fields.items()}
+                    parent = fields.get("parent")
+                    self.entries[(level, org_id)] = (fields.get("name"), int(parent) if parent else None)
+            ids = {self.entries[(level, org_id)][1] for org_id in ids} - {None}
+
+    def chain(self, group_id):
+        """Словарь {уровень: {"id", "name"}} от группы до университета"""
+        self.resolve([group_id])
+        result = {}
+        org_id = group_id
+        for level in ORG_CHAIN:
+            if org_id is None:
+                result[level] = {"id": None, "name": None}
+                continue
+            name, parent = self.entries[(level, org_id)]
+            result[level] = {"id": org_id, "name": name}
+            org_id = parent
+        return result
+
+def student_format(r):
+    """Формат записей студентов, с которым выполнялась загрузка"""
+    fmt = _text(r.get(FORMAT_KEY))
+    return fmt if fmt in STUDENT_FORMATS else "json"
+
+def read_students(r, student_ids, fmt=None, orgs=None, prefix="", not_found=None):
+    """Чтение студентов одним обращением к Redis: {id: словарь студента или None}
+
+    Строковые форматы читаются одной командой MGET, хеши - конвейером HGETALL.
+    Компактные записи дополняются названиями организаций из orgs (OrgCache),
+    так что результат имеет тот же вид, что и запись в формате json.
+    Для отметок отсутствующих студентов (write_not_found) возвращается None,
+    а их id добавляются в множество not_found, если оно передано.
+    Для формата msgpack клиент должен быть создан без decode_responses.
+    """
+    fmt = fmt or student_format(r)
+    keys = [f"{prefix}student:{student_id}" for student_id in student_ids]
+    if fmt == "hash":
+        pipe = r.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        values = pipe.execute()
+    else:
+        values = r.mget(keys) if keys else []
+
+    fields = {}
+    for student_id, value in zip(student_ids, values):
+        if is_not_found(value):
+            fields[student_id] = None
+            if not_found is not None:
+                not_found.add(student_id)
+        elif not value:
+            fields[student_id] = None
+        elif fmt == "json":
+            fields[student_id] = json.loads(value)
+        elif fmt == "hash":
+            value = {_text(k): _text(v) for k, v in value.items()}
+            fields[student_id] = (value["fio"], value["date_of_recipient"] or None, int(value["group_id"]))
+        else:
+            fields[student_id] = tuple(msgpack.unpackb(value))
+    if fmt == "json":
+        return fields
+
+    orgs = orgs or OrgCache(r, prefix)
+    orgs.resolve(record[2] for record in fields.values() if record)
+    students = {}
+    for student_id, record in fields.items():
+        if record is None:
+            students[student_id] = None
+            continue
+        fio, date, group_id = record
+        students[student_id] = {"id": student_id, "fio": fio, "date_of_recipient": date,
+                                **orgs.chain(group_id)}
+    return students
+
+class PipelineWriter:
+    """Пакетная запись в Redis через конвейер (pipeline)
+
+    Команды накапливаются на клиенте и отправляются одним сетевым обменом
+    каждые size команд, поэтому скорость загрузки ограничена пропускной
+    способностью Redis, а не задержкой сети на каждую команду.
+    При transaction=True каждая пачка выполняется атомарно в MULTI/EXEC.
+    Используется как контекстный менеджер: остаток отправляется при выходе.
+    """
+
+    def __init__(self, r, size=REDIS_PIPELINE_SIZE, transaction=False):
+        """Создание конвейера поверх соединения r"""
+        self.pipe = r.pipeline(transaction=transaction)
+        self.size = size
+        self.pending = 0
+        self.ops = 0
+        self.flushes = 0
+        self.started = time.perf_counter()
+
+    def add(self, command, *args, **kwargs):
+        """Добавление команды (например, add("set", key, value)); при заполнении пачка отправляется"""
+        getattr(self.pipe, command)(*args, **kwargs)
+        self.pending += 1
+        if self.pending >= self.size:
+            self.flush()
+
+    def flush(self):
+        """Отправка накопленных команд"""
+        if self.pending:
+            self.pipe.execute()
+            self.ops += self.pending
+            self.flushes += 1
+            self.pending = 0
+
+    def elapsed(self):
+        """Время с момента создания в секундах"""
+        return time.perf_counter() - self.started
+
+    def rate(self):
+        """Скорость записи: выполненных команд в секунду"""
+        elapsed = self.elapsed()
+        return self.ops / elapsed if elapsed > 0 else 0
+
+    def summary(self):
+        """Строка со статистикой записи"""
+        return (f"{self.ops} команд в {self.flushes} пачках за {self.elapsed():.2f} с, "
+                f"{self.rate():,.0f} команд/с")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.pipe.reset()
+        return False
+
+def raw_client():
+    """Соединение без декодирования ответов: для двоичных значений (msgpack)"""
+    return redis.Redis(**REDIS_SETTINGS)
+
+def connect_to_redis():
+    """Установка соединения с Redis"""
+    try:
+        # Подключение к Redis
+        r = redis.Redis(**REDIS_SETTINGS, decode_responses=True)
+        # Проверка соединения
+        r.ping()
+        print("✅ Соединение с Redis установлено")
+        return r
+    except redis.ConnectionError as e:
+        print(f"❌ Ошибка подключения к Redis: {str(e)}")
+        return None
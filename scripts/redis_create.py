@@ -1,49 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import redis
+import argparse
 import json
+import sys
 from faker import Faker
-import psycopg2
-from psycopg2.extras import DictCursor
+
+from redis_common import (connect_to_redis, raw_client, read_students, write_students, PipelineWriter,
+                          FORMAT_KEY, REDIS_PIPELINE_SIZE, STUDENT_FORMAT, STUDENT_FORMATS, STUDENT_QUERY)
+from postgresql_common import connect_to_postgresql, release_postgresql, stream_query, EXPORT_ITERSIZE
 
 # Инициализация генератора случайных данных
 fake = Faker('ru_RU')
 
-def connect_to_postgresql():
-    """Подключение к PostgreSQL"""
-    try:
-        # Подключение к существующей базе данных
-        connection = psycopg2.connect(
-            user="postgres",
-            password="postgres",
-            host="localhost",
-            port="5432",
-            database="postgres"
-        )
-        connection.autocommit = True
-
-        # Создаем объект курсора для выполнения операций с базой данных
-        cursor = connection.cursor(cursor_factory=DictCursor)
-        print("✅ Соединение с PostgreSQL установлено")
-        return connection, cursor
-    except Exception as error:
-        print(f"❌ Ошибка при работе с PostgreSQL: {error}")
-        return None, None
-
-def connect_to_redis():
-    """Установка соединения с Redis"""
-    try:
-        # Подключение к Redis
-        r = redis.Redis(host='localhost', port=6379, decode_responses=True)
-        # Проверка соединения
-        r.ping()
-        print("✅ Соединение с Redis установлено")
-        return r
-    except redis.ConnectionError as e:
-        print(f"❌ Ошибка подключения к Redis: {str(e)}")
-        return None
-
 def create_storage(r):
     """Создание хранилища данных в Redis"""
     # Очистка предыдущих данных (если есть)
@@ -56,84 +25,69 @@ def create_storage(r):
         r.delete("students:all")
         print("⚠️ Удален существующий набор ID студентов")
     
+    org_keys = r.keys("org:*")
+    if org_keys:
+        r.delete(*org_keys)
+        print(f"⚠️ Удалено {len(org_keys)} существующих записей организаций")
+    
     # Создаем ключ-метку для проверки наличия хранилища
     r.set("students:info", "Список студентов из центральной PostgreSQL БД")
     print("✅ Хранилище для студентов создано")
 
-def import_student_data(r, pg_cursor):
-    """Импорт данных о студентах из PostgreSQL в Redis"""
-    # Получаем полную информацию о студентах с присоединенными таблицами
-    query = """
-    SELECT s.id, s.fio, s.date_of_recipient,
-           g.id as group_id, g.name as group_name,
-           d.id as department_id, d.name as department_name,
-           i.id as institute_id, i.name as institute_name,
-           u.id as university_id, u.name as university_name
-    FROM students s
-    JOIN groups g ON s.id_group = g.id
-    JOIN departments d ON g.id_kafedr_a = d.id
-    JOIN institutes i ON d.id_institutes = i.id
-    JOIN universities u ON i.id_univer = u.id
+def import_student_data(r, pg_cursor, itersize=EXPORT_ITERSIZE, pipeline_size=REDIS_PIPELINE_SIZE,
+                        transaction=False, fmt=STUDENT_FORMAT, ttl=None):
+    """Импорт данных о студентах из PostgreSQL в Redis
+
+    Строки читаются блоками по itersize, а команды отправляются
+    конвейером пачками по pipeline_size (при transaction=True - в MULTI/EXEC).
+    fmt - формат записей (redis_common.STUDENT_FORMATS); в компактных
+    форматах каждая организация записывается в org:* один раз.
+    ttl - время жизни записей студентов (с разбросом), None - без истечения.
     """
-    
-    pg_cursor.execute(query)
-    students = pg_cursor.fetchall()
-    
-    if not students:
-        print("⚠️ В PostgreSQL не найдены студенты для импорта")
-        return None
-    
-    # Импортируем каждого студента в Redis
-    student_ids = []
-    for student in students:
-        student_id = student['id']
-        student_ids.append(str(student_id))
+    # Импортируем студентов блоками, не загружая всю выборку в память
+    first_student_id = None
+    student_count = 0
+    written_orgs = set()
+    writer = PipelineWriter(r, pipeline_size, transaction)
+    writer.add("set", FORMAT_KEY, fmt)
+    for students in stream_query(pg_cursor.connection, STUDENT_QUERY, itersize=itersize):
+        student_ids = []
+        for student in students:
+            student_ids.append(str(student['id']))
+            
+            # Индекс по группам для быстрого поиска студентов группы
+            writer.add("sadd", f"group:{student['group_id']}:students", student['id'])
         
-        # Формируем детальные данные о студенте
-        student_data = {
-            "id": student_id,
-            "fio": student['fio'],
-            "date_of_recipient": student['date_of_recipient'].strftime('%Y-%m-%d') if student['date_of_recipient'] else None,
-            "group": {
-                "id": student['group_id'],
-                "name": student['group_name']
-            },
-            "department": {
-                "id": student['department_id'],
-                "name": student['department_name']
-            },
-            "institute": {
-                "id": student['institute_id'],
-                "name": student['institute_name']
-            },
-            "university": {
-                "id": student['university_id'],
-                "name": student['university_name']
-            }
-        }
+        # Сохраняем записи студентов (и общие записи организаций) в Redis
+        write_students(writer, students, fmt, written_orgs, ttl=ttl)
         
-        # Сохраняем в Redis
-        r.set(f"student:{student_id}", json.dumps(student_data, ensure_ascii=False))
-    
-    # Сохраняем список всех ID студентов для удобства поиска
-    if student_ids:
-        r.sadd("students:all", *student_ids)
+        # Сохраняем список всех ID студентов для удобства поиска
+        writer.add("sadd", "students:all", *student_ids)
+        
+        if first_student_id is None:
+            first_student_id = students[0]['id']
+        student_count += len(students)
     
-    print(f"✅ Импортировано {len(student_ids)} студентов в Redis")
+    writer.flush()
     
-    # Создаем дополнительные индексы для быстрого поиска
-    # Например, индекс по группам
-    for student in students:
-        group_id = student['group_id']
-        student_id = student['id']
-        r.sadd(f"group:{group_id}:students", student_id)
+    if not student_count:
+        print("⚠️ В PostgreSQL не найдены студенты для импорта")
+        return None
     
+    print(f"✅ Импортировано {student_count} студентов в Redis в формате {fmt} ({writer.summary()})")
+    if written_orgs:
+        print(f"✅ Записано {len(written_orgs)} общих записей организаций org:*")
     print("✅ Созданы дополнительные индексы для поиска студентов по группам")
     
-    return students[0]['id'] if students else None
+    return first_student_id
+
+def import_visit_data(r, pg_cursor, itersize=EXPORT_ITERSIZE, pipeline_size=REDIS_PIPELINE_SIZE,
+                      transaction=False):
+    """Импорт данных о посещениях в Redis для быстрого кэширования
 
-def import_visit_data(r, pg_cursor):
-    """Импорт данных о посещениях в Redis для быстрого кэширования"""
+    Строки читаются блоками по itersize, а команды отправляются
+    конвейером пачками по pipeline_size (при transaction=True - в MULTI/EXEC).
+    """
     # Получаем данные о посещениях
     query = """
     SELECT v.id, v.id_student, v.id_rasp, v.visitTime,
@@ -144,40 +98,41 @@ def import_visit_data(r, pg_cursor):
     JOIN lectures l ON s.id_lect = l.id
     """
     
-    pg_cursor.execute(query)
-    visits = pg_cursor.fetchall()
-    
-    if not visits:
-        print("⚠️ В PostgreSQL не найдены посещения для импорта")
-        return
-    
     # Для каждого студента создаем упорядоченный список его посещений (sorted set)
     visit_count = 0
-    for visit in visits:
-        student_id = visit['id_student']
-        lecture_id = visit['id_lect']
-        visit_time = visit['visittime'].timestamp() if visit['visittime'] else 0
-        
-        visit_data = {
-            "id": visit['id'],
-            "schedule_id": visit['id_rasp'],
-            "lecture_id": lecture_id,
-            "lecture_name": visit['lecture_name'],
-            "visit_time": str(visit['visittime'])
-        }
-        
-        # Добавляем посещение в упорядоченный список студента
-        r.zadd(f"student:{student_id}:visits", {json.dumps(visit_data, ensure_ascii=False): visit_time})
-        
-        # Добавляем ID студента в множество посетивших лекцию
-        r.sadd(f"lecture:{lecture_id}:visitors", student_id)
+    writer = PipelineWriter(r, pipeline_size, transaction)
+    for visits in stream_query(pg_cursor.connection, query, itersize=itersize):
+        for visit in visits:
+            student_id = visit['id_student']
+            lecture_id = visit['id_lect']
+            visit_time = visit['visittime'].timestamp() if visit['visittime'] else 0
+            
+            visit_data = {
+                "id": visit['id'],
+                "schedule_id": visit['id_rasp'],
+                "lecture_id": lecture_id,
+                "lecture_name": visit['lecture_name'],
+                "visit_time": str(visit['visittime'])
+            }
+            
+            # Добавляем посещение в упорядоченный список студента
+            writer.add("zadd", f"student:{student_id}:visits",
+                       {json.dumps(visit_data, ensure_ascii=False): visit_time})
+            
+            # Добавляем ID студента в множество посетивших лекцию
+            writer.add("sadd", f"lecture:{lecture_id}:visitors", student_id)
         
-        visit_count += 1
+        visit_count += len(visits)
+    writer.flush()
+    
+    if not visit_count:
+        print("⚠️ В PostgreSQL не найдены посещения для импорта")
+        return
     
-    print(f"✅ Импортировано {visit_count} посещений в Redis")
+    print(f"✅ Импортировано {visit_count} посещений в Redis ({writer.summary()})")
 
-def read_sample(r, student_id=None):
-    """Чтение образца данных для проверки"""
+def read_sample(r, raw, student_id=None):
+    """Чтение образца данных для проверки (raw - соединение без декодирования ответов)"""
     # Получаем все ID студентов
     student_ids = list(r.smembers("students:all"))
     if not student_ids:
@@ -190,10 +145,9 @@ def read_sample(r, student_id=None):
     else:
         first_id = student_ids[0]
     
-    # Получаем данные студента
-    student_data = r.get(f"student:{first_id}")
-    if student_data:
-        student = json.loads(student_data)
+    # Получаем данные студента (в формате, с которым выполнялась загрузка)
+    student = read_students(raw, [first_id])[first_id]
+    if student:
         print(f"✅ Данные студента с ID {first_id}:")
         print(f"  ФИО: {student['fio']}")
         print(f"  Группа: {student['group']['name']}")
@@ -231,32 +185,63 @@ def read_sample(r, student_id=None):
         members = r.smembers(first_group_key)
         print(f"  Группа {group_id} содержит {len(members)} студентов")
 
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Создание и заполнение Redis")
+    parser.add_argument(
+        "--pipeline-size",
+        type=int,
+        default=REDIS_PIPELINE_SIZE,
+        help="сколько команд отправлять в Redis одним конвейером"
+    )
+    parser.add_argument(
+        "--transaction",
+        action="store_true",
+        help="выполнять каждую пачку команд атомарно (MULTI/EXEC)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=STUDENT_FORMATS,
+        default=STUDENT_FORMAT,
+        help="формат записей студентов: json с полными названиями или компактные hash/msgpack"
+    )
+    parser.add_argument(
+        "--ttl",
+        type=int,
+        help="время жизни записей студентов в секундах (с разбросом); по умолчанию без истечения"
+    )
+    return parser.parse_args()
+
 def main():
     """Основная функция создания и наполнения хранилища"""
+    args = parse_args()
     print("\n===== СОЗДАНИЕ И НАПОЛНЕНИЕ REDIS =====")
     
     # Устанавливаем соединение с Redis
     r = connect_to_redis()
     if not r:
-        return
+        sys.exit(1)
     
     # Подключаемся к PostgreSQL для получения данных
     pg_connection, pg_cursor = connect_to_postgresql()
     if not pg_connection or not pg_cursor:
-        return
+        sys.exit(1)
     
+    raw = raw_client()
     try:
         # Создаем хранилище
         create_storage(r)
         
         # Импортируем данные студентов
-        student_id = import_student_data(r, pg_cursor)
+        student_id = import_student_data(r, pg_cursor, pipeline_size=args.pipeline_size,
+                                         transaction=args.transaction, fmt=args.format, ttl=args.ttl)
         
         # Импортируем данные о посещениях
-        import_visit_data(r, pg_cursor)
+        import_visit_data(r, pg_cursor, pipeline_size=args.pipeline_size,
+                          transaction=args.transaction)
         
         # Читаем образец для проверки
-        read_sample(r, student_id)
+        read_sample(r, raw, student_id)
         
         print("\n===== ЗАВЕРШЕНО =====")
         print("""
@@ -264,7 +249,8 @@ def main():
 redis-cli
 
 > KEYS *
-> GET student:1
+> GET students:format
+> HGETALL org:group:1
 > SMEMBERS students:all
 > ZRANGE student:1:visits 0 -1
 > SMEMBERS group:1:students
@@ -275,13 +261,15 @@ redis-cli
 > SCARD group:1:students      # Получить количество студентов в группе 1
 > ZCARD student:1:visits      # Получить количество посещений студента 1
     """)
+    except Exception as e:
+        print(f"❌ Ошибка при наполнении Redis: {e}")
+        sys.exit(1)
     finally:
         # Закрываем соединения
-        if pg_cursor:
-            pg_cursor.close()
+        raw.close()
         if pg_connection:
-            pg_connection.close()
-            print("✅ Соединение с PostgreSQL закрыто")
+            release_postgresql(pg_connection, pg_cursor)
+            print("✅ Соединение с PostgreSQL возвращено в пул")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
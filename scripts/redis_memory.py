@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+
+from redis_common import (connect_to_redis, raw_client, read_students, write_students, PipelineWriter,
+                          STUDENT_FORMATS, STUDENT_QUERY, _text)
+from postgresql_common import connect_to_postgresql, release_postgresql
+
+# Префикс временных ключей замера
+TEST_PREFIX = "memtest"
+
+def used_memory(r):
+    """Память, занятая данными Redis (used_memory), в байтах"""
+    return int(r.info("memory")["used_memory"])
+
+def key_usage(r, keys):
+    """Суммарный MEMORY USAGE ключей (конвейером)"""
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.memory_usage(key, samples=0)
+    return sum(size or 0 for size in pipe.execute())
+
+def delete_keys(r, pattern):
+    """Удаление ключей по шаблону пачками через SCAN"""
+    deleted = 0
+    batch = []
+    for key in r.scan_iter(match=pattern, count=1000):
+        batch.append(key)
+        if len(batch) >= 1000:
+            deleted += r.delete(*batch)
+            batch = []
+    if batch:
+        deleted += r.delete(*batch)
+    return deleted
+
+def measure_format(r, students, fmt):
+    """Запись студентов во временные ключи в формате fmt и замер памяти
+
+    Возвращает словарь: число ключей, сумма MEMORY USAGE, прирост used_memory.
+    """
+    prefix = f"{TEST_PREFIX}:{fmt}:"
+    delete_keys(r, prefix + "*")
+    before = used_memory(r)
+    with PipelineWriter(r) as writer:
+        orgs = write_students(writer, students, fmt, prefix=prefix)
+    after = used_memory(r)
+
+    keys = [f"{prefix}student:{student['id']}" for student in students]
+    keys += [f"{prefix}org:{level}:{org_id}" for level, org_id in orgs]
+    usage = key_usage(r, keys)
+    encoding = _text(r.object("encoding", keys[0])) if keys else None
+    delete_keys(r, prefix + "*")
+    return {"keys": len(keys), "usage": usage, "used_memory": after - before, "encoding": encoding}
+
+def compare_formats(r, students, formats=STUDENT_FORMATS):
+    """Сравнение расхода памяти форматами записей студентов: {формат: замер}"""
+    results = {}
+    for fmt in formats:
+        results[fmt] = measure_format(r, students, fmt)
+
+    base = results.get("json", {}).get("usage")
+    count = len(students)
+    print(f"\n{'формат':<8} {'ключей':>8} {'MEMORY USAGE':>14} {'на студента':>12} "
+          f"{'used_memory':>12} {'от json':>8}  кодировка")
+    for fmt, result in results.items():
+        ratio = f"{result['usage'] / base:.0%}" if base else "-"
+        print(f"{fmt:<8} {result['keys']:>8} {result['usage']:>14,} {result['usage'] / count:>12.1f} "
+              f"{result['used_memory']:>12,} {ratio:>8}  {result['encoding']}")
+    return results
+
+def check_roundtrip(r, students):
+    """Проверка, что компактные записи читаются в том же виде, что и json"""
+    sample = students[:10]
+    ids = [student['id'] for student in sample]
+    decoded = {}
+    for fmt in STUDENT_FORMATS:
+        prefix = f"{TEST_PREFIX}:check:{fmt}:"
+        with PipelineWriter(r) as writer:
+            write_students(writer, sample, fmt, prefix=prefix)
+        decoded[fmt] = read_students(r, ids, fmt, prefix=prefix)
+        delete_keys(r, prefix + "*")
+    mismatched = [fmt for fmt in STUDENT_FORMATS if decoded[fmt] != decoded["json"]]
+    if mismatched:
+        print(f"⚠️ Записи в форматах {', '.join(mismatched)} читаются иначе, чем json")
+    else:
+        print(f"✅ Записи всех форматов читаются одинаково ({len(sample)} студентов)")
+    return not mismatched
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Сравнение расхода памяти Redis форматами записей студентов")
+    parser.add_argument("--students", type=int, default=1000,
+                        help="сколько студентов записывать для замера")
+    return parser.parse_args()
+
+def main():
+    """Замер памяти для форматов json, hash и msgpack на студентах из PostgreSQL"""
+    args = parse_args()
+    print("\n===== ПАМЯТЬ REDIS ПО ФОРМАТАМ ЗАПИСЕЙ =====")
+
+    if not connect_to_redis():
+        return
+
+    pg_connection, pg_cursor = connect_to_postgresql()
+    if not pg_connection or not pg_cursor:
+        return
+
+    raw = raw_client()
+    try:
+        pg_cursor.execute(STUDENT_QUERY + " ORDER BY s.id LIMIT %s", (args.students,))
+        students = pg_cursor.fetchall()
+        if not students:
+            print("❌ В PostgreSQL нет студентов")
+            return
+
+        print(f"Студентов в замере: {len(students)}")
+        compare_formats(raw, students)
+        check_roundtrip(raw, students)
+    except Exception as e:
+        print(f"❌ Ошибка при замере памяти: {e}")
+    finally:
+        raw.close()
+        release_postgresql(pg_connection, pg_cursor)
+        print("✅ Соединение с PostgreSQL возвращено в пул")
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,10 @@
 import sys
 import subprocess
 import os
-import time
 import platform
 
+from readiness import wait_for_services
+
 def print_banner(text):
     """Вывод баннера"""
     width = 80
@@ -92,9 +93,11 @@ def start_containers():
         # Перейти к корневой директории проекта
         os.chdir('..')
         subprocess.run(["docker-compose", "up", "-d"], check=True)
-        print("✅ Контейнеры запущены. Ожидание инициализации...")
-        # Даем время на инициализацию
-        time.sleep(10)
+        print("✅ Контейнеры запущены. Ожидание готовности сервисов...")
+        # Опрашиваем все сервисы параллельно, пока они не начнут принимать запросы
+        results = wait_for_services()
+        if not all(results.values()):
+            print("⚠️ Не все сервисы готовы к работе")
         return True
     except subprocess.CalledProcessError as e:
         print(f"❌ Ошибка при запуске контейнеров: {e}")